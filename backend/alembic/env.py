@@ -9,20 +9,30 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from app.core.config import settings
-from app.db.base import Base
+from app.db.base import Base, database_url
 
 # Import all models here to ensure they're registered with SQLAlchemy
+from app.models.tenant import Tenant
 from app.models.user import User
 from app.models.customer import Customer
 from app.models.staff import Staff
 from app.models.service import Service
 from app.models.appointment import Appointment
+from app.models.payroll import PayrollPeriod, PayrollEntry
+from app.models.invoice import BillingRun, Invoice, InvoiceLine
+from app.models.forecast import DemandForecast
+from app.models.idempotency import IdempotencyKey
+from app.models.audit import AuditLog
+from app.models.schedule import ScheduleDay
+from app.models.waitlist import WaitlistEntry
+from app.models.purge import PurgeJob
+from app.models.token import RefreshToken, RevokedToken
 
 # this is the Alembic Config object
 config = context.config
 
 # Override sqlalchemy.url with the one from settings
-config.set_main_option("sqlalchemy.url", settings.DATABASE_URL)
+config.set_main_option("sqlalchemy.url", database_url(settings.DATABASE_URL))
 
 # Interpret the config file for Python logging
 if config.config_file_name is not None:
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.endpoints import auth, customers, staff, services, appointments
+from app.api.endpoints import auth, customers, staff, services, appointments, sync, payroll, invoices, forecast, audit, schedule, profiling, waitlist, purge
 
 api_router = APIRouter()
 
@@ -8,3 +8,12 @@ api_router.include_router(customers.router, prefix="/customers", tags=["customer
 api_router.include_router(staff.router, prefix="/staff", tags=["staff"])
 api_router.include_router(services.router, prefix="/services", tags=["services"])
 api_router.include_router(appointments.router, prefix="/appointments", tags=["appointments"])
+api_router.include_router(sync.router, prefix="/sync", tags=["sync"])
+api_router.include_router(payroll.router, prefix="/payroll", tags=["payroll"])
+api_router.include_router(invoices.router, prefix="/invoices", tags=["invoices"])
+api_router.include_router(forecast.router, prefix="/forecast", tags=["forecast"])
+api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
+api_router.include_router(schedule.router, prefix="/schedule", tags=["schedule"])
+api_router.include_router(waitlist.router, prefix="/waitlist", tags=["waitlist"])
+api_router.include_router(purge.router, prefix="/purge", tags=["purge"])
+api_router.include_router(profiling.router, prefix="/admin/profiling", tags=["profiling"])
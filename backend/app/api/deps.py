@@ -1,12 +1,18 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Any, Dict, Generator, List, Optional, Tuple, Type
+from fastapi import Depends, Header, HTTPException, Query, Response, status
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from app.core.config import settings
+from app.core.revocation import revocation_list
 from app.core.security import decode_access_token
-from app.db.base import get_db
+from app.core.tracing import traced
+from app.crud.base import CountStrategy
+from app.db.base import Base, get_db
 from app.crud.crud_user import user as user_crud
 from app.models.user import User
 from app.schemas.user import TokenData
@@ -14,6 +20,7 @@ from app.schemas.user import TokenData
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
+@traced("dependency:get_current_user")
 async def get_current_user(
     db: Session = Depends(get_db),
     token: str = Depends(oauth2_scheme)
@@ -25,7 +32,11 @@ async def get_current_user(
     )
 
     payload = decode_access_token(token)
-    if payload is None:
+    # Refresh and calendar tokens are not access tokens
+    if payload is None or "scope" in payload:
+        raise credentials_exception
+    # Tokens issued before sessions existed carry neither id
+    if revocation_list.is_revoked(db, (payload.get("jti"), payload.get("sid"))):
         raise credentials_exception
 
     email: str = payload.get("sub")
@@ -36,9 +47,23 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
 
+    # Attribute audited mutations in this request to the user
+    db.info["user_id"] = user.id
+
+    # Scope every CRUD query in this request to the user's tenant. Only
+    # platform admins may act without one.
+    if user.tenant_id is not None:
+        db.info["tenant_id"] = user.tenant_id
+    elif not user_crud.is_admin(user):
+        raise HTTPException(
+            status_code=403,
+            detail="The user is not assigned to a tenant"
+        )
+
     return user
 
 
+@traced("dependency:get_current_active_user")
 async def get_current_active_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -47,6 +72,7 @@ async def get_current_active_user(
     return current_user
 
 
+@traced("dependency:get_current_admin_user")
 async def get_current_admin_user(
     current_user: User = Depends(get_current_user),
 ) -> User:
@@ -56,3 +82,112 @@ async def get_current_admin_user(
             detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def total_count_headers(count: Tuple[int, CountStrategy]) -> Dict[str, str]:
+    total, strategy = count
+    return {"X-Total-Count": str(total), "X-Total-Count-Strategy": strategy.value}
+
+
+def set_total_count(response: Response, count: Tuple[int, CountStrategy]) -> None:
+    response.headers.update(total_count_headers(count))
+
+
+@traced("dependency:get_if_match")
+def get_if_match(if_match: Optional[str] = Header(None)) -> Optional[int]:
+    """
+    Row version a conditional write must match, from the If-Match header
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    tag = if_match.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    try:
+        return int(tag.strip('"'))
+    except ValueError:
+        # Not one of our ETags, so it cannot match the current version
+        raise HTTPException(status_code=412, detail="Precondition failed")
+
+
+def set_etag(response: Response, obj: Any) -> None:
+    response.headers["ETag"] = f'"{obj.version}"'
+
+
+class FieldSelector:
+    """
+    Dependency parsing ``?fields=a,b`` into the columns of ``model`` that
+    ``schema`` exposes; None means the full representation
+    """
+
+    def __init__(self, schema: Type[BaseModel], model: Type[Base]):
+        columns = model.__table__.columns
+        self.allowed = [name for name in schema.model_fields if name in columns]
+
+    @traced("dependency:fields")
+    def __call__(
+        self,
+        fields: Optional[str] = Query(
+            None, description="Comma-separated fields to return, e.g. id,first_name"
+        ),
+    ) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = sorted(set(requested) - set(self.allowed))
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown fields: {', '.join(unknown)}. Available: {', '.join(self.allowed)}",
+            )
+        return ["id"] + [name for name in dict.fromkeys(requested) if name != "id"]
+
+
+def sparse_content(data: Any, fields: List[str]) -> Any:
+    if isinstance(data, list):
+        return [{name: getattr(item, name) for name in fields} for item in data]
+    return {name: getattr(data, name) for name in fields}
+
+
+def sparse_response(response: Response, data: Any, fields: Optional[List[str]]) -> Any:
+    """
+    ``data`` trimmed to ``fields``, bypassing the endpoint's full response
+    model; returned unchanged when no fields were requested
+    """
+    if fields is None:
+        return data
+    content = sparse_content(data, fields)
+    # Keep headers such as X-Total-Count and ETag set on ``response``
+    headers = {
+        key: value for key, value in response.headers.items() if key != "content-length"
+    }
+    return JSONResponse(jsonable_encoder(content), headers=headers)
+
+
+@traced("dependency:get_ids")
+def get_ids(
+    ids: Optional[str] = Query(None, description="Comma-separated ids to fetch, e.g. 1,2,3"),
+) -> Optional[List[int]]:
+    """
+    Ids for a batch lookup from ``?ids=``; None when absent
+    """
+    if ids is None:
+        return None
+    try:
+        parsed = [int(value) for value in ids.split(",") if value.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    check_batch_size(parsed)
+    return parsed
+
+
+def check_batch_size(ids: List[int]) -> None:
+    if len(ids) > settings.BATCH_LOOKUP_MAX_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.BATCH_LOOKUP_MAX_IDS} ids per lookup",
+        )
+
+
+def set_missing_ids(response: Response, missing: List[int]) -> None:
+    response.headers["X-Missing-Ids"] = ",".join(str(id) for id in missing)
@@ -1,19 +1,99 @@
-from typing import Any, List, Optional
+import json
+from typing import Any, Dict, List, Optional, Tuple, Union
 from datetime import datetime
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user, get_db
-from app.crud.crud_appointment import appointment as appointment_crud
+from app.api.deps import (
+    FieldSelector,
+    check_batch_size,
+    get_current_active_user,
+    get_db,
+    get_ids,
+    get_if_match,
+    set_etag,
+    set_missing_ids,
+    sparse_content,
+    sparse_response,
+    total_count_headers,
+)
+from app.core.singleflight import single_flight
+from app.crud.base import CountStrategy
+from app.crud.crud_appointment import ACTIVE_STATUSES, SlotUnavailable, appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
+from app.crud.crud_staff import staff as staff_crud
 from app.models.user import User
-from app.models.appointment import AppointmentStatus
+from app.models.appointment import Appointment as AppointmentModel, AppointmentStatus
 from app.schemas.appointment import Appointment, AppointmentCreate, AppointmentUpdate
+from app.schemas.batch import BatchLookup, IdList
+from app.waitlist.matching import backfill
 
 router = APIRouter()
 
+appointment_fields = FieldSelector(Appointment, appointment_crud.model)
+appointment_list = TypeAdapter(List[Appointment])
+
+
+def check_references(
+    db: Session, appointment_in: Union[AppointmentCreate, AppointmentUpdate]
+) -> None:
+    """
+    Reject customer, staff or service ids outside the current tenant
+    """
+    for crud, field, label in (
+        (customer_crud, "customer_id", "Customer"),
+        (staff_crud, "staff_id", "Staff member"),
+        (service_crud, "service_id", "Service"),
+    ):
+        ref_id = getattr(appointment_in, field)
+        if ref_id is not None and not crud.get(db, id=ref_id):
+            raise HTTPException(status_code=400, detail=f"{label} not found")
+
+
+SLOT_FIELDS = ("staff_id", "service_id", "scheduled_date", "end_date", "status")
+
+
+def reserve_slot(
+    db: Session,
+    appointment_in: Union[AppointmentCreate, AppointmentUpdate],
+    appointment: Optional[AppointmentModel] = None,
+) -> None:
+    """
+    Lock the staff member until the write commits and reject it with 409 if
+    it would double-book them; waitlist bookings reserve the same way
+    """
+    changes = appointment_in.model_dump(
+        include=set(SLOT_FIELDS), exclude_unset=appointment is not None
+    )
+    if appointment is not None and all(
+        changes[field] is None or changes[field] == getattr(appointment, field) for field in changes
+    ):
+        return
+    slot = {field: getattr(appointment, field) for field in SLOT_FIELDS} if appointment else {}
+    slot.update({field: value for field, value in changes.items() if value is not None})
+    if slot.get("status", AppointmentStatus.SCHEDULED) not in ACTIVE_STATUSES:
+        return
+    try:
+        appointment_crud.reserve_slot(
+            db,
+            staff_id=slot["staff_id"],
+            service_id=slot["service_id"],
+            start=slot["scheduled_date"],
+            end=slot.get("end_date"),
+            exclude_id=appointment.id if appointment else None,
+        )
+    except SlotUnavailable:
+        db.rollback()
+        raise HTTPException(status_code=409, detail="The staff member is already booked at that time")
+
 
 @router.get("/", response_model=List[Appointment])
-def read_appointments(
+async def read_appointments(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
@@ -22,30 +102,80 @@ def read_appointments(
     status: Optional[AppointmentStatus] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    include_total: bool = False,
+    count_strategy: CountStrategy = CountStrategy.AUTO,
+    fields: Optional[List[str]] = Depends(appointment_fields),
+    ids: Optional[List[int]] = Depends(get_ids),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve appointments with optional filters
     """
-    if customer_id:
-        appointments = appointment_crud.get_by_customer(
-            db, customer_id=customer_id, skip=skip, limit=limit
+    if ids is not None:
+        appointments, missing = await run_in_threadpool(
+            appointment_crud.lookup, db, ids=ids, fields=fields
         )
+        set_missing_ids(response, missing)
+        return sparse_response(response, appointments, fields)
+    if customer_id:
+        filters = {"customer_id": customer_id}
     elif staff_id:
-        appointments = appointment_crud.get_by_staff(
-            db, staff_id=staff_id, skip=skip, limit=limit
-        )
+        filters = {"staff_id": staff_id}
     elif start_date and end_date:
-        appointments = appointment_crud.get_by_date_range(
-            db, start_date=start_date, end_date=end_date, skip=skip, limit=limit
-        )
+        filters = {"start_date": start_date, "end_date": end_date}
     elif status:
-        appointments = appointment_crud.get_by_status(
-            db, status=status, skip=skip, limit=limit
-        )
+        filters = {"status": status}
     else:
-        appointments = appointment_crud.get_multi(db, skip=skip, limit=limit)
-    return appointments
+        filters = {}
+
+    def render() -> Tuple[bytes, Dict[str, str]]:
+        appointments = appointment_crud.get_filtered(
+            db, skip=skip, limit=limit, fields=fields, **filters
+        )
+        headers = {}
+        if include_total:
+            criteria = appointment_crud.filter_criteria(**filters)
+            headers = total_count_headers(
+                appointment_crud.count(db, *criteria, strategy=count_strategy)
+            )
+        if fields is None:
+            body = appointment_list.dump_json(
+                appointment_list.validate_python(appointments, from_attributes=True)
+            )
+        else:
+            body = json.dumps(
+                jsonable_encoder(sparse_content(appointments, fields)), separators=(",", ":")
+            ).encode()
+        return body, headers
+
+    # Devices polling the same day's schedule share one query and rendering.
+    # Async so callers waiting on a flight hold no threadpool worker.
+    key = (
+        "appointments",
+        db.info.get("tenant_id"),
+        skip,
+        limit,
+        tuple(sorted(filters.items())),
+        count_strategy if include_total else None,
+        tuple(fields or ()),
+    )
+    body, headers = await single_flight.do_async(key, render)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@router.post("/lookup", response_model=BatchLookup[Appointment])
+def lookup_appointments(
+    *,
+    db: Session = Depends(get_db),
+    id_list: IdList,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Appointments by id in one query, for id sets too long for ?ids=
+    """
+    check_batch_size(id_list.ids)
+    appointments, missing = appointment_crud.lookup(db, ids=id_list.ids)
+    return {"items": appointments, "missing": missing}
 
 
 @router.post("/", response_model=Appointment)
@@ -58,32 +188,41 @@ def create_appointment(
     """
     Create new appointment
     """
+    check_references(db, appointment_in)
+    reserve_slot(db, appointment_in)
     appointment = appointment_crud.create(db, obj_in=appointment_in)
+    single_flight.invalidate("appointments", appointment.tenant_id)
     return appointment
 
 
 @router.get("/{appointment_id}", response_model=Appointment)
 def read_appointment(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     appointment_id: int,
+    fields: Optional[List[str]] = Depends(appointment_fields),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get appointment by ID
     """
-    appointment = appointment_crud.get(db, id=appointment_id)
+    appointment = appointment_crud.get(db, id=appointment_id, fields=fields)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    return appointment
+    set_etag(response, appointment)
+    return sparse_response(response, appointment, fields)
 
 
 @router.put("/{appointment_id}", response_model=Appointment)
 def update_appointment(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     appointment_id: int,
     appointment_in: AppointmentUpdate,
+    background_tasks: BackgroundTasks,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -92,7 +231,17 @@ def update_appointment(
     appointment = appointment_crud.get(db, id=appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    appointment = appointment_crud.update(db, db_obj=appointment, obj_in=appointment_in)
+    check_references(db, appointment_in)
+    reserve_slot(db, appointment_in, appointment)
+    was_active = appointment.status in ACTIVE_STATUSES
+    appointment = appointment_crud.update(db, db_obj=appointment, obj_in=appointment_in, version=version)
+    single_flight.invalidate("appointments", appointment.tenant_id)
+    if was_active and appointment.status in (AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW):
+        # Offer the freed slot to the waitlist once the response is sent
+        background_tasks.add_task(
+            backfill, appointment.tenant_id, appointment.id, db.info.get("user_id")
+        )
+    set_etag(response, appointment)
     return appointment
 
 
@@ -101,6 +250,7 @@ def delete_appointment(
     *,
     db: Session = Depends(get_db),
     appointment_id: int,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -109,5 +259,6 @@ def delete_appointment(
     appointment = appointment_crud.get(db, id=appointment_id)
     if not appointment:
         raise HTTPException(status_code=404, detail="Appointment not found")
-    appointment = appointment_crud.delete(db, id=appointment_id)
+    appointment = appointment_crud.delete(db, id=appointment_id, version=version)
+    single_flight.invalidate("appointments", appointment.tenant_id)
     return {"message": "Appointment deleted successfully"}
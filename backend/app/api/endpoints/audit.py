@@ -0,0 +1,31 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_db
+from app.core.audit import audit_log as audit_buffer
+from app.crud.crud_audit import audit_log as audit_crud
+from app.models.user import User
+from app.schemas.audit import AuditLog
+
+router = APIRouter()
+
+
+@router.get("/{entity_type}/{entity_id}", response_model=List[AuditLog])
+def read_entity_history(
+    *,
+    db: Session = Depends(get_db),
+    entity_type: str,
+    entity_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Change history of one entity, e.g. /audit/appointments/42
+    """
+    # Records still buffered in this worker would otherwise be missing
+    audit_buffer.flush()
+    return audit_crud.get_by_entity(
+        db, entity_type=entity_type, entity_id=entity_id, skip=skip, limit=limit
+    )
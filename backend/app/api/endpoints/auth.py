@@ -1,15 +1,15 @@
-from datetime import timedelta
 from typing import Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 
-from app.core.config import settings
-from app.core.security import create_access_token
+from app.core.security import decode_access_token
+from app.crud.crud_token import RefreshTokenReused, token as token_crud
 from app.crud.crud_user import user as user_crud
 from app.db.base import get_db
-from app.schemas.user import Token, UserCreate, User
-from app.api.deps import get_current_active_user
+from app.models.tenant import Tenant
+from app.schemas.user import Token, TokenRefresh, UserCreate, User, UserRegister, UserTenantAssign
+from app.api.deps import get_current_active_user, get_current_admin_user, oauth2_scheme
 
 router = APIRouter()
 
@@ -36,23 +36,70 @@ def login(
             detail="Inactive user"
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return {
-        "access_token": create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
-        ),
-        "token_type": "bearer",
-    }
+    return token_crud.issue(db, user)
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(
+    *,
+    db: Session = Depends(get_db),
+    token_in: TokenRefresh,
+) -> Any:
+    """
+    Exchange a refresh token for a new access and refresh token
+    """
+    try:
+        token = token_crud.rotate(db, token_in.refresh_token)
+    except RefreshTokenReused:
+        token = None
+    if token is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid refresh token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return token
+
+
+@router.post("/logout")
+def logout(
+    db: Session = Depends(get_db),
+    access_token: str = Depends(oauth2_scheme),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Revoke the session of the presented token
+    """
+    session_id = decode_access_token(access_token).get("sid")
+    if session_id:
+        token_crud.revoke_session(db, session_id, user_id=current_user.id)
+    return {"message": "Logged out successfully"}
+
+
+@router.post("/users/{user_id}/revoke")
+def revoke_user_tokens(
+    *,
+    db: Session = Depends(get_db),
+    user_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Sign a user out everywhere, e.g. when they leave
+    """
+    user = user_crud.get(db, id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return {"sessions_revoked": token_crud.revoke_user(db, user.id)}
 
 
 @router.post("/register", response_model=User)
 def register(
     *,
     db: Session = Depends(get_db),
-    user_in: UserCreate,
+    user_in: UserRegister,
 ) -> Any:
     """
-    Register new user
+    Register new user; an admin assigns them to a tenant
     """
     user = user_crud.get_by_email(db, email=user_in.email)
     if user:
@@ -60,10 +107,63 @@ def register(
             status_code=400,
             detail="A user with this email already exists",
         )
-    user = user_crud.create(db, obj_in=user_in)
+    user = user_crud.create(
+        db,
+        obj_in=UserCreate(
+            email=user_in.email, full_name=user_in.full_name, password=user_in.password
+        ),
+    )
     return user
 
 
+@router.post("/users", response_model=User)
+def create_user(
+    *,
+    db: Session = Depends(get_db),
+    user_in: UserCreate,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Create a user; tenant admins can only add users to their own tenant
+    """
+    if current_user.tenant_id is not None:
+        user_in = user_in.model_copy(update={"tenant_id": current_user.tenant_id})
+    elif user_in.tenant_id is not None and db.get(Tenant, user_in.tenant_id) is None:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    if user_crud.get_by_email(db, email=user_in.email):
+        raise HTTPException(
+            status_code=400,
+            detail="A user with this email already exists",
+        )
+    return user_crud.create(db, obj_in=user_in)
+
+
+@router.put("/users/{user_id}/tenant", response_model=User)
+def assign_user_tenant(
+    *,
+    db: Session = Depends(get_db),
+    user_id: int,
+    assignment: UserTenantAssign,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Assign a registered user to a tenant (platform admins only)
+    """
+    if current_user.tenant_id is not None:
+        raise HTTPException(
+            status_code=403,
+            detail="The user doesn't have enough privileges"
+        )
+    user = user_crud.get(db, id=user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if db.get(Tenant, assignment.tenant_id) is None:
+        raise HTTPException(status_code=404, detail="Tenant not found")
+    return user_crud.assign_tenant(
+        db, db_obj=user, tenant_id=assignment.tenant_id, is_admin=assignment.is_admin
+    )
+
+
 @router.get("/me", response_model=User)
 def read_users_me(
     current_user: User = Depends(get_current_active_user),
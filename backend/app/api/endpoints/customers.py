@@ -1,27 +1,70 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import (
+    FieldSelector,
+    check_batch_size,
+    get_current_active_user,
+    get_current_admin_user,
+    get_db,
+    get_ids,
+    get_if_match,
+    set_etag,
+    set_missing_ids,
+    set_total_count,
+    sparse_response,
+)
+from app.crud.base import CountStrategy
 from app.crud.crud_customer import customer as customer_crud
+from app.dedup.merge import merge_customers
 from app.models.user import User
-from app.schemas.customer import Customer, CustomerCreate, CustomerUpdate
+from app.schemas.customer import Customer, CustomerCreate, CustomerMerge, CustomerUpdate
+from app.schemas.batch import BatchLookup, IdList
 
 router = APIRouter()
 
+customer_fields = FieldSelector(Customer, customer_crud.model)
+
 
 @router.get("/", response_model=List[Customer])
 def read_customers(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
+    include_total: bool = False,
+    count_strategy: CountStrategy = CountStrategy.AUTO,
+    fields: Optional[List[str]] = Depends(customer_fields),
+    ids: Optional[List[int]] = Depends(get_ids),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve customers
     """
-    customers = customer_crud.get_multi(db, skip=skip, limit=limit)
-    return customers
+    if ids is not None:
+        customers, missing = customer_crud.lookup(db, ids=ids, fields=fields)
+        set_missing_ids(response, missing)
+        return sparse_response(response, customers, fields)
+    customers = customer_crud.get_multi(db, skip=skip, limit=limit, fields=fields)
+    if include_total:
+        set_total_count(response, customer_crud.count(db, strategy=count_strategy))
+    return sparse_response(response, customers, fields)
+
+
+@router.post("/lookup", response_model=BatchLookup[Customer])
+def lookup_customers(
+    *,
+    db: Session = Depends(get_db),
+    id_list: IdList,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Customers by id in one query, for id sets too long for ?ids=
+    """
+    check_batch_size(id_list.ids)
+    customers, missing = customer_crud.lookup(db, ids=id_list.ids)
+    return {"items": customers, "missing": missing}
 
 
 @router.post("/", response_model=Customer)
@@ -48,25 +91,30 @@ def create_customer(
 @router.get("/{customer_id}", response_model=Customer)
 def read_customer(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     customer_id: int,
+    fields: Optional[List[str]] = Depends(customer_fields),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get customer by ID
     """
-    customer = customer_crud.get(db, id=customer_id)
+    customer = customer_crud.get(db, id=customer_id, fields=fields)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    return customer
+    set_etag(response, customer)
+    return sparse_response(response, customer, fields)
 
 
 @router.put("/{customer_id}", response_model=Customer)
 def update_customer(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     customer_id: int,
     customer_in: CustomerUpdate,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -75,7 +123,39 @@ def update_customer(
     customer = customer_crud.get(db, id=customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    customer = customer_crud.update(db, db_obj=customer, obj_in=customer_in)
+    customer = customer_crud.update(db, db_obj=customer, obj_in=customer_in, version=version)
+    set_etag(response, customer)
+    return customer
+
+
+@router.post("/{customer_id}/merge", response_model=Customer)
+def merge_customer(
+    *,
+    response: Response,
+    db: Session = Depends(get_db),
+    customer_id: int,
+    merge_in: CustomerMerge,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Merge duplicate customers into this one: their appointments move here
+    and they are deleted
+    """
+    if customer_id in merge_in.duplicate_ids:
+        raise HTTPException(status_code=400, detail="A customer cannot be merged into itself")
+    customer = customer_crud.get(db, id=customer_id)
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    duplicates, missing = customer_crud.lookup(db, ids=merge_in.duplicate_ids)
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Customers not found: {missing}")
+    foreign = [duplicate.id for duplicate in duplicates if duplicate.tenant_id != customer.tenant_id]
+    if foreign:
+        raise HTTPException(
+            status_code=400, detail=f"Customers of another tenant cannot be merged: {foreign}"
+        )
+    merge_customers(db, {duplicate_id: customer_id for duplicate_id in merge_in.duplicate_ids})
+    set_etag(response, customer)
     return customer
 
 
@@ -84,6 +164,7 @@ def delete_customer(
     *,
     db: Session = Depends(get_db),
     customer_id: int,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -92,5 +173,5 @@ def delete_customer(
     customer = customer_crud.get(db, id=customer_id)
     if not customer:
         raise HTTPException(status_code=404, detail="Customer not found")
-    customer = customer_crud.delete(db, id=customer_id)
+    customer = customer_crud.delete(db, id=customer_id, version=version)
     return {"message": "Customer deleted successfully"}
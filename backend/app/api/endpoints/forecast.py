@@ -0,0 +1,58 @@
+from typing import Any, Optional
+from datetime import date
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db
+from app.crud.crud_forecast import demand_forecast as forecast_crud
+from app.forecasting.job import run_nightly
+from app.models.user import User
+from app.schemas.forecast import DemandForecast
+
+router = APIRouter()
+
+
+@router.get("/", response_model=DemandForecast)
+def read_forecast(
+    db: Session = Depends(get_db),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Latest precomputed demand and capacity forecast, optionally limited to
+    a date range
+    """
+    forecast = forecast_crud.get_latest(db)
+    if not forecast:
+        raise HTTPException(status_code=404, detail="No forecast has been computed yet")
+    days = [
+        day for day in forecast.days
+        if (start_date is None or day["date"] >= start_date.isoformat())
+        and (end_date is None or day["date"] <= end_date.isoformat())
+    ]
+    return {
+        "id": forecast.id,
+        "generated_at": forecast.generated_at,
+        "start_date": forecast.start_date,
+        "history_weeks": forecast.history_weeks,
+        "active_staff": forecast.active_staff,
+        "days": days,
+    }
+
+
+@router.post("/refresh")
+def refresh_forecast(
+    *,
+    db: Session = Depends(get_db),
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Rebuild the forecast now instead of waiting for the nightly job
+    """
+    tenant_id = db.info.get("tenant_id")
+    if tenant_id is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    background_tasks.add_task(run_nightly, tenant_id)
+    return {"message": "Forecast refresh started"}
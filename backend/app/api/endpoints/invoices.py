@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, List, Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi.responses import FileResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db
+from app.core.config import settings
+from app.crud.crud_invoice import billing_run as billing_run_crud, invoice as invoice_crud
+from app.invoicing.pipeline import run_billing
+from app.models.invoice import BillingRunStatus
+from app.models.user import User
+from app.schemas.invoice import BillingRun, BillingRunCreate, Invoice, InvoiceWithLines
+
+router = APIRouter()
+
+
+@router.post("/runs", response_model=BillingRun)
+def create_billing_run(
+    *,
+    db: Session = Depends(get_db),
+    run_in: BillingRunCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Start a billing run that invoices every customer for the period
+    """
+    if db.info.get("tenant_id") is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    run = billing_run_crud.create(db, obj_in=run_in)
+    background_tasks.add_task(run_billing, run.tenant_id, run.id)
+    return run
+
+
+@router.get("/runs/{run_id}", response_model=BillingRun)
+def read_billing_run(
+    *,
+    db: Session = Depends(get_db),
+    run_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get billing run progress and throughput
+    """
+    run = billing_run_crud.get(db, id=run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    return run
+
+
+@router.post("/runs/{run_id}/resume", response_model=BillingRun)
+def resume_billing_run(
+    *,
+    db: Session = Depends(get_db),
+    run_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Resume a failed billing run, or one stalled by a crash, from its last
+    checkpoint
+    """
+    run = billing_run_crud.get(db, id=run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Billing run not found")
+    checkpointed_at = run.updated_at or run.created_at
+    stalled = (
+        run.status != BillingRunStatus.COMPLETED
+        and datetime.now(timezone.utc) - checkpointed_at
+        > timedelta(seconds=settings.BILLING_STALLED_SECONDS)
+    )
+    if run.status != BillingRunStatus.FAILED and not stalled:
+        raise HTTPException(
+            status_code=400, detail="Only failed or stalled billing runs can be resumed"
+        )
+    background_tasks.add_task(run_billing, run.tenant_id, run.id)
+    return run
+
+
+@router.get("/", response_model=List[Invoice])
+def read_invoices(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    customer_id: Optional[int] = None,
+    billing_run_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Retrieve invoices, optionally for one customer or billing run
+    """
+    if customer_id:
+        return invoice_crud.get_by_customer(db, customer_id=customer_id, skip=skip, limit=limit)
+    if billing_run_id:
+        return invoice_crud.get_by_run(db, billing_run_id=billing_run_id, skip=skip, limit=limit)
+    return invoice_crud.get_multi(db, skip=skip, limit=limit)
+
+
+@router.get("/{invoice_id}", response_model=InvoiceWithLines)
+def read_invoice(
+    *,
+    db: Session = Depends(get_db),
+    invoice_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get invoice by ID with its lines
+    """
+    invoice = invoice_crud.get(db, id=invoice_id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    return invoice
+
+
+@router.get("/{invoice_id}/document")
+def read_invoice_document(
+    *,
+    db: Session = Depends(get_db),
+    invoice_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Download the rendered invoice document
+    """
+    invoice = invoice_crud.get(db, id=invoice_id)
+    if not invoice:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    if not invoice.document_path:
+        raise HTTPException(status_code=404, detail="Invoice has not been rendered yet")
+    return FileResponse(invoice.document_path, media_type="text/html")
@@ -0,0 +1,74 @@
+from typing import Any, List
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_current_admin_user, get_db
+from app.crud.crud_payroll import payroll_period as payroll_crud
+from app.models.payroll import PayrollPeriodStatus
+from app.models.user import User
+from app.schemas.payroll import PayrollPeriod, PayrollPeriodCreate, PayrollPeriodWithEntries
+
+router = APIRouter()
+
+
+@router.get("/periods", response_model=List[PayrollPeriod])
+def read_payroll_periods(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Retrieve payroll periods
+    """
+    return payroll_crud.get_multi(db, skip=skip, limit=limit)
+
+
+@router.post("/periods", response_model=PayrollPeriod)
+def create_payroll_period(
+    *,
+    db: Session = Depends(get_db),
+    period_in: PayrollPeriodCreate,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Open a new payroll period
+    """
+    if db.info.get("tenant_id") is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    return payroll_crud.create(db, obj_in=period_in)
+
+
+@router.get("/periods/{period_id}", response_model=PayrollPeriodWithEntries)
+def read_payroll_period(
+    *,
+    db: Session = Depends(get_db),
+    period_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get a payroll period with per-staff hours and pay, recomputed if open
+    and stale
+    """
+    period = payroll_crud.get(db, id=period_id)
+    if not period:
+        raise HTTPException(status_code=404, detail="Payroll period not found")
+    return payroll_crud.refresh(db, period=period)
+
+
+@router.post("/periods/{period_id}/close", response_model=PayrollPeriodWithEntries)
+def close_payroll_period(
+    *,
+    db: Session = Depends(get_db),
+    period_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Finalise a payroll period; its figures are immutable afterwards
+    """
+    period = payroll_crud.get(db, id=period_id)
+    if not period:
+        raise HTTPException(status_code=404, detail="Payroll period not found")
+    if period.status == PayrollPeriodStatus.CLOSED:
+        raise HTTPException(status_code=400, detail="Payroll period is already closed")
+    return payroll_crud.close(db, period=period)
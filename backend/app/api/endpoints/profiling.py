@@ -0,0 +1,98 @@
+from typing import Any
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.api.deps import get_current_admin_user
+from app.core import profiling
+from app.core.config import settings
+from app.models.user import User
+from app.schemas.profiling import Profile, ProfilingStart, ProfilingStatus
+
+router = APIRouter()
+
+
+def _status() -> dict:
+    session = profiling.profiler.session
+    return {
+        "session": session.describe() if session is not None else None,
+        "profiles": [profile.summary() for profile in reversed(profiling.profiler.profiles)],
+    }
+
+
+@router.get("/", response_model=ProfilingStatus)
+def read_profiling(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Active profiling session and the most recent profiles (this worker only)
+    """
+    return _status()
+
+
+@router.post("/", response_model=ProfilingStatus)
+def start_profiling(
+    *,
+    session_in: ProfilingStart,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Profile requests matching a route and/or a fraction of all requests for
+    a bounded window, replacing any active session
+    """
+    if session_in.duration_seconds > settings.PROFILING_MAX_WINDOW_SECONDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"duration_seconds may be at most {settings.PROFILING_MAX_WINDOW_SECONDS}",
+        )
+    profiling.profiler.start(
+        profiling.ProfilingSession(
+            route=session_in.route,
+            method=session_in.method,
+            sample_rate=session_in.sample_rate,
+            duration_seconds=session_in.duration_seconds,
+            interval_ms=session_in.interval_ms or settings.PROFILING_SAMPLE_INTERVAL_MS,
+        )
+    )
+    return _status()
+
+
+@router.delete("/", response_model=ProfilingStatus)
+def stop_profiling(
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    End the active profiling session; collected profiles are kept
+    """
+    profiling.profiler.stop()
+    return _status()
+
+
+@router.get("/{profile_id}", response_model=Profile)
+def read_profile(
+    *,
+    profile_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Phase timings of one profile
+    """
+    profile = profiling.profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile.summary()
+
+
+@router.get("/{profile_id}/collapsed", response_class=PlainTextResponse)
+def read_profile_stacks(
+    *,
+    profile_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Stack samples of one profile as collapsed stacks, for flamegraph.pl or
+    speedscope
+    """
+    profile = profiling.profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed())
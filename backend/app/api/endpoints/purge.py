@@ -0,0 +1,98 @@
+from typing import Any, List
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_admin_user, get_db
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_purge import purge_job as purge_job_crud
+from app.models.customer import Customer
+from app.models.purge import PurgeJob as PurgeJobModel, PurgeJobStatus
+from app.models.user import User
+from app.purge.pipeline import plan, run_purge
+from app.schemas.purge import PurgeJob, PurgeJobCreate
+
+router = APIRouter()
+
+
+def with_progress(job: PurgeJobModel) -> PurgeJob:
+    steps = plan(job)
+    result = PurgeJob.model_validate(job)
+    if job.stage < len(steps):
+        result.stage_name = steps[job.stage].name
+    result.rows_per_second = job.rows_per_second
+    return result
+
+
+@router.post("/", response_model=PurgeJob)
+def create_purge_job(
+    *,
+    db: Session = Depends(get_db),
+    job_in: PurgeJobCreate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Start erasing a customer, or purging everything older than a cutoff
+    """
+    if db.info.get("tenant_id") is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    if job_in.customer_id is not None:
+        exists = (
+            customer_crud.query(db, include_deleted=True)
+            .filter(Customer.id == job_in.customer_id)
+            .first()
+        )
+        if not exists:
+            raise HTTPException(status_code=404, detail="Customer not found")
+    job = purge_job_crud.create(db, obj_in=job_in)
+    background_tasks.add_task(run_purge, job.tenant_id, job.id)
+    return with_progress(job)
+
+
+@router.get("/", response_model=List[PurgeJob])
+def read_purge_jobs(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Retrieve purge jobs, newest first
+    """
+    return [with_progress(job) for job in purge_job_crud.get_recent(db, skip=skip, limit=limit)]
+
+
+@router.get("/{job_id}", response_model=PurgeJob)
+def read_purge_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Get purge job progress and throughput
+    """
+    job = purge_job_crud.get(db, id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    return with_progress(job)
+
+
+@router.post("/{job_id}/resume", response_model=PurgeJob)
+def resume_purge_job(
+    *,
+    db: Session = Depends(get_db),
+    job_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_admin_user),
+) -> Any:
+    """
+    Resume a failed purge job from its last checkpoint
+    """
+    job = purge_job_crud.get(db, id=job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Purge job not found")
+    if job.status != PurgeJobStatus.FAILED:
+        raise HTTPException(status_code=400, detail="Only failed purge jobs can be resumed")
+    background_tasks.add_task(run_purge, job.tenant_id, job.id)
+    return with_progress(job)
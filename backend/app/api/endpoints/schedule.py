@@ -0,0 +1,29 @@
+from typing import Any
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_db
+from app.crud.crud_schedule import schedule_day
+from app.models.user import User
+from app.schemas.schedule import ScheduleBoard
+
+router = APIRouter()
+
+
+@router.get("/{day}", response_model=ScheduleBoard)
+def read_schedule(
+    *,
+    db: Session = Depends(get_db),
+    day: date,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    The day's board: every active staff member's jobs in order, with
+    customer and service inlined and gaps and overlaps marked
+    """
+    if db.info.get("tenant_id") is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    # Materialised as JSON-ready data, so it is sent without re-validation
+    return JSONResponse(schedule_day.get_board(db, day))
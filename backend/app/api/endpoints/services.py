@@ -1,31 +1,85 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import (
+    FieldSelector,
+    check_batch_size,
+    get_current_active_user,
+    get_db,
+    get_ids,
+    get_if_match,
+    set_etag,
+    set_missing_ids,
+    set_total_count,
+    sparse_response,
+)
+from app.core.cache import EntityCache
+from app.crud.base import CountStrategy
 from app.crud.crud_service import service as service_crud
 from app.models.user import User
 from app.schemas.service import Service, ServiceCreate, ServiceUpdate
+from app.schemas.batch import BatchLookup, IdList
 
 router = APIRouter()
 
+service_fields = FieldSelector(Service, service_crud.model)
+service_cache = EntityCache(service_crud, Service)
+
 
 @router.get("/", response_model=List[Service])
 def read_services(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
+    include_total: bool = False,
+    count_strategy: CountStrategy = CountStrategy.AUTO,
+    fields: Optional[List[str]] = Depends(service_fields),
+    ids: Optional[List[int]] = Depends(get_ids),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve services
     """
-    if active_only:
-        services = service_crud.get_active(db, skip=skip, limit=limit)
+    if ids is not None:
+        services, missing = service_crud.lookup(db, ids=ids, fields=fields)
+        set_missing_ids(response, missing)
+        return sparse_response(response, services, fields)
+
+    def load() -> List[Any]:
+        if active_only:
+            return service_crud.get_active(db, skip=skip, limit=limit, fields=fields)
+        return service_crud.get_multi(db, skip=skip, limit=limit, fields=fields)
+
+    if fields is None:
+        # The catalogue is read on every booking screen and rarely changes
+        services = service_cache.query(db, "list", (active_only, skip, limit), load)
     else:
-        services = service_crud.get_multi(db, skip=skip, limit=limit)
-    return services
+        services = load()
+    if include_total:
+        if active_only:
+            count = service_crud.count_active(db, strategy=count_strategy)
+        else:
+            count = service_crud.count(db, strategy=count_strategy)
+        set_total_count(response, count)
+    return sparse_response(response, services, fields)
+
+
+@router.post("/lookup", response_model=BatchLookup[Service])
+def lookup_services(
+    *,
+    db: Session = Depends(get_db),
+    id_list: IdList,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Services by id in one query, for id sets too long for ?ids=
+    """
+    check_batch_size(id_list.ids)
+    services, missing = service_crud.lookup(db, ids=id_list.ids)
+    return {"items": services, "missing": missing}
 
 
 @router.post("/", response_model=Service)
@@ -45,25 +99,33 @@ def create_service(
 @router.get("/{service_id}", response_model=Service)
 def read_service(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     service_id: int,
+    fields: Optional[List[str]] = Depends(service_fields),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get service by ID
     """
-    service = service_crud.get(db, id=service_id)
+    if fields is None:
+        service = service_cache.get(db, service_id)
+    else:
+        service = service_crud.get(db, id=service_id, fields=fields)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    return service
+    set_etag(response, service)
+    return sparse_response(response, service, fields)
 
 
 @router.put("/{service_id}", response_model=Service)
 def update_service(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     service_id: int,
     service_in: ServiceUpdate,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -72,7 +134,8 @@ def update_service(
     service = service_crud.get(db, id=service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    service = service_crud.update(db, db_obj=service, obj_in=service_in)
+    service = service_crud.update(db, db_obj=service, obj_in=service_in, version=version)
+    set_etag(response, service)
     return service
 
 
@@ -81,6 +144,7 @@ def delete_service(
     *,
     db: Session = Depends(get_db),
     service_id: int,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -89,5 +153,5 @@ def delete_service(
     service = service_crud.get(db, id=service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    service = service_crud.delete(db, id=service_id)
+    service = service_crud.delete(db, id=service_id, version=version)
     return {"message": "Service deleted successfully"}
@@ -1,31 +1,142 @@
-from typing import Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, List, Optional
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from itertools import islice
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from app.api.deps import get_current_active_user, get_db
+from app.api.deps import (
+    FieldSelector,
+    check_batch_size,
+    get_current_active_user,
+    get_db,
+    get_ids,
+    get_if_match,
+    set_etag,
+    set_missing_ids,
+    set_total_count,
+    sparse_response,
+)
+from app.core.config import settings
+from app.core.security import create_calendar_token, decode_calendar_token
+from app.crud.base import CountStrategy
+from app.crud.crud_appointment import appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
 from app.crud.crud_staff import staff as staff_crud
+from app.geo.index import staff_locator
+from app.ical.feed import FeedCache, RenderedFeed, feed_etag, render_calendar
 from app.models.user import User
-from app.schemas.staff import Staff, StaffCreate, StaffUpdate
+from app.schemas.staff import NearestStaff, Staff, StaffCreate, StaffUpdate
+from app.schemas.batch import BatchLookup, IdList
 
 router = APIRouter()
 
+staff_fields = FieldSelector(Staff, staff_crud.model)
+
+calendar_cache = FeedCache(settings.CALENDAR_CACHE_SIZE)
+
 
 @router.get("/", response_model=List[Staff])
 def read_staff(
+    response: Response,
     db: Session = Depends(get_db),
     skip: int = 0,
     limit: int = 100,
     active_only: bool = False,
+    include_total: bool = False,
+    count_strategy: CountStrategy = CountStrategy.AUTO,
+    fields: Optional[List[str]] = Depends(staff_fields),
+    ids: Optional[List[int]] = Depends(get_ids),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Retrieve staff members
     """
+    if ids is not None:
+        staff_members, missing = staff_crud.lookup(db, ids=ids, fields=fields)
+        set_missing_ids(response, missing)
+        return sparse_response(response, staff_members, fields)
     if active_only:
-        staff_members = staff_crud.get_active(db, skip=skip, limit=limit)
+        staff_members = staff_crud.get_active(db, skip=skip, limit=limit, fields=fields)
     else:
-        staff_members = staff_crud.get_multi(db, skip=skip, limit=limit)
-    return staff_members
+        staff_members = staff_crud.get_multi(db, skip=skip, limit=limit, fields=fields)
+    if include_total:
+        if active_only:
+            count = staff_crud.count_active(db, strategy=count_strategy)
+        else:
+            count = staff_crud.count(db, strategy=count_strategy)
+        set_total_count(response, count)
+    return sparse_response(response, staff_members, fields)
+
+
+@router.post("/lookup", response_model=BatchLookup[Staff])
+def lookup_staff(
+    *,
+    db: Session = Depends(get_db),
+    id_list: IdList,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Staff members by id in one query, for id sets too long for ?ids=
+    """
+    check_batch_size(id_list.ids)
+    staff_members, missing = staff_crud.lookup(db, ids=id_list.ids)
+    return {"items": staff_members, "missing": missing}
+
+
+@router.get("/nearest", response_model=List[NearestStaff])
+def read_nearest_staff(
+    db: Session = Depends(get_db),
+    customer_id: int = Query(...),
+    at: datetime = Query(...),
+    service_id: Optional[int] = None,
+    duration_minutes: int = Query(120, ge=1),
+    k: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Closest active staff members to a customer who are free at the given time
+    """
+    customer = customer_crud.get(db, id=customer_id)
+    if not customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    if customer.latitude is None:
+        raise HTTPException(status_code=400, detail="Customer location is unknown")
+    if service_id is not None:
+        service = service_crud.get(db, id=service_id)
+        if not service:
+            raise HTTPException(status_code=404, detail="Service not found")
+        duration_minutes = service.duration_minutes
+    end = at + timedelta(minutes=duration_minutes)
+
+    index = staff_locator.get(
+        db.info.get("tenant_id"),
+        lambda: staff_crud.get_change_horizon(db),
+        lambda xid: staff_crud.changed_since(db, xid=xid),
+        lambda: staff_crud.get_active_locations(db),
+    )
+    candidates = index.nearest(customer.latitude, customer.longitude)
+    nearest = []
+    while len(nearest) < k:
+        batch = list(islice(candidates, k * 4))
+        if not batch:
+            break
+        busy = appointment_crud.get_busy_staff_ids(
+            db, staff_ids=[staff_id for staff_id, _ in batch], start=at, end=end
+        )
+        nearest.extend(candidate for candidate in batch if candidate[0] not in busy)
+    nearest = nearest[:k]
+
+    staff_by_id = {
+        staff_member.id: staff_member
+        for staff_member in staff_crud.get_by_ids(db, ids=[staff_id for staff_id, _ in nearest])
+    }
+    return [
+        {"staff": staff_by_id[staff_id], "distance_km": round(distance, 2)}
+        for staff_id, distance in nearest
+        if staff_id in staff_by_id
+    ]
 
 
 @router.post("/", response_model=Staff)
@@ -52,25 +163,30 @@ def create_staff(
 @router.get("/{staff_id}", response_model=Staff)
 def read_staff_member(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     staff_id: int,
+    fields: Optional[List[str]] = Depends(staff_fields),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
     Get staff member by ID
     """
-    staff_member = staff_crud.get(db, id=staff_id)
+    staff_member = staff_crud.get(db, id=staff_id, fields=fields)
     if not staff_member:
         raise HTTPException(status_code=404, detail="Staff member not found")
-    return staff_member
+    set_etag(response, staff_member)
+    return sparse_response(response, staff_member, fields)
 
 
 @router.put("/{staff_id}", response_model=Staff)
 def update_staff(
     *,
+    response: Response,
     db: Session = Depends(get_db),
     staff_id: int,
     staff_in: StaffUpdate,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -79,7 +195,8 @@ def update_staff(
     staff_member = staff_crud.get(db, id=staff_id)
     if not staff_member:
         raise HTTPException(status_code=404, detail="Staff member not found")
-    staff_member = staff_crud.update(db, db_obj=staff_member, obj_in=staff_in)
+    staff_member = staff_crud.update(db, db_obj=staff_member, obj_in=staff_in, version=version)
+    set_etag(response, staff_member)
     return staff_member
 
 
@@ -88,6 +205,7 @@ def delete_staff(
     *,
     db: Session = Depends(get_db),
     staff_id: int,
+    version: Optional[int] = Depends(get_if_match),
     current_user: User = Depends(get_current_active_user),
 ) -> Any:
     """
@@ -96,5 +214,98 @@ def delete_staff(
     staff_member = staff_crud.get(db, id=staff_id)
     if not staff_member:
         raise HTTPException(status_code=404, detail="Staff member not found")
-    staff_member = staff_crud.delete(db, id=staff_id)
+    staff_member = staff_crud.delete(db, id=staff_id, version=version)
     return {"message": "Staff member deleted successfully"}
+
+
+@router.get("/{staff_id}/calendar-token")
+def read_calendar_token(
+    *,
+    db: Session = Depends(get_db),
+    staff_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Token for subscribing to a staff member's calendar feed
+    """
+    staff_member = staff_crud.get(db, id=staff_id)
+    if not staff_member:
+        raise HTTPException(status_code=404, detail="Staff member not found")
+    token = create_calendar_token(staff_id, db.info.get("tenant_id"))
+    return {
+        "token": token,
+        "url": f"{settings.API_V1_STR}/staff/{staff_id}/calendar.ics?token={token}",
+    }
+
+
+@router.get("/{staff_id}/calendar.ics")
+def read_calendar(
+    *,
+    request: Request,
+    db: Session = Depends(get_db),
+    staff_id: int,
+    token: str,
+) -> Any:
+    """
+    iCalendar feed of a staff member's appointments over a rolling window.
+
+    Authenticated by the feed token rather than a bearer header, since
+    calendar apps cannot send one. Unchanged feeds answer 304.
+    """
+    payload = decode_calendar_token(token, staff_id)
+    if payload is None:
+        raise HTTPException(status_code=401, detail="Invalid calendar token")
+    if payload.get("tenant_id") is not None:
+        db.info["tenant_id"] = payload["tenant_id"]
+
+    today = datetime.now(timezone.utc).date()
+    feed_version, last_modified = appointment_crud.get_staff_version(db, staff_id=staff_id)
+    # The window start is part of the version so the feed rolls forward daily
+    version = f"{payload.get('tenant_id')}:{staff_id}:{feed_version}:{today.isoformat()}"
+    etag = feed_etag(version)
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=300"}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if etag in [value.strip() for value in if_none_match.split(",")]:
+            return Response(status_code=304, headers=headers)
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            since = None
+        if since is not None and last_modified.replace(microsecond=0) <= since:
+            return Response(status_code=304, headers=headers)
+
+    cache_key = (payload.get("tenant_id"), staff_id)
+    feed = calendar_cache.get(cache_key, version)
+    if feed is None:
+        staff_member = staff_crud.get(db, id=staff_id)
+        if not staff_member:
+            raise HTTPException(status_code=404, detail="Staff member not found")
+        window_start = datetime.combine(today, datetime.min.time(), timezone.utc)
+        appointments = appointment_crud.get_by_staff(
+            db,
+            staff_id=staff_id,
+            start_date=window_start - timedelta(days=settings.CALENDAR_PAST_DAYS),
+            end_date=window_start + timedelta(days=settings.CALENDAR_FUTURE_DAYS),
+            limit=10000,
+        )
+        services = service_crud.get_by_ids(
+            db, ids=list({appointment.service_id for appointment in appointments})
+        )
+        customers = customer_crud.get_by_ids(
+            db, ids=list({appointment.customer_id for appointment in appointments})
+        )
+        body = render_calendar(
+            f"{staff_member.first_name} {staff_member.last_name}",
+            appointments,
+            {service.id: service for service in services},
+            {customer.id: customer for customer in customers},
+        )
+        feed = RenderedFeed(body, etag, last_modified)
+        calendar_cache.put(cache_key, version, feed)
+
+    return Response(content=feed.body, media_type="text/calendar; charset=utf-8", headers=headers)
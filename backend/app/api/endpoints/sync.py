@@ -0,0 +1,70 @@
+from typing import Any
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_db
+from app.crud.crud_appointment import appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
+from app.crud.crud_staff import staff as staff_crud
+from app.models.user import User
+from app.schemas.sync import SyncResponse
+
+router = APIRouter()
+
+SYNCED_ENTITIES = {
+    "customers": customer_crud,
+    "staff": staff_crud,
+    "services": service_crud,
+    "appointments": appointment_crud,
+}
+
+
+@router.get("/", response_model=SyncResponse)
+def read_changes(
+    db: Session = Depends(get_db),
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=5000),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Changes across customers, staff, services and appointments since a cursor.
+
+    Pass the returned cursor as ``since`` on the next call, and keep calling
+    while ``has_more`` is true. A cursor of 0 performs a full initial sync.
+    """
+    # Cursors are transaction ids, not change sequences: a transaction can
+    # take a sequence value and commit after a client has read past it.
+    # Only transactions older than every one still running are sent, and
+    # never part of one, so nothing can later commit behind the cursor.
+    horizon = appointment_crud.get_change_horizon(db)
+    cursor = horizon
+    rows = []
+    for entity, crud in SYNCED_ENTITIES.items():
+        changes = crud.get_changes(db, since=since, before=cursor, limit=limit + 1)
+        if len(changes) > limit:
+            # The table has more: only transactions before this row's are whole
+            cursor = changes[limit].change_xid
+        rows.extend((obj.change_xid, obj.change_seq, entity, obj) for obj in changes)
+    rows.sort(key=lambda row: row[:2])
+    rows = [row for row in rows if row[0] < cursor]
+    if len(rows) > limit:
+        cursor = rows[limit][0]
+        rows = [row for row in rows if row[0] < cursor]
+    if not rows and cursor < horizon:
+        # A single transaction larger than a page goes out whole
+        for entity, crud in SYNCED_ENTITIES.items():
+            changes = crud.get_changes(db, since=cursor, before=cursor + 1, limit=None)
+            rows.extend((obj.change_xid, obj.change_seq, entity, obj) for obj in changes)
+        rows.sort(key=lambda row: row[:2])
+        cursor += 1
+
+    response = {entity: {"upserted": [], "deleted": []} for entity in SYNCED_ENTITIES}
+    for _, _, entity, obj in rows:
+        if obj.deleted_at is not None:
+            response[entity]["deleted"].append(obj.id)
+        else:
+            response[entity]["upserted"].append(obj)
+    response["cursor"] = cursor
+    response["has_more"] = cursor < horizon
+    return response
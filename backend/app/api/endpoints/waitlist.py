@@ -0,0 +1,192 @@
+from typing import Any, List, Optional, Union
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_current_active_user, get_db, get_if_match, set_etag
+from app.crud.crud_appointment import SlotUnavailable, appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
+from app.crud.crud_staff import staff as staff_crud
+from app.crud.crud_waitlist import waitlist_entry as waitlist_crud
+from app.models.appointment import AppointmentStatus
+from app.models.user import User
+from app.models.waitlist import WaitlistStatus
+from app.schemas.appointment import Appointment
+from app.schemas.waitlist import (
+    WaitlistBooking,
+    WaitlistEntry,
+    WaitlistEntryCreate,
+    WaitlistEntryUpdate,
+    WaitlistMatch,
+)
+from app.waitlist.matching import book, find_matches, freed_slot
+
+router = APIRouter()
+
+FREED_STATUSES = (AppointmentStatus.CANCELLED, AppointmentStatus.NO_SHOW)
+
+
+def check_references(
+    db: Session, entry_in: Union[WaitlistEntryCreate, WaitlistEntryUpdate]
+) -> None:
+    """
+    Reject customer, service or staff ids outside the current tenant
+    """
+    customer_id = getattr(entry_in, "customer_id", None)
+    if customer_id is not None and not customer_crud.get(db, id=customer_id):
+        raise HTTPException(status_code=400, detail="Customer not found")
+    if entry_in.service_ids is not None:
+        _, missing = service_crud.lookup(db, ids=entry_in.service_ids)
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Services not found: {missing}")
+    if entry_in.preferred_staff_id is not None and not staff_crud.get(db, id=entry_in.preferred_staff_id):
+        raise HTTPException(status_code=400, detail="Staff member not found")
+
+
+def get_freed_slot(db: Session, appointment_id: int):
+    # Waitlists are per tenant: a slot is only offered within its own
+    if db.info.get("tenant_id") is None:
+        raise HTTPException(status_code=400, detail="A tenant is required")
+    appointment = appointment_crud.get(db, id=appointment_id)
+    if not appointment:
+        raise HTTPException(status_code=404, detail="Appointment not found")
+    if appointment.status not in FREED_STATUSES:
+        raise HTTPException(status_code=400, detail="Appointment is not cancelled")
+    return freed_slot(db, appointment)
+
+
+@router.get("/", response_model=List[WaitlistEntry])
+def read_waitlist(
+    db: Session = Depends(get_db),
+    skip: int = 0,
+    limit: int = 100,
+    customer_id: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Retrieve waiting entries, optionally for one customer
+    """
+    return waitlist_crud.get_waiting(db, customer_id=customer_id, skip=skip, limit=limit)
+
+
+@router.post("/", response_model=WaitlistEntry)
+def create_waitlist_entry(
+    *,
+    db: Session = Depends(get_db),
+    entry_in: WaitlistEntryCreate,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Put a customer on the waitlist
+    """
+    check_references(db, entry_in)
+    return waitlist_crud.create(db, obj_in=entry_in)
+
+
+@router.get("/matches/{appointment_id}", response_model=List[WaitlistMatch])
+def read_waitlist_matches(
+    *,
+    db: Session = Depends(get_db),
+    appointment_id: int,
+    limit: Optional[int] = None,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Waiting customers who could take a cancelled appointment's slot, best first
+    """
+    matches = find_matches(db, get_freed_slot(db, appointment_id), limit=limit)
+    customers = {
+        customer.id: customer
+        for customer in customer_crud.get_by_ids(db, ids=[match.customer_id for match in matches])
+    }
+    return [
+        {**match._asdict(), "customer": customers[match.customer_id]}
+        for match in matches
+        if match.customer_id in customers
+    ]
+
+
+@router.get("/{entry_id}", response_model=WaitlistEntry)
+def read_waitlist_entry(
+    *,
+    response: Response,
+    db: Session = Depends(get_db),
+    entry_id: int,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Get waitlist entry by ID
+    """
+    entry = waitlist_crud.get(db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    set_etag(response, entry)
+    return entry
+
+
+@router.put("/{entry_id}", response_model=WaitlistEntry)
+def update_waitlist_entry(
+    *,
+    response: Response,
+    db: Session = Depends(get_db),
+    entry_id: int,
+    entry_in: WaitlistEntryUpdate,
+    version: Optional[int] = Depends(get_if_match),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Update waitlist entry
+    """
+    entry = waitlist_crud.get(db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    check_references(db, entry_in)
+    entry = waitlist_crud.update(
+        db, db_obj=entry, obj_in=entry_in.model_dump(mode="json", exclude_unset=True), version=version
+    )
+    set_etag(response, entry)
+    return entry
+
+
+@router.post("/{entry_id}/book", response_model=Appointment)
+def book_waitlist_entry(
+    *,
+    db: Session = Depends(get_db),
+    entry_id: int,
+    booking_in: WaitlistBooking,
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Book a waiting customer into a cancelled appointment's slot
+    """
+    entry = waitlist_crud.get(db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    if entry.status != WaitlistStatus.WAITING:
+        raise HTTPException(status_code=400, detail="Waitlist entry is already booked")
+    slot = get_freed_slot(db, booking_in.appointment_id)
+    matches = find_matches(db, slot, entry_id=entry_id)
+    if not matches:
+        raise HTTPException(status_code=400, detail="The slot does not suit this waitlist entry")
+    try:
+        return book(db, entry=entry, match=matches[0])
+    except SlotUnavailable:
+        raise HTTPException(status_code=409, detail="The slot has been taken")
+
+
+@router.delete("/{entry_id}")
+def delete_waitlist_entry(
+    *,
+    db: Session = Depends(get_db),
+    entry_id: int,
+    version: Optional[int] = Depends(get_if_match),
+    current_user: User = Depends(get_current_active_user),
+) -> Any:
+    """
+    Take a customer off the waitlist
+    """
+    entry = waitlist_crud.get(db, id=entry_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Waitlist entry not found")
+    waitlist_crud.delete(db, id=entry_id, version=version)
+    return {"message": "Waitlist entry deleted successfully"}
@@ -0,0 +1,136 @@
+import asyncio
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timezone
+from itertools import groupby
+from typing import Any, Deque, Dict, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.audit import AuditLog
+
+logger = logging.getLogger(__name__)
+
+
+class AuditBuffer:
+    """
+    In-process write-behind buffer for audit records.
+
+    Mutations only append here; rows reach the database in batches from the
+    background flusher. When the buffer is full the appending thread flushes
+    it itself, so memory stays bounded without dropping records.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._records: Deque[Dict[str, Any]] = deque()
+        self._lock = threading.Lock()
+        # Serialises flushes so batches are written in mutation order
+        self._flush_lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def record(
+        self,
+        *,
+        tenant_id: Optional[int],
+        entity_type: str,
+        entity_id: int,
+        action: str,
+        user_id: Optional[int],
+        changes: Dict[str, List[Any]],
+    ) -> None:
+        with self._lock:
+            self._records.append(
+                {
+                    "tenant_id": tenant_id,
+                    "entity_type": entity_type,
+                    "entity_id": entity_id,
+                    "action": action,
+                    "user_id": user_id,
+                    "changes": changes,
+                    "changed_at": datetime.now(timezone.utc),
+                }
+            )
+            full = len(self._records) >= self.maxsize
+        if full:
+            # The mutation is already committed; never fail it over its audit
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Audit log flush failed")
+
+    def _take(self, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [self._records.popleft() for _ in range(min(limit, len(self._records)))]
+
+    def _requeue(self, batch: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            room = self.maxsize - len(self._records)
+            if room < len(batch):
+                logger.error("Audit buffer full; dropping %s records", len(batch) - room)
+                batch = batch[len(batch) - room:] if room > 0 else []
+            self._records.extendleft(reversed(batch))
+
+    def flush(self) -> int:
+        """
+        Write every buffered record; returns the number written
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                batch = self._take(settings.AUDIT_BATCH_SIZE)
+                if not batch:
+                    return written
+                try:
+                    self._write(batch)
+                except Exception:
+                    self._requeue(batch)
+                    raise
+                written += len(batch)
+
+    def _write(self, batch: List[Dict[str, Any]]) -> None:
+        # Each tenant's records go to the database holding its data
+        batch = sorted(batch, key=lambda row: row["tenant_id"] or 0)
+        for tenant_id, rows in groupby(batch, key=lambda row: row["tenant_id"]):
+            db = SessionLocal()
+            try:
+                db.info["tenant_id"] = tenant_id
+                db.execute(insert(AuditLog), list(rows))
+                db.commit()
+            finally:
+                db.close()
+
+
+audit_log = AuditBuffer(settings.AUDIT_BUFFER_SIZE)
+
+
+def _flush_at_exit() -> None:
+    try:
+        audit_log.flush()
+    except Exception:
+        logger.exception("Audit log flush at exit failed; %s records lost", len(audit_log))
+
+
+# Covers CLI jobs; the API also flushes from its lifespan on shutdown
+atexit.register(_flush_at_exit)
+
+
+async def flush_audit_log() -> None:
+    """
+    Background loop writing buffered audit records
+    """
+    while True:
+        await asyncio.sleep(settings.AUDIT_FLUSH_SECONDS)
+        if not len(audit_log):
+            continue
+        try:
+            await run_in_threadpool(audit_log.flush)
+        except Exception:
+            logger.exception("Audit log flush failed")
@@ -0,0 +1,305 @@
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Generic, Hashable, Iterable, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+SchemaType = TypeVar("SchemaType", bound=BaseModel)
+
+
+class MemoryCacheBackend:
+    """
+    In-process stand-in for the shared tier; pub/sub reaches only this
+    process's subscribers
+    """
+
+    def __init__(self):
+        self._values: Dict[str, Tuple[bytes, float]] = {}
+        self._subscribers: List[Callable[[bytes], None]] = []
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._values[key]
+                return None
+            return entry[0]
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._values[key] = (value, time.monotonic() + ttl)
+
+    def delete(self, keys: List[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def publish(self, message: bytes) -> None:
+        for callback in list(self._subscribers):
+            callback(message)
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> None:
+        self._subscribers.append(callback)
+
+
+class RedisCacheBackend:
+    """
+    Shared tier in Redis (or anything speaking its protocol); pass a
+    ``fakeredis.FakeRedis`` as ``client`` to run without a server
+    """
+
+    def __init__(self, url: Optional[str] = None, *, client: Any = None):
+        if client is None:
+            import redis
+
+            client = redis.Redis.from_url(url or settings.CACHE_REDIS_URL)
+        self.client = client
+        self.channel = settings.CACHE_CHANNEL
+        self._listener = None
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.client.set(key, value, px=max(int(ttl * 1000), 1))
+
+    def delete(self, keys: List[str]) -> None:
+        if keys:
+            self.client.delete(*keys)
+
+    def publish(self, message: bytes) -> None:
+        self.client.publish(self.channel, message)
+
+    def subscribe(self, callback: Callable[[bytes], None]) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(**{self.channel: lambda message: callback(message["data"])})
+        self._listener = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+
+class TwoTierCache:
+    """
+    Local LRU in front of a shared backend.
+
+    Values are JSON envelopes carrying their expiry and how long they took
+    to compute, so readers can refresh early (probabilistic early
+    expiration): the closer an entry is to expiring and the costlier it is,
+    the likelier one reader recomputes it before it lapses, instead of every
+    worker missing at once. Within a process, concurrent misses for a key
+    share one load, and a load overtaken by an invalidation of its key is
+    returned but not stored, as it may predate the write.
+
+    Writes call ``invalidate``, which deletes the shared keys and publishes
+    them so every worker drops its local copies. Local entries live at most
+    CACHE_LOCAL_TTL_SECONDS in case a message is lost.
+    """
+
+    def __init__(self, backend: Any, *, local_size: int, local_ttl: float, beta: float):
+        self.backend = backend
+        self.local_size = local_size
+        self.local_ttl = local_ttl
+        self.beta = beta
+        self.origin = uuid.uuid4().hex
+        self._local: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Invalidations seen per key while a load for it runs
+        self._loading: Dict[str, int] = {}
+        # No result window: a load must not outlive an invalidation
+        self._loads = SingleFlight(0, local_size)
+        backend.subscribe(self._on_message)
+
+    def _local_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._local[key]
+                return None
+            self._local.move_to_end(key)
+            return entry[0]
+
+    def _local_set(self, key: str, envelope: Dict[str, Any]) -> None:
+        ttl = min(self.local_ttl, envelope["e"] - time.time())
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._local[key] = (envelope, time.monotonic() + ttl)
+            self._local.move_to_end(key)
+            while len(self._local) > self.local_size:
+                self._local.popitem(last=False)
+
+    def _drop_local(self, keys: Iterable[str]) -> None:
+        with self._lock:
+            for key in keys:
+                self._local.pop(key, None)
+                if key in self._loading:
+                    self._loading[key] += 1
+
+    def _on_message(self, message: bytes) -> None:
+        try:
+            self._drop_local(json.loads(message)["keys"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Ignoring malformed cache invalidation message")
+
+    def _envelope(self, key: str) -> Optional[Dict[str, Any]]:
+        envelope = self._local_get(key)
+        if envelope is not None:
+            return envelope
+        raw = self.backend.get(key)
+        if raw is None:
+            return None
+        envelope = json.loads(raw)
+        self._local_set(key, envelope)
+        return envelope
+
+    def get(self, key: str) -> Optional[Any]:
+        envelope = self._envelope(key)
+        if envelope is None or envelope["e"] <= time.time():
+            return None
+        return envelope["v"]
+
+    def set(self, key: str, value: Any, ttl: float, *, delta: float = 0.0) -> None:
+        envelope = {"v": value, "d": delta, "e": time.time() + ttl}
+        self.backend.set(key, json.dumps(envelope, separators=(",", ":")).encode(), ttl)
+        self._local_set(key, envelope)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any], ttl: float) -> Any:
+        """
+        Cached value for ``key``, computing it with ``loader`` (which must
+        return JSON-serialisable data) on a miss or an early refresh
+        """
+        envelope = self._envelope(key)
+        if envelope is not None:
+            # -log(U) is exponential; beta > 1 favours earlier refreshes
+            early = envelope["d"] * self.beta * -math.log(1.0 - random.random())
+            if time.time() + early < envelope["e"]:
+                return envelope["v"]
+
+        def load() -> Any:
+            # Loads of a key never overlap within a process (single flight)
+            with self._lock:
+                self._loading[key] = 0
+            try:
+                started = time.perf_counter()
+                value = loader()
+            finally:
+                with self._lock:
+                    invalidated = self._loading.pop(key)
+            if not invalidated:
+                self.set(key, value, ttl, delta=time.perf_counter() - started)
+            return value
+
+        return self._loads.do(key, load)
+
+    def invalidate(self, keys: List[str]) -> None:
+        self.backend.delete(keys)
+        self._drop_local(keys)
+        self.backend.publish(json.dumps({"keys": keys, "origin": self.origin}).encode())
+
+
+def get_cache_backend():
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend()
+    return MemoryCacheBackend()
+
+
+cache = TwoTierCache(
+    get_cache_backend(),
+    local_size=settings.CACHE_LOCAL_SIZE,
+    local_ttl=settings.CACHE_LOCAL_TTL_SECONDS,
+    beta=settings.CACHE_EARLY_REFRESH_BETA,
+)
+
+
+def generation_key(table: str, tenant_id: Optional[int]) -> str:
+    return f"gen:{table}:{tenant_id}"
+
+
+def entity_key(table: str, tenant_id: Optional[int], id: int) -> str:
+    return f"row:{table}:{tenant_id}:{id}"
+
+
+def stale_keys(table: str, tenant_id: Optional[int], ids: Iterable[int]) -> List[str]:
+    """
+    Keys a write to rows ``ids`` of ``tenant_id`` makes stale: the rows and
+    the table's query generation, as cached for the tenant and for
+    tenant-less admins, who read every tenant's rows
+    """
+    keys = []
+    for scope in dict.fromkeys([tenant_id, None]):
+        keys += [entity_key(table, scope, id) for id in ids]
+        keys.append(generation_key(table, scope))
+    return keys
+
+
+def invalidate_entity(table: str, tenant_id: Optional[int], id: int) -> None:
+    """
+    Called by CRUDBase after every committed mutation: drops the row and
+    moves the table's query generation on, so cached lists miss
+    """
+    cache.invalidate(stale_keys(table, tenant_id, [id]))
+
+
+class EntityCache(Generic[SchemaType]):
+    """
+    Typed caching of one model's rows and query results, as ``schema``
+    instances, scoped to the session's tenant.
+
+        service_cache = EntityCache(service_crud, Service)
+        service = service_cache.get(db, service_id)
+        active = service_cache.query(db, "active", (skip, limit), lambda: ...)
+    """
+
+    def __init__(self, crud: Any, schema: Type[SchemaType], *, ttl: Optional[float] = None):
+        self.crud = crud
+        self.table = crud.model.__tablename__
+        self.schema = schema
+        self.many = TypeAdapter(List[schema])
+        self.ttl = ttl or settings.CACHE_TTL_SECONDS
+
+    def get(self, db: Session, id: int) -> Optional[SchemaType]:
+        def load() -> Optional[Dict[str, Any]]:
+            row = self.crud.get(db, id=id)
+            return None if row is None else self.schema.model_validate(row).model_dump(mode="json")
+
+        data = cache.get_or_load(entity_key(self.table, db.info.get("tenant_id"), id), load, self.ttl)
+        return None if data is None else self.schema.model_validate(data)
+
+    def _generation(self, tenant_id: Optional[int]) -> str:
+        key = generation_key(self.table, tenant_id)
+        generation = cache.get(key)
+        if generation is None:
+            generation = uuid.uuid4().hex
+            cache.set(key, generation, self.ttl)
+        return generation
+
+    def query(
+        self, db: Session, name: str, params: Hashable, loader: Callable[[], List[Any]]
+    ) -> List[SchemaType]:
+        """
+        Cached result of ``loader`` (rows of this model) for ``name`` and
+        ``params``; any write to the table invalidates it
+        """
+        tenant_id = db.info.get("tenant_id")
+        key = f"query:{self.table}:{tenant_id}:{self._generation(tenant_id)}:{name}:{params!r}"
+
+        def load() -> List[Dict[str, Any]]:
+            rows = self.many.validate_python(loader(), from_attributes=True)
+            return self.many.dump_python(rows, mode="json")
+
+        return self.many.validate_python(cache.get_or_load(key, load, self.ttl))
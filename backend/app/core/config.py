@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Dict, Optional
 
 
 class Settings(BaseSettings):
@@ -11,6 +11,148 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30  # Rotated on every use
+
+    # Connections each worker keeps per database, opened at startup
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+
+    # Statement caching: SQLAlchemy's compiled-statement cache per engine
+    # and, with the psycopg (3) driver, server-side prepared statements per
+    # connection. DB_DRIVER="psycopg" switches plain postgresql:// URLs to it;
+    # set DB_PGBOUNCER behind a transaction-pooling PgBouncer to never prepare
+    DB_DRIVER: Optional[str] = None
+    DB_STATEMENT_CACHE_SIZE: int = 1000
+    DB_PREPARE_THRESHOLD: int = 5  # Executions before other statements are prepared
+    DB_PREPARED_MAX: int = 200
+    DB_PGBOUNCER: bool = False
+
+    # Tenants that get a dedicated database, as JSON: {"42": "postgresql://..."}
+    TENANT_DATABASE_URLS: Dict[int, str] = {}
+
+    # List totals: counts above this are estimated rather than exact
+    EXACT_COUNT_LIMIT: int = 10000
+    COUNT_CACHE_TTL_SECONDS: int = 300
+
+    PAYROLL_OVERTIME_WEEKLY_HOURS: float = 40.0
+    PAYROLL_OVERTIME_MULTIPLIER: float = 1.5
+
+    # Billing runs: customers per checkpointed batch, where rendered
+    # invoices are written and how many processes render them. A run that
+    # has not checkpointed for BILLING_STALLED_SECONDS may be resumed
+    BILLING_BATCH_SIZE: int = 2000
+    BILLING_STALLED_SECONDS: int = 900
+    INVOICE_OUTPUT_DIR: str = "invoices"
+    INVOICE_RENDER_WORKERS: Optional[int] = None
+
+    FORECAST_HISTORY_WEEKS: int = 52
+    FORECAST_HORIZON_DAYS: int = 28
+    FORECAST_WEEKLY_DECAY: float = 0.9
+    STAFF_HOURS_PER_DAY: float = 8.0
+
+    # "memory" (per worker) or "database" (shared across workers)
+    IDEMPOTENCY_BACKEND: str = "memory"
+    IDEMPOTENCY_TTL_SECONDS: int = 24 * 3600
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    # How long an in-flight claim holds its key; past it a retry takes the
+    # key over, so it must exceed the slowest mutating request
+    IDEMPOTENCY_LEASE_SECONDS: int = 120
+    IDEMPOTENCY_SWEEP_SECONDS: int = 300
+
+    # Staff calendar feeds: rolling window and cached feeds per worker
+    CALENDAR_PAST_DAYS: int = 30
+    CALENDAR_FUTURE_DAYS: int = 90
+    CALENDAR_CACHE_SIZE: int = 2000
+    CALENDAR_TOKEN_EXPIRE_DAYS: int = 365
+
+    # Batch lookups (?ids= and POST /lookup)
+    BATCH_LOOKUP_MAX_IDS: int = 5000
+
+    # Coalescing of identical concurrent reads
+    SINGLE_FLIGHT_WINDOW_SECONDS: float = 1.0
+    SINGLE_FLIGHT_MAX_KEYS: int = 10000
+
+    # Two-tier cache: local LRU over a shared backend ("memory" or "redis")
+    CACHE_BACKEND: str = "memory"
+    CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    CACHE_CHANNEL: str = "cache-invalidation"
+    CACHE_TTL_SECONDS: float = 300.0
+    CACHE_LOCAL_SIZE: int = 10000
+    CACHE_LOCAL_TTL_SECONDS: float = 30.0
+    CACHE_EARLY_REFRESH_BETA: float = 1.0
+
+    # Materialised /schedule/{date} boards
+    SCHEDULE_TIMEZONE: str = "UTC"
+    SCHEDULE_MAX_AGE_SECONDS: int = 900
+
+    # Customer de-duplication
+    DEDUP_MATCH_THRESHOLD: float = 0.85
+    DEDUP_MAX_BLOCK_SIZE: int = 200  # Larger blocks are only windowed
+    DEDUP_WINDOW: int = 20
+    DEDUP_TASK_COMPARISONS: int = 200_000
+    DEDUP_WORKERS: Optional[int] = None
+    DEDUP_MERGE_BATCH_SIZE: int = 1000
+
+    # Waitlist backfill
+    WAITLIST_AUTO_BOOK: bool = False
+    WAITLIST_MAX_CANDIDATES: int = 20
+    WAITLIST_MAX_WINDOW_DAYS: int = 14
+    WAITLIST_MIN_NOTICE_MINUTES: int = 60  # Slots starting sooner are not offered
+
+    # Production serving (gunicorn_conf.py): one worker per CPU unless set,
+    # recycled after about WEB_MAX_REQUESTS requests
+    WEB_WORKERS: Optional[int] = None
+    WEB_BIND: str = "0.0.0.0:8000"
+    WEB_MAX_REQUESTS: int = 10000
+    WEB_MAX_REQUESTS_JITTER: int = 1000
+    WEB_GRACEFUL_TIMEOUT: int = 30  # Seconds in-flight requests get to drain
+    WEB_KEEPALIVE: int = 5
+
+    # Tracing: when enabled, every request is recorded and kept if slow,
+    # failed or sampled; exported as OTLP/JSON to files ("file") or a
+    # collector ("otlp")
+    TRACING_ENABLED: bool = False
+    TRACING_SERVICE_NAME: str = "cleansweeppro-api"
+    TRACING_SLOW_MS: float = 500.0
+    TRACING_SAMPLE_RATE: float = 0.01
+    TRACING_EXPORTER: str = "file"
+    TRACING_OUTPUT_DIR: str = "traces"
+    TRACING_OTLP_ENDPOINT: str = "http://localhost:4318/v1/traces"
+    TRACING_EXPORT_SECONDS: float = 5.0
+    TRACING_MAX_QUEUED: int = 10000  # Kept traces awaiting export; the oldest are dropped
+    TRACING_MAX_SPANS: int = 1000  # Per trace
+    TRACING_MAX_STATEMENT_LENGTH: int = 2000
+
+    # Purge jobs: batches sized toward PURGE_TARGET_BATCH_MS, each waiting
+    # at most PURGE_LOCK_TIMEOUT_MS for a row lock; paused while replicas
+    # lag or the primary runs more than PURGE_MAX_ACTIVE_QUERIES queries
+    PURGE_BATCH_SIZE: int = 500
+    PURGE_MIN_BATCH_SIZE: int = 50
+    PURGE_MAX_BATCH_SIZE: int = 5000
+    PURGE_TARGET_BATCH_MS: float = 200.0
+    PURGE_PAUSE_MS: float = 50.0
+    PURGE_LOCK_TIMEOUT_MS: int = 200
+    PURGE_MAX_REPLICATION_LAG_SECONDS: float = 5.0
+    PURGE_MAX_ACTIVE_QUERIES: int = 20
+    PURGE_BACKOFF_SECONDS: float = 1.0
+
+    # Token revocation: each worker checks tokens against a Bloom filter of
+    # revoked ids, synced from the database every REVOCATION_SYNC_SECONDS
+    REVOCATION_CAPACITY: int = 100000  # Grown on rebuild if exceeded
+    REVOCATION_ERROR_RATE: float = 0.001  # Share of live tokens looked up in the database
+    REVOCATION_SYNC_SECONDS: float = 5.0
+    REVOCATION_SYNC_OVERLAP_SECONDS: float = 60.0
+    REVOCATION_REBUILD_SECONDS: float = 3600.0
+
+    # On-demand request profiling
+    PROFILING_MAX_PROFILES: int = 50
+    PROFILING_MAX_WINDOW_SECONDS: int = 900
+    PROFILING_SAMPLE_INTERVAL_MS: float = 5.0
+
+    # Audit log
+    AUDIT_BUFFER_SIZE: int = 10000
+    AUDIT_BATCH_SIZE: int = 500
+    AUDIT_FLUSH_SECONDS: float = 1.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,309 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, NamedTuple, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, delete, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+from app.core.config import settings
+from app.core.security import decode_access_token
+from app.db.base import SessionLocal
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+MUTATING_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+# Not replayed: recomputed by the server for the new response
+SKIPPED_HEADERS = {"content-length", "date", "server"}
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: Optional[int]  # None while in flight
+    headers: Dict[str, str]
+    body: bytes
+
+
+class MemoryIdempotencyStore:
+    """
+    Per-process store; duplicates are only absorbed within one worker
+    """
+
+    def __init__(self):
+        self._records: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        """
+        Reserve ``key`` for this request, or return the existing record
+        """
+        now = time.monotonic()
+        with self._lock:
+            record = self._records.get(key)
+            if record is not None and record[1] > now:
+                return record[0]
+            # In flight, the record only lives as long as the lease
+            self._records[key] = (
+                StoredResponse(fingerprint, None, {}, b""),
+                now + settings.IDEMPOTENCY_LEASE_SECONDS,
+            )
+            return None
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        with self._lock:
+            record = self._records.get(key)
+        return record[0] if record is not None and record[1] > time.monotonic() else None
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        with self._lock:
+            self._records[key] = (response, time.monotonic() + settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def release(self, key: str) -> None:
+        with self._lock:
+            self._records.pop(key, None)
+
+    def sweep(self) -> int:
+        now = time.monotonic()
+        with self._lock:
+            expired = [key for key, (_, expires) in self._records.items() if expires <= now]
+            for key in expired:
+                del self._records[key]
+        return len(expired)
+
+
+class DatabaseIdempotencyStore:
+    """
+    Store in the shared database, so duplicates are absorbed across workers
+    """
+
+    def _expires_at(self) -> datetime:
+        return datetime.now(timezone.utc) + timedelta(seconds=settings.IDEMPOTENCY_TTL_SECONDS)
+
+    def _expired(self, now: datetime):
+        # Stored responses expire with the TTL; claims still in flight when
+        # their lease ran out belong to a worker that died mid-request
+        return or_(
+            IdempotencyKey.expires_at <= now,
+            and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.locked_until <= now),
+        )
+
+    def claim(self, key: str, fingerprint: str) -> Optional[StoredResponse]:
+        now = datetime.now(timezone.utc)
+        db = SessionLocal()
+        try:
+            db.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.key == key, self._expired(now))
+            )
+            inserted = db.execute(
+                pg_insert(IdempotencyKey)
+                .values(
+                    key=key,
+                    fingerprint=fingerprint,
+                    expires_at=self._expires_at(),
+                    locked_until=now + timedelta(seconds=settings.IDEMPOTENCY_LEASE_SECONDS),
+                )
+                .on_conflict_do_nothing()
+            ).rowcount
+            db.commit()
+            if inserted:
+                return None
+        finally:
+            db.close()
+        return self.get(key)
+
+    def get(self, key: str) -> Optional[StoredResponse]:
+        db = SessionLocal()
+        try:
+            record = db.get(IdempotencyKey, key)
+            if record is None:
+                return None
+            return StoredResponse(
+                record.fingerprint,
+                record.status_code,
+                record.response_headers or {},
+                record.response_body or b"",
+            )
+        finally:
+            db.close()
+
+    def complete(self, key: str, response: StoredResponse) -> None:
+        db = SessionLocal()
+        try:
+            record = db.get(IdempotencyKey, key)
+            if record is not None:
+                record.status_code = response.status_code
+                record.response_headers = response.headers
+                record.response_body = response.body
+                record.expires_at = self._expires_at()
+                record.locked_until = None
+                db.commit()
+        finally:
+            db.close()
+
+    def release(self, key: str) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(delete(IdempotencyKey).where(IdempotencyKey.key == key))
+            db.commit()
+        finally:
+            db.close()
+
+    def sweep(self) -> int:
+        db = SessionLocal()
+        try:
+            deleted = db.execute(
+                delete(IdempotencyKey).where(self._expired(datetime.now(timezone.utc)))
+            ).rowcount
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+
+def get_idempotency_store():
+    if settings.IDEMPOTENCY_BACKEND == "database":
+        return DatabaseIdempotencyStore()
+    return MemoryIdempotencyStore()
+
+
+idempotency_store = get_idempotency_store()
+
+
+def _principal(request: Request) -> str:
+    authorization = request.headers.get("authorization", "")
+    payload = decode_access_token(authorization[7:]) if authorization.startswith("Bearer ") else None
+    if payload and payload.get("sub"):
+        return f"user:{payload['sub']}"
+    return "anon:" + hashlib.sha256(authorization.encode()).hexdigest()
+
+
+def _replay(stored: StoredResponse) -> Response:
+    return Response(
+        content=stored.body,
+        status_code=stored.status_code,
+        headers={**stored.headers, "Idempotency-Replayed": "true"},
+    )
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """
+    Replays the stored response for a repeated ``Idempotency-Key`` instead
+    of executing the request again. Concurrent duplicates wait for the first
+    request to finish. Server errors are not stored, so those may be retried.
+    """
+
+    def __init__(self, app, store=None):
+        super().__init__(app)
+        self.store = store or idempotency_store
+        self._in_flight: Dict[str, asyncio.Event] = {}
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        idempotency_key = request.headers.get("idempotency-key")
+        if idempotency_key is None or request.method not in MUTATING_METHODS:
+            return await call_next(request)
+        if not 0 < len(idempotency_key) <= 255:
+            return JSONResponse(
+                {"detail": "Idempotency-Key must be 1-255 characters"}, status_code=400
+            )
+
+        body = await request.body()
+        key = hashlib.sha256(
+            "\n".join(
+                [_principal(request), request.method, request.url.path, idempotency_key]
+            ).encode()
+        ).hexdigest()
+        fingerprint = hashlib.sha256(
+            request.url.query.encode() + b"\n" + body
+        ).hexdigest()
+
+        existing = await run_in_threadpool(self.store.claim, key, fingerprint)
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                return JSONResponse(
+                    {"detail": "Idempotency-Key was already used with a different request"},
+                    status_code=422,
+                )
+            if existing.status_code is None:
+                existing = await self._wait(key)
+                if existing is None:
+                    # The first request failed and released the key
+                    existing = await run_in_threadpool(self.store.claim, key, fingerprint)
+        if existing is not None:
+            if existing.status_code is None:
+                return JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                )
+            return _replay(existing)
+
+        event = self._in_flight[key] = asyncio.Event()
+        try:
+            response = await call_next(request)
+            content = b"".join([chunk async for chunk in response.body_iterator])
+            if response.status_code < 500:
+                headers = {
+                    name: value
+                    for name, value in response.headers.items()
+                    if name not in SKIPPED_HEADERS
+                }
+                await run_in_threadpool(
+                    self.store.complete,
+                    key,
+                    StoredResponse(fingerprint, response.status_code, headers, content),
+                )
+            else:
+                await run_in_threadpool(self.store.release, key)
+        except BaseException:
+            await run_in_threadpool(self.store.release, key)
+            raise
+        finally:
+            event.set()
+            self._in_flight.pop(key, None)
+        return Response(
+            content=content,
+            status_code=response.status_code,
+            headers={
+                name: value
+                for name, value in response.headers.items()
+                if name != "content-length"
+            },
+        )
+
+    async def _wait(self, key: str) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+        event = self._in_flight.get(key)
+        if event is not None:
+            # The first request is running in this worker
+            try:
+                await asyncio.wait_for(event.wait(), settings.IDEMPOTENCY_WAIT_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            return await run_in_threadpool(self.store.get, key)
+        while time.monotonic() < deadline:
+            stored = await run_in_threadpool(self.store.get, key)
+            if stored is None or stored.status_code is not None:
+                return stored
+            await asyncio.sleep(0.1)
+        return None
+
+
+async def sweep_expired_keys() -> None:
+    """
+    Background loop evicting expired idempotency records
+    """
+    while True:
+        await asyncio.sleep(settings.IDEMPOTENCY_SWEEP_SECONDS)
+        try:
+            evicted = await run_in_threadpool(idempotency_store.sweep)
+            if evicted:
+                logger.debug("Evicted %s expired idempotency keys", evicted)
+        except Exception:
+            logger.exception("Idempotency key sweep failed")
@@ -0,0 +1,395 @@
+import contextvars
+import itertools
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+import fastapi.concurrency
+import fastapi.dependencies.utils
+import fastapi.routing
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core import security
+from app.core.config import settings
+
+# Profile of the request being handled, copied into threadpool workers
+_current: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+class Profile:
+    """
+    Stack samples and per-phase timings of one request
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method: str, path: str):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.status_code: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.duration_ms = 0.0
+        self.phases: Dict[str, List[float]] = {}  # name -> [total ms, count]
+        self.samples: Counter = Counter()
+        self._threads: Counter = Counter()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def thread(self):
+        """
+        Mark the calling thread as working for this request while inside
+        """
+        ident = threading.get_ident()
+        with self._lock:
+            self._threads[ident] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[ident] -= 1
+                if not self._threads[ident]:
+                    del self._threads[ident]
+
+    def thread_idents(self) -> List[int]:
+        with self._lock:
+            return list(self._threads)
+
+    def add_phase(self, name: str, seconds: float) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(name, [0.0, 0])
+            phase[0] += seconds * 1000
+            phase[1] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status_code": self.status_code,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3),
+            "samples": sum(self.samples.values()),
+            "phases": {
+                name: {"ms": round(total, 3), "count": count}
+                for name, (total, count) in sorted(self.phases.items())
+            },
+        }
+
+    def collapsed(self) -> str:
+        """
+        Samples in the collapsed-stack format read by flamegraph.pl and
+        speedscope: ``frame;frame;frame count`` per line
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+
+def _collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _path_pattern(route: str) -> "re.Pattern":
+    # /api/v1/appointments/{appointment_id} -> ^/api/v1/appointments/[^/]+$
+    parts = re.split(r"(\{[^}]+\})", route)
+    return re.compile(
+        "^" + "".join("[^/]+" if part.startswith("{") else re.escape(part) for part in parts) + "$"
+    )
+
+
+class ProfilingSession:
+    def __init__(
+        self,
+        *,
+        route: Optional[str],
+        method: Optional[str],
+        sample_rate: float,
+        duration_seconds: float,
+        interval_ms: float,
+    ):
+        self.route = route
+        self.method = method.upper() if method else None
+        self.sample_rate = sample_rate
+        self.interval = interval_ms / 1000
+        self.started_at = datetime.now(timezone.utc)
+        self.expires = time.monotonic() + duration_seconds
+        self.profiled = 0
+        self._pattern = _path_pattern(route) if route else None
+
+    def selects(self, method: str, path: str) -> bool:
+        if self.method is not None and method != self.method:
+            return False
+        if self._pattern is not None and not self._pattern.match(path):
+            return False
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "route": self.route,
+            "method": self.method,
+            "sample_rate": self.sample_rate,
+            "interval_ms": self.interval * 1000,
+            "started_at": self.started_at,
+            "remaining_seconds": max(round(self.expires - time.monotonic(), 1), 0.0),
+            "profiled": self.profiled,
+        }
+
+
+def _timed(original: Callable, label: Callable[[Callable], Optional[str]]) -> Callable:
+    """
+    Wrap a ``run_in_threadpool`` so the function it runs is timed as a
+    phase and its worker thread sampled
+    """
+
+    @wraps(original)
+    async def run_in_threadpool(func, *args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return await original(func, *args, **kwargs)
+
+        def call(*call_args, **call_kwargs):
+            with profile.thread():
+                return func(*call_args, **call_kwargs)
+
+        name = label(func)
+        started = time.perf_counter()
+        try:
+            return await original(call, *args, **kwargs)
+        finally:
+            if name is not None:
+                profile.add_phase(name, time.perf_counter() - started)
+
+    return run_in_threadpool
+
+
+def _timed_async(original: Callable, name: str) -> Callable:
+    """
+    Wrap a coroutine function that runs on the event loop as a phase
+    """
+
+    @wraps(original)
+    async def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return await original(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            with profile.thread():
+                return await original(*args, **kwargs)
+        finally:
+            profile.add_phase(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+def _timed_sync(original: Callable, name: str) -> Callable:
+    @wraps(original)
+    def wrapper(*args, **kwargs):
+        profile = _current.get()
+        if profile is None:
+            return original(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            profile.add_phase(name, time.perf_counter() - started)
+
+    return wrapper
+
+
+def _endpoint_label(func: Callable) -> Optional[str]:
+    # serialize_response validates in the threadpool; it is timed as a whole
+    if getattr(func, "__name__", "") == "validate":
+        return None
+    return f"endpoint:{getattr(func, '__name__', 'call')}"
+
+
+def _dependency_label(func: Callable) -> str:
+    return f"dependency:{getattr(func, '__name__', 'call')}"
+
+
+def _generator_dependency_label(func: Callable) -> str:
+    # contextmanager_in_threadpool runs the generator's __enter__
+    generator = getattr(getattr(func, "__self__", None), "gen", None)
+    return f"dependency:{getattr(generator, '__name__', 'call')}"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.add_phase("sql", time.perf_counter() - started)
+
+
+class Profiler:
+    """
+    On-demand request profiler. While a session is active, selected
+    requests record per-phase timings (dependencies, each dependency run in
+    the threadpool, endpoint, serialisation, SQL, bcrypt) and stack samples
+    taken every ``interval_ms`` from the threads working for them; finished
+    profiles go to a ring buffer of the last PROFILING_MAX_PROFILES.
+
+    Instrumentation is patched in when a session starts and removed when it
+    ends, so with no session the only cost is one attribute check in the
+    middleware. Event-loop samples are taken only during async phases and
+    may include other requests interleaved on the loop. Sessions and
+    profiles are per worker process.
+    """
+
+    def __init__(self, max_profiles: int):
+        self.session: Optional[ProfilingSession] = None
+        self.profiles: Deque[Profile] = deque(maxlen=max_profiles)
+        self._in_flight: Dict[int, Profile] = {}
+        self._lock = threading.Lock()
+        self._patches: List[tuple] = []
+        self._stop: Optional[threading.Event] = None
+
+    def start(self, session: ProfilingSession) -> None:
+        with self._lock:
+            self.session = session
+            if not self._patches:
+                self._install()
+            if self._stop is not None:
+                self._stop.set()
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._sample, args=(session, self._stop), name="profiler", daemon=True
+            ).start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self.session = None
+            if self._stop is not None:
+                self._stop.set()
+                self._stop = None
+            self._uninstall()
+
+    def get(self, profile_id: int) -> Optional[Profile]:
+        for profile in list(self.profiles):
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def _patch(self, owner: Any, name: str, replacement: Callable) -> None:
+        had_attribute = name in vars(owner)
+        self._patches.append((owner, name, getattr(owner, name), had_attribute))
+        setattr(owner, name, replacement)
+
+    def _install(self) -> None:
+        self._patch(fastapi.routing, "run_in_threadpool", _timed(fastapi.routing.run_in_threadpool, _endpoint_label))
+        self._patch(
+            fastapi.dependencies.utils,
+            "run_in_threadpool",
+            _timed(fastapi.dependencies.utils.run_in_threadpool, _dependency_label),
+        )
+        self._patch(
+            fastapi.concurrency,
+            "run_in_threadpool",
+            _timed(fastapi.concurrency.run_in_threadpool, _generator_dependency_label),
+        )
+        self._patch(fastapi.routing, "solve_dependencies", _timed_async(fastapi.routing.solve_dependencies, "dependencies"))
+        self._patch(fastapi.routing, "serialize_response", _timed_async(fastapi.routing.serialize_response, "serialize"))
+        self._patch(security.pwd_context, "verify", _timed_sync(security.pwd_context.verify, "bcrypt"))
+        self._patch(security.pwd_context, "hash", _timed_sync(security.pwd_context.hash, "bcrypt"))
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    def _uninstall(self) -> None:
+        if not self._patches:
+            return
+        for owner, name, original, had_attribute in reversed(self._patches):
+            if had_attribute:
+                setattr(owner, name, original)
+            else:
+                delattr(owner, name)
+        self._patches = []
+        event.remove(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    def _sample(self, session: ProfilingSession, stop: threading.Event) -> None:
+        while not stop.wait(session.interval):
+            if time.monotonic() > session.expires:
+                if self.session is session:
+                    self.stop()
+                return
+            with self._lock:
+                profiles = list(self._in_flight.values())
+            if not profiles:
+                continue
+            frames = sys._current_frames()
+            for profile in profiles:
+                for ident in profile.thread_idents():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        profile.samples[_collapse(frame)] += 1
+            del frames
+
+    def begin(self, method: str, path: str) -> Optional[Profile]:
+        session = self.session
+        if session is None or time.monotonic() > session.expires:
+            return None
+        if not session.selects(method, path):
+            return None
+        session.profiled += 1
+        profile = Profile(method, path)
+        with self._lock:
+            self._in_flight[profile.id] = profile
+        return profile
+
+    def end(self, profile: Profile, seconds: float) -> None:
+        profile.duration_ms = seconds * 1000
+        with self._lock:
+            self._in_flight.pop(profile.id, None)
+        self.profiles.append(profile)
+
+
+profiler = Profiler(settings.PROFILING_MAX_PROFILES)
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware starting a profile for requests the active session
+    selects; a plain pass-through otherwise
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if profiler.session is None or scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        profile = profiler.begin(scope["method"], scope["path"])
+        if profile is None:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+            await send(message)
+
+        token = _current.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            profiler.end(profile, time.perf_counter() - started)
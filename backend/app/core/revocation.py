@@ -0,0 +1,185 @@
+import asyncio
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.models.token import RefreshToken, RevokedToken
+
+logger = logging.getLogger(__name__)
+
+
+class BloomFilter:
+    """
+    Set of strings that may answer "maybe" for a key never added, at a rate
+    of about ``error_rate`` while it holds at most ``capacity`` keys, but
+    never "no" for one that was.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(capacity, 1)
+        self.size = max(int(-self.capacity * math.log(error_rate) / math.log(2) ** 2), 64)
+        self.hashes = max(round(self.size / self.capacity * math.log(2)), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str) -> None:
+        added = False
+        for position in self._positions(key):
+            mask = 1 << (position & 7)
+            if not self.bits[position >> 3] & mask:
+                self.bits[position >> 3] |= mask
+                added = True
+        if added:
+            self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key)
+        )
+
+
+class RevocationList:
+    """
+    Revoked access token (``jti``) and session (``sid``) ids, checked on
+    every authenticated request.
+
+    Each worker keeps the unexpired rows of ``revoked_tokens`` in a Bloom
+    filter. A token the filter has never seen, the common case, is cleared
+    without a query; only possible positives are looked up. ``sync`` tops
+    the filter up with rows revoked since the last sync, re-reading
+    REVOCATION_SYNC_OVERLAP_SECONDS so rows committed late are not missed,
+    and rebuilds it when full or every REVOCATION_REBUILD_SECONDS to shed
+    expired ids. Revocations made in this worker apply at once, elsewhere
+    within REVOCATION_SYNC_SECONDS. Until the first sync every check goes
+    to the database.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._lock = threading.Lock()
+        self._filter = BloomFilter(capacity, error_rate)
+        self._synced_at: Optional[datetime] = None  # Revocations up to here are in the filter
+        self._built_at = 0.0
+        self._stats = {
+            "checks": 0, "cleared": 0, "confirmed": 0, "false_positives": 0,
+            "syncs": 0, "rebuilds": 0,
+        }
+
+    def add(self, token_id: str) -> None:
+        with self._lock:
+            self._filter.add(token_id)
+
+    def is_revoked(self, db: Session, token_ids: Iterable[Optional[str]]) -> bool:
+        token_ids = [token_id for token_id in token_ids if token_id]
+        with self._lock:
+            self._stats["checks"] += 1
+            if self._synced_at is not None:
+                token_ids = [token_id for token_id in token_ids if token_id in self._filter]
+            if not token_ids:
+                self._stats["cleared"] += 1
+                return False
+        revoked = db.execute(
+            select(RevokedToken.id)
+            .where(
+                RevokedToken.token_id.in_(token_ids),
+                RevokedToken.expires_at > datetime.now(timezone.utc),
+            )
+            .limit(1)
+        ).first() is not None
+        with self._lock:
+            self._stats["confirmed" if revoked else "false_positives"] += 1
+        return revoked
+
+    def sync(self) -> int:
+        """
+        Load revocations from the database; return the number of rows read
+        """
+        started = datetime.now(timezone.utc)
+        rebuild = (
+            self._synced_at is None
+            or time.monotonic() - self._built_at >= settings.REVOCATION_REBUILD_SECONDS
+        )
+        db = SessionLocal()
+        try:
+            if rebuild:
+                self._sweep(db, started)
+            query = select(RevokedToken.token_id).where(RevokedToken.expires_at > started)
+            if not rebuild:
+                query = query.where(
+                    RevokedToken.revoked_at
+                    >= self._synced_at - timedelta(seconds=settings.REVOCATION_SYNC_OVERLAP_SECONDS)
+                )
+            token_ids = db.execute(query).scalars().all()
+        finally:
+            db.close()
+
+        with self._lock:
+            full = not rebuild and self._filter.count + len(token_ids) > self._filter.capacity
+            if full:
+                self._built_at = 0.0
+            elif rebuild:
+                bloom = BloomFilter(max(self.capacity, 2 * len(token_ids)), self.error_rate)
+                for token_id in token_ids:
+                    bloom.add(token_id)
+                self._filter = bloom
+                self._built_at = time.monotonic()
+                self._stats["rebuilds"] += 1
+            else:
+                for token_id in token_ids:
+                    self._filter.add(token_id)
+            if not full:
+                self._synced_at = started
+                self._stats["syncs"] += 1
+        if full:
+            # Start over with a filter sized for what is there now
+            return self.sync()
+        return len(token_ids)
+
+    def _sweep(self, db: Session, now: datetime) -> None:
+        db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+        db.execute(delete(RefreshToken).where(RefreshToken.expires_at <= now))
+        db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = self._filter.count
+            stats["capacity"] = self._filter.capacity
+            stats["filter_bytes"] = len(self._filter.bits)
+            stats["synced_at"] = self._synced_at.isoformat() if self._synced_at else None
+        checks = stats["checks"]
+        stats["cleared_ratio"] = round(stats["cleared"] / checks, 4) if checks else 0.0
+        return stats
+
+
+revocation_list = RevocationList(settings.REVOCATION_CAPACITY, settings.REVOCATION_ERROR_RATE)
+
+
+async def sync_revocations() -> None:
+    """
+    Background loop keeping this worker's revocation list current
+    """
+    while True:
+        try:
+            await run_in_threadpool(revocation_list.sync)
+        except Exception:
+            logger.exception("Revocation list sync failed")
+        await asyncio.sleep(settings.REVOCATION_SYNC_SECONDS)
@@ -3,16 +3,19 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.tracing import span
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with span("bcrypt.verify"):
+        return pwd_context.verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with span("bcrypt.hash"):
+        return pwd_context.hash(password)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -33,3 +36,44 @@ def decode_access_token(token: str) -> Optional[dict]:
         return payload
     except JWTError:
         return None
+
+
+def create_refresh_token(email: str, jti: str, session_id: str, expire: datetime) -> str:
+    """
+    Single-use token exchanged at /auth/refresh for a new pair
+    """
+    return jwt.encode(
+        {"sub": email, "scope": "refresh", "jti": jti, "sid": session_id, "exp": expire},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+def decode_refresh_token(token: str) -> Optional[dict]:
+    payload = decode_access_token(token)
+    if payload is None or payload.get("scope") != "refresh" or not payload.get("jti"):
+        return None
+    return payload
+
+
+def create_calendar_token(staff_id: int, tenant_id: Optional[int]) -> str:
+    """
+    Read-only token embedded in a staff member's calendar feed URL
+    """
+    expire = datetime.utcnow() + timedelta(days=settings.CALENDAR_TOKEN_EXPIRE_DAYS)
+    return jwt.encode(
+        {"sub": f"staff:{staff_id}", "scope": "calendar", "tenant_id": tenant_id, "exp": expire},
+        settings.SECRET_KEY,
+        algorithm=settings.ALGORITHM,
+    )
+
+
+def decode_calendar_token(token: str, staff_id: int) -> Optional[dict]:
+    payload = decode_access_token(token)
+    if (
+        payload is None
+        or payload.get("scope") != "calendar"
+        or payload.get("sub") != f"staff:{staff_id}"
+    ):
+        return None
+    return payload
@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical reads.
+
+    The first caller for a key (the leader) runs the work; callers arriving
+    while it is in flight wait for its result instead of repeating it, and
+    for ``window`` seconds afterwards the result is served from memory.
+    Flights are ``concurrent.futures.Future`` objects, so threadpool (sync)
+    and event-loop (async) endpoints share them. Errors are never cached.
+
+    Keys must capture everything the result depends on: route, normalised
+    parameters and the caller's authorisation scope (tenant). The first two
+    items of a key are the route and tenant, used by ``invalidate``.
+    """
+
+    def __init__(self, window: float, max_keys: int):
+        self.window = window
+        self.max_keys = max_keys
+        self._flights: Dict[Hashable, Tuple[Future, float]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "executions": 0, "coalesced": 0, "cache_hits": 0}
+
+    def _join(self, key: Hashable) -> Tuple[Future, bool]:
+        """
+        The flight for ``key`` and whether the caller leads it
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._stats["requests"] += 1
+            entry = self._flights.get(key)
+            if entry is not None:
+                future, expires = entry
+                if not future.done():
+                    self._stats["coalesced"] += 1
+                    return future, False
+                if expires > now:
+                    self._stats["cache_hits"] += 1
+                    return future, False
+            if len(self._flights) >= self.max_keys:
+                self._evict(now)
+            future = Future()
+            self._flights[key] = (future, float("inf"))
+            self._stats["executions"] += 1
+            return future, True
+
+    def _land(self, key: Hashable, future: Future, result: Any, error: Optional[BaseException]) -> None:
+        with self._lock:
+            if error is None and self.window > 0:
+                self._flights[key] = (future, time.monotonic() + self.window)
+            elif self._flights.get(key, (None,))[0] is future:
+                del self._flights[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def _evict(self, now: float) -> None:
+        for key, (future, expires) in list(self._flights.items()):
+            if future.done() and expires <= now:
+                del self._flights[key]
+
+    def do(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        Run ``fn`` once for all concurrent callers with ``key`` (blocking)
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as exc:
+            self._land(key, future, None, exc)
+            raise
+        self._land(key, future, result, None)
+        return result
+
+    async def do_async(self, key: Hashable, fn: Callable[[], T]) -> T:
+        """
+        ``do`` for async endpoints: waits without blocking the event loop
+        and runs the blocking ``fn`` in the threadpool
+        """
+        future, leader = self._join(key)
+        if not leader:
+            return await asyncio.wrap_future(future)
+        try:
+            result = await run_in_threadpool(fn)
+        except BaseException as exc:
+            self._land(key, future, None, exc)
+            raise
+        self._land(key, future, result, None)
+        return result
+
+    def invalidate(self, route: Hashable, tenant_id: Optional[int]) -> None:
+        """
+        Drop cached results of ``route`` for the tenant and for tenant-less
+        admins, whose results span every tenant, e.g. after a write.
+        In-flight reads are left alone. Other workers expire on their own
+        within ``window``.
+        """
+        with self._lock:
+            for key, (future, _) in list(self._flights.items()):
+                if (
+                    future.done()
+                    and isinstance(key, tuple)
+                    and key[0] == route
+                    and key[1] in (tenant_id, None)
+                ):
+                    del self._flights[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = sum(1 for future, _ in self._flights.values() if not future.done())
+        shared = stats["coalesced"] + stats["cache_hits"]
+        stats["coalescing_ratio"] = round(shared / stats["requests"], 4) if stats["requests"] else 0.0
+        return stats
+
+
+single_flight = SingleFlight(settings.SINGLE_FLIGHT_WINDOW_SECONDS, settings.SINGLE_FLIGHT_MAX_KEYS)
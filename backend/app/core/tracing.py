@@ -0,0 +1,420 @@
+import asyncio
+import contextvars
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import urllib.request
+from collections import Counter, deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from functools import wraps
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+
+import fastapi.routing
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# OTLP span kinds and status codes
+KIND_INTERNAL, KIND_SERVER, KIND_CLIENT = 1, 2, 3
+STATUS_UNSET, STATUS_ERROR = 0, 2
+
+_traceparent = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+# Trace of the request being handled and its innermost open span, copied
+# into threadpool workers and background tasks
+_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+_span: contextvars.ContextVar[Optional["Span"]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+def _new_id(bits: int) -> str:
+    return f"{random.getrandbits(bits):0{bits // 4}x}"
+
+
+class Span:
+    __slots__ = (
+        "span_id", "parent_span_id", "name", "kind", "start_ns", "end_ns",
+        "attributes", "status", "message",
+    )
+
+    def __init__(
+        self, name: str, parent_span_id: Optional[str], kind: int = KIND_INTERNAL, **attributes: Any
+    ):
+        self.span_id = _new_id(64)
+        self.parent_span_id = parent_span_id
+        self.name = name
+        self.kind = kind
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes = attributes
+        self.status = STATUS_UNSET
+        self.message: Optional[str] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+
+    def fail(self, exc: BaseException) -> None:
+        self.status = STATUS_ERROR
+        self.message = f"{type(exc).__name__}: {exc}"
+
+    def to_otlp(self, trace_id: str) -> Dict[str, Any]:
+        span = {
+            "traceId": trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_ns),
+            "endTimeUnixNano": str(self.end_ns or self.start_ns),
+            "attributes": _attributes(self.attributes),
+            "status": {"code": self.status, **({"message": self.message} if self.message else {})},
+        }
+        if self.parent_span_id:
+            span["parentSpanId"] = self.parent_span_id
+        return span
+
+
+class Trace:
+    """
+    Spans of one request. Everything is recorded; whether the trace is
+    kept is decided when the request ends (see ``Tracer.finish``).
+    """
+
+    def __init__(
+        self,
+        trace_id: Optional[str] = None,
+        parent_span_id: Optional[str] = None,
+        sampled: bool = False,
+    ):
+        self.trace_id = trace_id or _new_id(128)
+        self.parent_span_id = parent_span_id
+        self.sampled = sampled  # The caller asked for the trace
+        self.root: Optional[Span] = None
+        self.spans: List[Span] = []
+        self.dropped = 0
+
+    def add(self, span: Span) -> None:
+        if len(self.spans) < settings.TRACING_MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped += 1
+
+
+def _attributes(values: Dict[str, Any]) -> List[Dict[str, Any]]:
+    attributes = []
+    for key, value in values.items():
+        if value is None:
+            continue
+        if isinstance(value, bool):
+            typed = {"boolValue": value}
+        elif isinstance(value, int):
+            typed = {"intValue": str(value)}
+        elif isinstance(value, float):
+            typed = {"doubleValue": value}
+        else:
+            typed = {"stringValue": str(value)}
+        attributes.append({"key": key, "value": typed})
+    return attributes
+
+
+@contextmanager
+def span(name: str, kind: int = KIND_INTERNAL, **attributes: Any) -> Iterator[Optional[Span]]:
+    """
+    Child span of the current one for the enclosed block; a no-op outside
+    a traced request
+    """
+    trace = _trace.get()
+    if trace is None:
+        yield None
+        return
+    parent = _span.get()
+    current = Span(name, parent.span_id if parent else trace.parent_span_id, kind, **attributes)
+    token = _span.set(current)
+    try:
+        yield current
+    except BaseException as exc:
+        current.fail(exc)
+        raise
+    finally:
+        current.end()
+        _span.reset(token)
+        trace.add(current)
+
+
+def traced(name: str) -> Callable[[Callable], Callable]:
+    """
+    Run the decorated function, sync or async, in a span. The signature is
+    kept, so FastAPI resolves decorated dependencies as before.
+    """
+
+    def decorate(func: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def traceparent() -> Optional[str]:
+    """
+    W3C traceparent header for an outgoing call made within the current span
+    """
+    trace, current = _trace.get(), _span.get()
+    if trace is None or current is None:
+        return None
+    return f"00-{trace.trace_id}-{current.span_id}-{'01' if trace.sampled else '00'}"
+
+
+class Tracer:
+    """
+    Tail-based sampler and exporter. A finished trace is kept when the
+    caller sampled it, the request failed (5xx or an unhandled exception)
+    or took at least TRACING_SLOW_MS; other traces are kept with
+    probability TRACING_SAMPLE_RATE. Kept traces are buffered and written
+    in batches as OTLP/JSON: one ExportTraceServiceRequest per line of
+    TRACING_OUTPUT_DIR/traces-<date>-<pid>.jsonl, or POSTed to an OTLP/HTTP
+    collector at TRACING_OTLP_ENDPOINT.
+    """
+
+    def __init__(self, max_queued: int):
+        self._queue: Deque[Trace] = deque(maxlen=max_queued)
+        self._stats: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def finish(self, trace: Trace) -> None:
+        root = trace.root
+        if trace.sampled:
+            reason = "requested"
+        elif root.status == STATUS_ERROR:
+            reason = "error"
+        elif root.duration_ms >= settings.TRACING_SLOW_MS:
+            reason = "slow"
+        elif random.random() < settings.TRACING_SAMPLE_RATE:
+            reason = "sampled"
+        else:
+            reason = None
+        with self._lock:
+            self._stats["traces"] += 1
+            if reason is None:
+                return
+            self._stats[f"kept_{reason}"] += 1
+            if len(self._queue) == self._queue.maxlen:
+                self._stats["dropped"] += 1
+            self._queue.append(trace)
+
+    def __len__(self) -> int:
+        return len(self._queue)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["queued"] = len(self._queue)
+        return stats
+
+    def flush(self) -> int:
+        """
+        Export the queued traces; returns how many were written
+        """
+        with self._lock:
+            traces = list(self._queue)
+            self._queue.clear()
+        if not traces:
+            return 0
+        body = json.dumps(self._request(traces), separators=(",", ":"))
+        if settings.TRACING_EXPORTER == "otlp":
+            request = urllib.request.Request(
+                settings.TRACING_OTLP_ENDPOINT,
+                data=body.encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            with urllib.request.urlopen(request, timeout=10):
+                pass
+        else:
+            directory = Path(settings.TRACING_OUTPUT_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            name = f"traces-{datetime.now(timezone.utc):%Y%m%d}-{os.getpid()}.jsonl"
+            with open(directory / name, "a") as file:
+                file.write(body + "\n")
+        with self._lock:
+            self._stats["exported"] += len(traces)
+        return len(traces)
+
+    def _request(self, traces: List[Trace]) -> Dict[str, Any]:
+        spans = []
+        for trace in traces:
+            if trace.dropped:
+                trace.root.attributes["tracing.dropped_spans"] = trace.dropped
+            spans += [span.to_otlp(trace.trace_id) for span in trace.spans]
+        resource = {
+            "service.name": settings.TRACING_SERVICE_NAME,
+            "service.version": settings.VERSION,
+            "process.pid": os.getpid(),
+        }
+        return {
+            "resourceSpans": [
+                {
+                    "resource": {"attributes": _attributes(resource)},
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+            ]
+        }
+
+
+tracer = Tracer(settings.TRACING_MAX_QUEUED)
+
+
+async def export_traces() -> None:
+    """
+    Background loop exporting kept traces
+    """
+    while True:
+        await asyncio.sleep(settings.TRACING_EXPORT_SECONDS)
+        if not len(tracer):
+            continue
+        try:
+            await run_in_threadpool(tracer.flush)
+        except Exception:
+            logger.exception("Trace export failed")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    trace = _trace.get()
+    if trace is None:
+        return
+    parent = _span.get()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "SQL"
+    context._trace_span = (
+        trace,
+        Span(
+            operation,
+            parent.span_id if parent else trace.parent_span_id,
+            KIND_CLIENT,
+            **{
+                "db.system": conn.dialect.name,
+                "db.operation": operation,
+                "db.statement": statement[: settings.TRACING_MAX_STATEMENT_LENGTH],
+            },
+        ),
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    traced_span = getattr(context, "_trace_span", None)
+    if traced_span is not None:
+        trace, current = traced_span
+        current.end()
+        trace.add(current)
+        context._trace_span = None
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    traced_span = getattr(context, "_trace_span", None) if context is not None else None
+    if traced_span is not None:
+        trace, current = traced_span
+        current.fail(exception_context.original_exception)
+        current.end()
+        trace.add(current)
+        context._trace_span = None
+
+
+def instrument() -> None:
+    """
+    Trace every SQL statement and FastAPI's response serialisation
+    """
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+    fastapi.routing.serialize_response = traced("serialize")(fastapi.routing.serialize_response)
+
+
+def _parse_traceparent(value: Optional[bytes]):
+    match = _traceparent.match(value.decode("latin-1").strip().lower()) if value else None
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None, None, False
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & 1)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the root span of each request. It continues
+    the caller's trace from a W3C ``traceparent`` header and returns the
+    trace id in ``traceresponse``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        trace = Trace(*_parse_traceparent(headers.get(b"traceparent")))
+        method, path = scope["method"], scope["path"]
+        root = Span(
+            f"{method} {path}",
+            trace.parent_span_id,
+            KIND_SERVER,
+            **{"http.method": method, "http.target": path},
+        )
+        trace.root = root
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                root.attributes["http.status_code"] = message["status"]
+                if message["status"] >= 500:
+                    root.status = STATUS_ERROR
+                flags = "01" if trace.sampled else "00"
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"traceresponse", f"00-{trace.trace_id}-{root.span_id}-{flags}".encode())
+                ]
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background tasks run after this; they are traced but not timed as the request
+                root.end()
+            await send(message)
+
+        trace_token, span_token = _trace.set(trace), _span.set(root)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as exc:
+            root.fail(exc)
+            raise
+        finally:
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+            root.end()
+            route = scope.get("route")
+            if route is not None and hasattr(route, "path"):
+                root.name = f"{method} {route.path}"
+                root.attributes["http.route"] = route.path
+            trace.spans.append(root)
+            tracer.finish(trace)
@@ -0,0 +1,52 @@
+import importlib
+import logging
+import pkgutil
+import time
+from contextlib import ExitStack
+
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.api import endpoints
+from app.core.config import settings
+from app.core.security import pwd_context
+from app.db.base import engine, get_tenant_engine
+
+logger = logging.getLogger(__name__)
+
+
+def open_pool(bind: Engine, size: int) -> None:
+    """
+    Check out ``size`` connections at once, so the pool really opens that
+    many, and run a trivial query on each before handing them back
+    """
+    with ExitStack() as stack:
+        for _ in range(size):
+            connection = stack.enter_context(bind.connect())
+            connection.execute(text("SELECT 1"))
+
+
+def warm_up(app: FastAPI) -> None:
+    """
+    Pay the first-request costs before the worker takes traffic: database
+    connections, the bcrypt backend, endpoint modules and the OpenAPI schema
+    """
+    started = time.perf_counter()
+    for module in pkgutil.iter_modules(endpoints.__path__):
+        importlib.import_module(f"{endpoints.__name__}.{module.name}")
+    app.openapi()
+    pwd_context.handler("bcrypt").get_backend()
+
+    engines = [engine] + [get_tenant_engine(tenant_id) for tenant_id in settings.TENANT_DATABASE_URLS]
+    for bind in engines:
+        try:
+            open_pool(bind, settings.DB_POOL_SIZE)
+        except SQLAlchemyError as exc:
+            # Serve anyway; pre-ping reconnects once the database is back
+            logger.warning("Could not warm up %s: %s", bind.url.render_as_string(), exc)
+    logger.info(
+        "Warmed up in %.0f ms: %s connection(s) to each of %s database(s)",
+        (time.perf_counter() - started) * 1000, settings.DB_POOL_SIZE, len(engines),
+    )
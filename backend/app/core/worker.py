@@ -0,0 +1,20 @@
+from typing import Any, Dict
+
+from uvicorn.workers import UvicornWorker
+
+
+class ProductionWorker(UvicornWorker):
+    """
+    Gunicorn worker running the app on uvloop and httptools.
+
+    On shutdown or recycling the worker stops accepting connections and
+    lets in-flight requests finish, stopping a few seconds short of
+    gunicorn's graceful timeout so the lifespan shutdown (audit log flush)
+    still runs before the arbiter kills it.
+    """
+
+    CONFIG_KWARGS: Dict[str, Any] = {"loop": "uvloop", "http": "httptools"}
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.config.timeout_graceful_shutdown = max(self.cfg.graceful_timeout - 5, 1)
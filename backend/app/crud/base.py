@@ -1,32 +1,363 @@
-from typing import Generic, TypeVar, Type, Optional, List, Any, Dict, Union
+import enum
+import logging
+import threading
+import time
+from typing import Callable, Generic, TypeVar, Type, Optional, List, Any, Dict, Sequence, Tuple, Union
 from pydantic import BaseModel
-from sqlalchemy.orm import Session
+from sqlalchemy import Integer, any_, bindparam, func, inspect, text
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Query, Session, load_only
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.sql.expression import ClauseElement, Executable
 from fastapi.encoders import jsonable_encoder
+from app.core.audit import audit_log
+from app.core.cache import invalidate_entity
+from app.core.config import settings
 from app.db.base import Base
 
+logger = logging.getLogger(__name__)
+
 ModelType = TypeVar("ModelType", bound=Base)
 CreateSchemaType = TypeVar("CreateSchemaType", bound=BaseModel)
 UpdateSchemaType = TypeVar("UpdateSchemaType", bound=BaseModel)
 
 
+class CountStrategy(str, enum.Enum):
+    AUTO = "auto"
+    EXACT = "exact"
+    CACHED = "cached"
+    ESTIMATED = "estimated"
+
+
+# Unfiltered per-tenant row counts, kept current by create/delete.
+# Entries expire so counts written through other workers converge.
+_count_cache: Dict[Tuple[str, Optional[int]], Tuple[int, float]] = {}
+_count_cache_lock = threading.Lock()
+
+
+# Called after every committed create/update/delete with
+# (db, table, action, before, after) column snapshots
+MutationListener = Callable[[Session, str, str, Dict[str, Any], Dict[str, Any]], None]
+_mutation_listeners: List[MutationListener] = []
+
+
+def register_mutation_listener(listener: MutationListener) -> None:
+    _mutation_listeners.append(listener)
+
+
+class VersionConflict(Exception):
+    """
+    The row was changed since the version the caller based its write on
+    """
+
+
+class TenantRequired(Exception):
+    """
+    A tenant-owned row was created outside any tenant, e.g. by a platform admin
+    """
+
+
+class Explain(Executable, ClauseElement):
+    """
+    ``EXPLAIN (FORMAT JSON)`` of a statement, executed like the statement
+    itself so its parameters go through their types' bind processing
+    """
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any):
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    return "EXPLAIN (FORMAT JSON) " + compiler.process(element.statement, **kw)
+
+
 class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
+    # Columns left out of audit records
+    audit_ignored_fields = {"change_seq", "change_xid", "created_at", "updated_at", "version"}
+
     def __init__(self, model: Type[ModelType]):
         self.model = model
 
-    def get(self, db: Session, id: int) -> Optional[ModelType]:
-        return db.query(self.model).filter(self.model.id == id).first()
+    @property
+    def is_tenant_scoped(self) -> bool:
+        return hasattr(self.model, "tenant_id")
+
+    @property
+    def is_soft_deleted(self) -> bool:
+        return hasattr(self.model, "deleted_at")
+
+    @property
+    def is_versioned(self) -> bool:
+        return hasattr(self.model, "version")
+
+    def _check_version(self, db_obj: ModelType, version: Optional[int]) -> None:
+        if version is not None and self.is_versioned and db_obj.version != version:
+            raise VersionConflict()
+
+    def _commit_versioned(self, db: Session) -> None:
+        # version_id_col makes the UPDATE match on the loaded version, so a
+        # concurrent writer shows up as zero rows matched
+        try:
+            db.commit()
+        except StaleDataError:
+            db.rollback()
+            raise VersionConflict()
+
+    def query(
+        self,
+        db: Session,
+        *,
+        include_deleted: bool = False,
+        fields: Optional[Sequence[str]] = None
+    ) -> Query:
+        """
+        Base query for the model, restricted to the session's tenant and,
+        unless ``include_deleted``, to rows without a tombstone. With
+        ``fields``, only those columns (plus key and version) are selected.
+        """
+        query = db.query(self.model)
+        if fields:
+            columns = [getattr(self.model, name) for name in fields]
+            if self.is_versioned:
+                columns.append(self.model.version)
+            query = query.options(load_only(*columns))
+        tenant_id = db.info.get("tenant_id")
+        if tenant_id is not None and self.is_tenant_scoped:
+            query = query.filter(self.model.tenant_id == tenant_id)
+        if self.is_soft_deleted and not include_deleted:
+            query = query.filter(self.model.deleted_at.is_(None))
+        return query
+
+    def get(
+        self, db: Session, id: int, *, fields: Optional[Sequence[str]] = None
+    ) -> Optional[ModelType]:
+        return (
+            self.query(db, fields=fields)
+            .filter(self.model.id == id)
+            .execution_options(prepare=True)
+            .first()
+        )
 
     def get_multi(
-        self, db: Session, *, skip: int = 0, limit: int = 100
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[ModelType]:
+        return self.query(db, fields=fields).offset(skip).limit(limit).all()
+
+    def get_by_ids(
+        self, db: Session, *, ids: Sequence[int], fields: Optional[Sequence[str]] = None
+    ) -> List[ModelType]:
+        """
+        Rows with the given ids in input order, in one query; duplicate ids
+        collapse and missing ones are skipped
+        """
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        query = self.query(db, fields=fields)
+        bind = db.get_bind(mapper=self.model.__mapper__)
+        if bind.dialect.name == "postgresql":
+            # A single array parameter keeps the statement text, and so its
+            # cached plan, the same whatever the number of ids
+            query = query.filter(
+                self.model.id == any_(bindparam("ids", ids, type_=ARRAY(Integer)))
+            ).execution_options(prepare=True)
+        else:
+            query = query.filter(self.model.id.in_(ids))
+        rows = {row.id: row for row in query}
+        return [rows[id] for id in ids if id in rows]
+
+    def lookup(
+        self, db: Session, *, ids: Sequence[int], fields: Optional[Sequence[str]] = None
+    ) -> Tuple[List[ModelType], List[int]]:
+        """
+        ``get_by_ids`` plus the requested ids that were not found
+        """
+        rows = self.get_by_ids(db, ids=ids, fields=fields)
+        found = {row.id for row in rows}
+        return rows, [id for id in dict.fromkeys(ids) if id not in found]
+
+    def get_change_horizon(self, db: Session) -> int:
+        """
+        Oldest transaction still running on the table's database. Changes
+        of older transactions are final; newer ones may still be joined
+        by a late commit.
+        """
+        return db.execute(
+            text("SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"),
+            bind_arguments={"mapper": inspect(self.model)},
+        ).scalar()
+
+    def get_changes(
+        self, db: Session, *, since: int, before: int, limit: Optional[int] = 500
     ) -> List[ModelType]:
-        return db.query(self.model).offset(skip).limit(limit).all()
+        """
+        Rows inserted, updated or deleted by transactions from ``since`` up
+        to, not including, ``before``, by transaction then change sequence
+        """
+        query = self.query(db, include_deleted=True).filter(
+            self.model.change_xid >= since, self.model.change_xid < before
+        )
+        if since == 0:
+            # Initial sync: the client has nothing to delete yet
+            query = query.filter(self.model.deleted_at.is_(None))
+        return query.order_by(self.model.change_xid, self.model.change_seq).limit(limit).all()
+
+    def count(
+        self, db: Session, *criteria: Any, strategy: CountStrategy = CountStrategy.AUTO
+    ) -> Tuple[int, CountStrategy]:
+        """
+        Number of rows matching ``criteria`` and the strategy actually used.
+
+        AUTO counts filtered sets exactly up to EXACT_COUNT_LIMIT, serves
+        unfiltered totals from the write-maintained cache, and falls back
+        to planner estimates for anything larger.
+        """
+        query = self.query(db).filter(*criteria)
+        if strategy == CountStrategy.EXACT:
+            return self._exact_count(query), CountStrategy.EXACT
+        if strategy == CountStrategy.ESTIMATED:
+            return self._estimated_count(db, query, filtered=bool(criteria))
+        if not criteria:
+            cached = self._get_cached_count(db)
+            if cached is not None:
+                return cached, CountStrategy.CACHED
+            if strategy == CountStrategy.CACHED:
+                total = self._exact_count(query)
+                self._set_cached_count(db, total)
+                return total, CountStrategy.EXACT
+
+        limit = settings.EXACT_COUNT_LIMIT
+        bounded = (
+            db.query(func.count())
+            .select_from(query.with_entities(self.model.id).limit(limit + 1).subquery())
+            .scalar()
+        )
+        if bounded <= limit:
+            if not criteria:
+                self._set_cached_count(db, bounded)
+            return bounded, CountStrategy.EXACT
+        return self._estimated_count(db, query, filtered=bool(criteria))
+
+    def _exact_count(self, query: Query) -> int:
+        return query.with_entities(func.count(self.model.id)).order_by(None).scalar()
+
+    def _estimated_count(
+        self, db: Session, query: Query, *, filtered: bool
+    ) -> Tuple[int, CountStrategy]:
+        connection = db.connection(bind_arguments={"mapper": self.model.__mapper__})
+        if connection.dialect.name != "postgresql":
+            return self._exact_count(query), CountStrategy.EXACT
+        if not filtered and db.info.get("tenant_id") is None:
+            reltuples = connection.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:t)"),
+                {"t": self.model.__tablename__},
+            ).scalar()
+            if reltuples is not None and reltuples >= 0:
+                return reltuples, CountStrategy.ESTIMATED
+        plan = connection.execute(Explain(query.statement)).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"]), CountStrategy.ESTIMATED
+
+    def _count_cache_key(self, db: Session) -> Optional[Tuple[str, Optional[int]]]:
+        if not self.is_tenant_scoped:
+            return self.model.__tablename__, None
+        tenant_id = db.info.get("tenant_id")
+        if tenant_id is None:
+            # Admins count every tenant's rows, but writes only adjust the
+            # writer's total, so the admin scope is never cached
+            return None
+        return self.model.__tablename__, tenant_id
+
+    def _get_cached_count(self, db: Session) -> Optional[int]:
+        key = self._count_cache_key(db)
+        if key is None:
+            return None
+        with _count_cache_lock:
+            entry = _count_cache.get(key)
+        if entry is None or entry[1] < time.monotonic():
+            return None
+        return entry[0]
+
+    def _set_cached_count(self, db: Session, total: int) -> None:
+        key = self._count_cache_key(db)
+        if key is None:
+            return
+        expires = time.monotonic() + settings.COUNT_CACHE_TTL_SECONDS
+        with _count_cache_lock:
+            _count_cache[key] = (total, expires)
+
+    def _adjust_cached_count(self, db: Session, delta: int) -> None:
+        key = self._count_cache_key(db)
+        if key is None:
+            return
+        with _count_cache_lock:
+            if key in _count_cache:
+                total, expires = _count_cache[key]
+                _count_cache[key] = (max(total + delta, 0), expires)
+
+    def _snapshot(self, db_obj: ModelType) -> Dict[str, Any]:
+        return {
+            attr.key: jsonable_encoder(getattr(db_obj, attr.key))
+            for attr in inspect(self.model).column_attrs
+            if attr.key not in self.audit_ignored_fields
+        }
+
+    def _invalidate_cache(self, db: Session, db_obj: ModelType) -> None:
+        invalidate_entity(self.model.__tablename__, getattr(db_obj, "tenant_id", None), db_obj.id)
+
+    def _record_change(
+        self,
+        db: Session,
+        db_obj: ModelType,
+        action: str,
+        before: Dict[str, Any],
+        after: Dict[str, Any],
+    ) -> None:
+        changes = {
+            field: [before.get(field), after.get(field)]
+            for field in before.keys() | after.keys()
+            if before.get(field) != after.get(field)
+        }
+        if not changes:
+            return
+        for listener in _mutation_listeners:
+            try:
+                listener(db, self.model.__tablename__, action, before, after)
+            except Exception:
+                # The write is committed; listeners must not fail it
+                logger.exception("Mutation listener %r failed", listener)
+        audit_log.record(
+            tenant_id=getattr(db_obj, "tenant_id", None),
+            entity_type=self.model.__tablename__,
+            entity_id=db_obj.id,
+            action=action,
+            user_id=db.info.get("user_id"),
+            changes=changes,
+        )
 
     def create(self, db: Session, *, obj_in: CreateSchemaType) -> ModelType:
         obj_in_data = jsonable_encoder(obj_in)
+        tenant_id = db.info.get("tenant_id")
+        if self.is_tenant_scoped:
+            if tenant_id is not None:
+                obj_in_data["tenant_id"] = tenant_id
+            elif not self.model.__table__.c.tenant_id.nullable:
+                raise TenantRequired(self.model.__tablename__)
         db_obj = self.model(**obj_in_data)
         db.add(db_obj)
         db.commit()
         db.refresh(db_obj)
+        self._adjust_cached_count(db, 1)
+        self._invalidate_cache(db, db_obj)
+        self._record_change(db, db_obj, "create", {}, self._snapshot(db_obj))
         return db_obj
 
     def update(
@@ -34,24 +365,47 @@ class CRUDBase(Generic[ModelType, CreateSchemaType, UpdateSchemaType]):
         db: Session,
         *,
         db_obj: ModelType,
-        obj_in: Union[UpdateSchemaType, Dict[str, Any]]
+        obj_in: Union[UpdateSchemaType, Dict[str, Any]],
+        version: Optional[int] = None
     ) -> ModelType:
+        """
+        Apply ``obj_in``; with ``version``, only if the row is still at that
+        version (raises VersionConflict otherwise)
+        """
+        self._check_version(db_obj, version)
         obj_data = jsonable_encoder(db_obj)
+        before = self._snapshot(db_obj)
         if isinstance(obj_in, dict):
             update_data = obj_in
         else:
             update_data = obj_in.dict(exclude_unset=True)
+        for field in ("tenant_id", "change_seq", "change_xid", "deleted_at", "version"):
+            update_data.pop(field, None)
         for field in obj_data:
             if field in update_data:
                 setattr(db_obj, field, update_data[field])
         db.add(db_obj)
-        db.commit()
+        self._commit_versioned(db)
         db.refresh(db_obj)
+        self._invalidate_cache(db, db_obj)
+        self._record_change(db, db_obj, "update", before, self._snapshot(db_obj))
         return db_obj
 
-    def delete(self, db: Session, *, id: int) -> Optional[ModelType]:
-        obj = db.query(self.model).get(id)
+    def delete(
+        self, db: Session, *, id: int, version: Optional[int] = None
+    ) -> Optional[ModelType]:
+        obj = self.query(db).filter(self.model.id == id).first()
         if obj:
-            db.delete(obj)
-            db.commit()
+            self._check_version(obj, version)
+            before = self._snapshot(obj)
+            if self.is_soft_deleted:
+                # Keep a tombstone so delta sync can report the deletion
+                obj.deleted_at = func.now()
+                db.add(obj)
+            else:
+                db.delete(obj)
+            self._commit_versioned(db)
+            self._adjust_cached_count(db, -1)
+            self._invalidate_cache(db, obj)
+            self._record_change(db, obj, "delete", before, {})
         return obj
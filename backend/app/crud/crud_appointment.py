@@ -1,64 +1,181 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import Any, Iterable, List, Optional, Sequence, Set, Tuple
+from datetime import datetime, timedelta
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
 from app.models.appointment import Appointment, AppointmentStatus
+from app.models.customer import Customer
+from app.models.service import Service
+from app.models.staff import Staff
 from app.schemas.appointment import AppointmentCreate, AppointmentUpdate
 
+# Statuses that occupy a staff member's time
+ACTIVE_STATUSES = (AppointmentStatus.SCHEDULED, AppointmentStatus.IN_PROGRESS)
+MAX_APPOINTMENT_LENGTH = timedelta(hours=24)
+
+
+class SlotUnavailable(Exception):
+    """
+    The staff member already has an active appointment in the slot
+    """
+
 
 class CRUDAppointment(CRUDBase[Appointment, AppointmentCreate, AppointmentUpdate]):
-    def get_by_customer(
-        self, db: Session, *, customer_id: int, skip: int = 0, limit: int = 100
+    def filter_criteria(
+        self,
+        *,
+        customer_id: Optional[int] = None,
+        staff_id: Optional[int] = None,
+        status: Optional[AppointmentStatus] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+    ) -> List[Any]:
+        criteria = []
+        if customer_id is not None:
+            criteria.append(Appointment.customer_id == customer_id)
+        if staff_id is not None:
+            criteria.append(Appointment.staff_id == staff_id)
+        if status is not None:
+            criteria.append(Appointment.status == status)
+        if start_date is not None:
+            criteria.append(Appointment.scheduled_date >= start_date)
+        if end_date is not None:
+            criteria.append(Appointment.scheduled_date <= end_date)
+        return criteria
+
+    def get_filtered(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None,
+        **filters: Any
     ) -> List[Appointment]:
         return (
-            db.query(Appointment)
-            .filter(Appointment.customer_id == customer_id)
+            self.query(db, fields=fields)
+            .filter(*self.filter_criteria(**filters))
+            .order_by(Appointment.scheduled_date)
             .offset(skip)
             .limit(limit)
+            .execution_options(prepare=True)
             .all()
         )
 
-    def get_by_staff(
-        self, db: Session, *, staff_id: int, skip: int = 0, limit: int = 100
+    def get_by_customer(
+        self, db: Session, *, customer_id: int, skip: int = 0, limit: int = 100
     ) -> List[Appointment]:
-        return (
-            db.query(Appointment)
-            .filter(Appointment.staff_id == staff_id)
-            .offset(skip)
-            .limit(limit)
-            .all()
-        )
+        return self.get_filtered(db, customer_id=customer_id, skip=skip, limit=limit)
 
-    def get_by_date_range(
+    def get_by_staff(
         self,
         db: Session,
         *,
-        start_date: datetime,
-        end_date: datetime,
+        staff_id: int,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
         skip: int = 0,
         limit: int = 100
     ) -> List[Appointment]:
-        return (
-            db.query(Appointment)
-            .filter(
-                Appointment.scheduled_date >= start_date,
-                Appointment.scheduled_date <= end_date,
+        return self.get_filtered(
+            db,
+            staff_id=staff_id,
+            start_date=start_date,
+            end_date=end_date,
+            skip=skip,
+            limit=limit,
+        )
+
+    def get_staff_version(self, db: Session, *, staff_id: int) -> Tuple[str, Optional[datetime]]:
+        """
+        Version and latest modification time of what a staff member's
+        calendar feed shows: their appointments, tombstones included, the
+        customers and services those reference, and the staff row, whose
+        calendar_seq moves when an appointment is reassigned away
+        """
+        appointment_seq, customer_seq, service_seq, *modified = (
+            self.query(db, include_deleted=True)
+            .join(Customer, Customer.id == Appointment.customer_id)
+            .join(Service, Service.id == Appointment.service_id)
+            .filter(Appointment.staff_id == staff_id)
+            .with_entities(
+                func.max(Appointment.change_seq),
+                func.max(Customer.change_seq),
+                func.max(Service.change_seq),
+                func.max(func.coalesce(Appointment.updated_at, Appointment.created_at)),
+                func.max(func.coalesce(Customer.updated_at, Customer.created_at)),
+                func.max(func.coalesce(Service.updated_at, Service.created_at)),
             )
-            .offset(skip)
-            .limit(limit)
-            .all()
+            .one()
+        )
+        calendar_seq, staff_modified = (
+            db.query(Staff.calendar_seq, Staff.updated_at).filter(Staff.id == staff_id).first()
+            or (0, None)
         )
+        version = f"{appointment_seq or 0}.{customer_seq or 0}.{service_seq or 0}.{calendar_seq}"
+        modified = [value for value in (*modified, staff_modified) if value is not None]
+        return version, max(modified, default=None)
 
-    def get_by_status(
-        self, db: Session, *, status: AppointmentStatus, skip: int = 0, limit: int = 100
-    ) -> List[Appointment]:
-        return (
-            db.query(Appointment)
-            .filter(Appointment.status == status)
-            .offset(skip)
-            .limit(limit)
-            .all()
+    def get_busy_staff_ids(
+        self,
+        db: Session,
+        *,
+        staff_ids: Iterable[int],
+        start: datetime,
+        end: datetime,
+        exclude_id: Optional[int] = None,
+    ) -> Set[int]:
+        """
+        Staff among ``staff_ids`` with an active appointment overlapping
+        [start, end). Appointments without an end_date last for their
+        service's duration.
+        """
+        appointment_end = func.coalesce(
+            Appointment.end_date,
+            Appointment.scheduled_date
+            + func.make_interval(0, 0, 0, 0, 0, Service.duration_minutes),
         )
+        query = (
+            self.query(db)
+            .join(Service, Service.id == Appointment.service_id)
+            .filter(
+                Appointment.staff_id.in_(list(staff_ids)),
+                Appointment.status.in_(ACTIVE_STATUSES),
+                # Bounds the (tenant_id, staff_id, scheduled_date) index scan
+                Appointment.scheduled_date >= start - MAX_APPOINTMENT_LENGTH,
+                Appointment.scheduled_date < end,
+                appointment_end > start,
+            )
+        )
+        if exclude_id is not None:
+            query = query.filter(Appointment.id != exclude_id)
+        return {staff_id for (staff_id,) in query.with_entities(Appointment.staff_id).distinct()}
+
+    def reserve_slot(
+        self,
+        db: Session,
+        *,
+        staff_id: int,
+        service_id: int,
+        start: datetime,
+        end: Optional[datetime] = None,
+        exclude_id: Optional[int] = None,
+    ) -> None:
+        """
+        Lock the staff member's row until the transaction ends and raise
+        SlotUnavailable if [start, end) overlaps one of their active
+        appointments, so an appointment created or moved into the slot in
+        the same transaction cannot double-book them. Without ``end`` the
+        slot lasts the service's duration.
+        """
+        db.query(Staff).filter(Staff.id == staff_id).with_for_update().first()
+        if end is None:
+            minutes = db.query(Service.duration_minutes).filter(Service.id == service_id).scalar()
+            end = start + timedelta(minutes=minutes or 0)
+        if self.get_busy_staff_ids(
+            db, staff_ids=[staff_id], start=start, end=end, exclude_id=exclude_id
+        ):
+            raise SlotUnavailable()
 
 
 appointment = CRUDAppointment(Appointment)
@@ -0,0 +1,25 @@
+from typing import List
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.audit import AuditLog
+from app.schemas.audit import AuditLog as AuditLogSchema
+
+
+class CRUDAuditLog(CRUDBase[AuditLog, AuditLogSchema, AuditLogSchema]):
+    def get_by_entity(
+        self, db: Session, *, entity_type: str, entity_id: int, skip: int = 0, limit: int = 100
+    ) -> List[AuditLog]:
+        """
+        History of one entity, newest first
+        """
+        return (
+            self.query(db)
+            .filter(AuditLog.entity_type == entity_type, AuditLog.entity_id == entity_id)
+            .order_by(AuditLog.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+
+audit_log = CRUDAuditLog(AuditLog)
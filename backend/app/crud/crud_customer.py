@@ -1,13 +1,36 @@
-from typing import Optional
+from typing import Any, Dict, Optional, Union
+from fastapi.encoders import jsonable_encoder
 from sqlalchemy.orm import Session
 from app.crud.base import CRUDBase
+from app.geo.geocode import coordinate_fields
 from app.models.customer import Customer
 from app.schemas.customer import CustomerCreate, CustomerUpdate
 
 
 class CRUDCustomer(CRUDBase[Customer, CustomerCreate, CustomerUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[Customer]:
-        return db.query(Customer).filter(Customer.email == email).first()
+        return self.query(db).filter(Customer.email == email).first()
+
+    def create(self, db: Session, *, obj_in: CustomerCreate) -> Customer:
+        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data.update(coordinate_fields(obj_in_data["zip_code"]))
+        return super().create(db, obj_in=obj_in_data)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Customer,
+        obj_in: Union[CustomerUpdate, Dict[str, Any]],
+        version: Optional[int] = None
+    ) -> Customer:
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if "zip_code" in update_data:
+            update_data.update(coordinate_fields(update_data["zip_code"]))
+        return super().update(db, db_obj=db_obj, obj_in=update_data, version=version)
 
 
 customer = CRUDCustomer(Customer)
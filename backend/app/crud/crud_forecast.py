@@ -0,0 +1,13 @@
+from typing import Optional
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.forecast import DemandForecast
+from app.schemas.forecast import DemandForecast as DemandForecastSchema
+
+
+class CRUDDemandForecast(CRUDBase[DemandForecast, DemandForecastSchema, DemandForecastSchema]):
+    def get_latest(self, db: Session) -> Optional[DemandForecast]:
+        return self.query(db).order_by(DemandForecast.generated_at.desc()).first()
+
+
+demand_forecast = CRUDDemandForecast(DemandForecast)
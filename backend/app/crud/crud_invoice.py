@@ -0,0 +1,39 @@
+from typing import List
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.invoice import BillingRun, Invoice
+from app.schemas.invoice import BillingRunCreate
+
+
+class CRUDBillingRun(CRUDBase[BillingRun, BillingRunCreate, BillingRunCreate]):
+    pass
+
+
+class CRUDInvoice(CRUDBase[Invoice, BillingRunCreate, BillingRunCreate]):
+    def get_by_customer(
+        self, db: Session, *, customer_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Invoice]:
+        return (
+            self.query(db)
+            .filter(Invoice.customer_id == customer_id)
+            .order_by(Invoice.period_start.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def get_by_run(
+        self, db: Session, *, billing_run_id: int, skip: int = 0, limit: int = 100
+    ) -> List[Invoice]:
+        return (
+            self.query(db)
+            .filter(Invoice.billing_run_id == billing_run_id)
+            .order_by(Invoice.id)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+
+billing_run = CRUDBillingRun(BillingRun)
+invoice = CRUDInvoice(Invoice)
@@ -0,0 +1,128 @@
+from datetime import datetime, timezone
+import numpy as np
+from sqlalchemy import Float, cast, delete, exists, extract, insert, select
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.crud.base import CRUDBase
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.payroll import PayrollEntry, PayrollPeriod, PayrollPeriodStatus
+from app.models.service import Service
+from app.models.staff import Staff
+from app.payroll.engine import compute_payroll, week_origin
+from app.schemas.payroll import PayrollPeriodCreate
+
+
+class CRUDPayrollPeriod(CRUDBase[PayrollPeriod, PayrollPeriodCreate, PayrollPeriodCreate]):
+    def inputs_changed_since(self, db: Session, *, tenant_id: int, xid: int) -> bool:
+        """
+        Whether transactions from ``xid`` on wrote any input to payroll for
+        the tenant, tombstones included
+        """
+        return any(
+            db.execute(
+                select(exists().where(model.tenant_id == tenant_id, model.change_xid >= xid))
+            ).scalar()
+            for model in (Appointment, Staff, Service)
+        )
+
+    def refresh(self, db: Session, *, period: PayrollPeriod) -> PayrollPeriod:
+        """
+        Recompute an open period's entries if any input changed since the
+        last run. Closed periods are never recomputed.
+        """
+        # Concurrent refreshes of a period take turns replacing its entries
+        period = (
+            db.query(PayrollPeriod)
+            .filter(PayrollPeriod.id == period.id)
+            .with_for_update()
+            .populate_existing()
+            .one()
+        )
+        if period.status == PayrollPeriodStatus.CLOSED or (
+            period.computed_through_xid is not None
+            and not self.inputs_changed_since(
+                db, tenant_id=period.tenant_id, xid=period.computed_through_xid
+            )
+        ):
+            db.commit()
+            return period
+        # Read before the inputs: every transaction older than it is visible
+        # to the queries below, later ones are picked up by the next refresh
+        horizon = self.get_change_horizon(db)
+
+        roster = db.execute(
+            select(Staff.id, Staff.hourly_rate)
+            .where(Staff.tenant_id == period.tenant_id)
+            .order_by(Staff.id)
+        ).all()
+        appointments = db.execute(
+            select(
+                Appointment.staff_id,
+                cast(extract("epoch", Appointment.scheduled_date), Float),
+                cast(extract("epoch", Appointment.end_date), Float),
+                Service.duration_minutes,
+            )
+            .join(Service, Service.id == Appointment.service_id)
+            .where(
+                Appointment.tenant_id == period.tenant_id,
+                Appointment.scheduled_date >= period.start_date,
+                Appointment.scheduled_date < period.end_date,
+                Appointment.status == AppointmentStatus.COMPLETED,
+                Appointment.deleted_at.is_(None),
+            )
+        ).all()
+
+        staff_ids = np.array([row[0] for row in roster], dtype=np.int64)
+        rates = np.array([row[1] for row in roster], dtype=np.float64)
+        columns = list(zip(*appointments)) or [(), (), (), ()]
+        result = compute_payroll(
+            staff_ids,
+            rates,
+            np.array(columns[0], dtype=np.int64),
+            np.array(columns[1], dtype=np.float64),
+            np.array(columns[2], dtype=np.float64),
+            np.array(columns[3], dtype=np.float64),
+            origin=week_origin(period.start_date),
+            overtime_weekly_hours=settings.PAYROLL_OVERTIME_WEEKLY_HOURS,
+            overtime_multiplier=settings.PAYROLL_OVERTIME_MULTIPLIER,
+        )
+
+        worked = np.flatnonzero(result["appointment_count"])
+        db.execute(delete(PayrollEntry).where(PayrollEntry.period_id == period.id))
+        if len(worked):
+            db.execute(
+                insert(PayrollEntry),
+                [
+                    {
+                        "period_id": period.id,
+                        "staff_id": int(staff_ids[i]),
+                        "appointment_count": int(result["appointment_count"][i]),
+                        "regular_hours": float(result["regular_hours"][i]),
+                        "overtime_hours": float(result["overtime_hours"][i]),
+                        "hourly_rate": roster[i][1],
+                        "pay": float(result["pay"][i]),
+                    }
+                    for i in worked
+                ],
+            )
+        period.computed_through_xid = horizon
+        period.computed_at = datetime.now(timezone.utc)
+        db.add(period)
+        db.commit()
+        db.expire(period, ["entries"])
+        return period
+
+    def close(self, db: Session, *, period: PayrollPeriod) -> PayrollPeriod:
+        """
+        Compute the final figures and freeze the period
+        """
+        period = self.refresh(db, period=period)
+        period.status = PayrollPeriodStatus.CLOSED
+        period.closed_at = datetime.now(timezone.utc)
+        db.add(period)
+        db.commit()
+        db.refresh(period)
+        return period
+
+
+payroll_period = CRUDPayrollPeriod(PayrollPeriod)
@@ -0,0 +1,19 @@
+from typing import List
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.purge import PurgeJob
+from app.schemas.purge import PurgeJobCreate
+
+
+class CRUDPurgeJob(CRUDBase[PurgeJob, PurgeJobCreate, PurgeJobCreate]):
+    def get_recent(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[PurgeJob]:
+        return (
+            self.query(db)
+            .order_by(PurgeJob.id.desc())
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+
+purge_job = CRUDPurgeJob(PurgeJob)
@@ -0,0 +1,212 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.core.cache import cache
+from app.core.config import settings
+from app.crud.base import CRUDBase, register_mutation_listener
+from app.crud.crud_appointment import appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
+from app.crud.crud_staff import staff as staff_crud
+from app.db.base import SessionLocal
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.schedule import ScheduleDay
+from app.models.staff import Staff
+from app.schedule.timeline import build_lane
+from app.schemas.schedule import ScheduleBoard
+
+# Columns whose change alters what a lane shows
+STAFF_FIELDS = ("first_name", "last_name", "position", "is_active", "deleted_at")
+CUSTOMER_FIELDS = ("first_name", "last_name", "address", "city", "state", "zip_code")
+SERVICE_FIELDS = ("name", "duration_minutes", "deleted_at")
+
+
+def local_day(value: datetime) -> date:
+    return value.astimezone(ZoneInfo(settings.SCHEDULE_TIMEZONE)).date()
+
+
+def day_bounds(day: date) -> Tuple[datetime, datetime]:
+    start = datetime.combine(day, time.min, ZoneInfo(settings.SCHEDULE_TIMEZONE))
+    return start, start + timedelta(days=1)
+
+
+def _changed(before: Dict[str, Any], after: Dict[str, Any], fields: Iterable[str]) -> bool:
+    return any(before.get(field) != after.get(field) for field in fields)
+
+
+class CRUDScheduleDay(CRUDBase[ScheduleDay, ScheduleBoard, ScheduleBoard]):
+    """
+    Per-day, per-tenant materialisation of the staff board. Days are built
+    on first read; afterwards the appointment, staff, customer and service
+    write paths patch only the affected staff lanes (see ``on_mutation``).
+    """
+
+    def _cache_key(self, db: Session, day: date) -> str:
+        return f"schedule:{db.info.get('tenant_id')}:{day.isoformat()}"
+
+    def _lanes(
+        self, db: Session, day: date, staff_ids: Optional[Set[int]] = None
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Lanes for ``staff_ids``, or for all active staff and anyone with a
+        job that day
+        """
+        start, end = day_bounds(day)
+        query = appointment_crud.query(db).filter(
+            Appointment.scheduled_date >= start,
+            Appointment.scheduled_date < end,
+            Appointment.status != AppointmentStatus.CANCELLED,
+        )
+        if staff_ids is not None:
+            query = query.filter(Appointment.staff_id.in_(staff_ids))
+        appointments = query.all()
+
+        by_staff: Dict[int, List[Appointment]] = defaultdict(list)
+        for appointment in appointments:
+            by_staff[appointment.staff_id].append(appointment)
+        if staff_ids is None:
+            active = staff_crud.query(db).filter(Staff.is_active == True).with_entities(Staff.id)
+            staff_ids = {row.id for row in active} | set(by_staff)
+        customers = {
+            row.id: row
+            for row in customer_crud.get_by_ids(db, ids=sorted({a.customer_id for a in appointments}))
+        }
+        services = {
+            row.id: row
+            for row in service_crud.get_by_ids(db, ids=sorted({a.service_id for a in appointments}))
+        }
+        return {
+            str(staff.id): build_lane(staff, by_staff[staff.id], customers, services)
+            for staff in staff_crud.get_by_ids(db, ids=sorted(staff_ids))
+            if staff.is_active or by_staff[staff.id]
+        }
+
+    def _board(self, row: ScheduleDay) -> Dict[str, Any]:
+        lanes = sorted(row.lanes.values(), key=lambda lane: (lane["name"], lane["staff_id"]))
+        return {"date": row.day.isoformat(), "updated_at": row.updated_at.isoformat(), "staff": lanes}
+
+    def _publish(self, db: Session, row: ScheduleDay) -> None:
+        key = self._cache_key(db, row.day)
+        cache.invalidate([key])
+        cache.set(key, self._board(row), settings.CACHE_TTL_SECONDS)
+
+    def get_board(self, db: Session, day: date) -> Dict[str, Any]:
+        """
+        The day's board from the cache, the materialised row, or, for a
+        first read or a row older than SCHEDULE_MAX_AGE_SECONDS, a rebuild
+        """
+
+        def load() -> Dict[str, Any]:
+            row = self.query(db).filter(ScheduleDay.day == day).first()
+            max_age = timedelta(seconds=settings.SCHEDULE_MAX_AGE_SECONDS)
+            if row is None or row.updated_at < datetime.now(timezone.utc) - max_age:
+                row = self.build(db, day)
+            return self._board(row)
+
+        return cache.get_or_load(self._cache_key(db, day), load, settings.CACHE_TTL_SECONDS)
+
+    def build(self, db: Session, day: date) -> ScheduleDay:
+        lanes = self._lanes(db, day)
+        row = self.query(db).filter(ScheduleDay.day == day).with_for_update().first()
+        if row is None:
+            row = ScheduleDay(tenant_id=db.info.get("tenant_id"), day=day)
+        row.lanes = lanes
+        row.updated_at = datetime.now(timezone.utc)
+        db.add(row)
+        try:
+            db.commit()
+        except IntegrityError:
+            # Another worker materialised the day first
+            db.rollback()
+            return self.query(db).filter(ScheduleDay.day == day).one()
+        return row
+
+    def materialised_days(self, db: Session, *, since: date) -> List[date]:
+        return [
+            row.day
+            for row in self.query(db).filter(ScheduleDay.day >= since).with_entities(ScheduleDay.day)
+        ]
+
+    def refresh_lanes(self, db: Session, day: date, staff_ids: Set[int]) -> None:
+        """
+        Rebuild the lanes of ``staff_ids`` on ``day`` if that day has been
+        materialised
+        """
+        row = self.query(db).filter(ScheduleDay.day == day).with_for_update().first()
+        if row is None:
+            return
+        lanes = {key: lane for key, lane in row.lanes.items() if int(key) not in staff_ids}
+        lanes.update(self._lanes(db, day, staff_ids))
+        row.lanes = lanes
+        row.updated_at = datetime.now(timezone.utc)
+        db.commit()
+        self._publish(db, row)
+
+    def drop(self, db: Session, *, since: date) -> None:
+        """
+        Discard days from ``since`` on; they are rebuilt on next read
+        """
+        days = self.materialised_days(db, since=since)
+        self.query(db).filter(ScheduleDay.day >= since).delete(synchronize_session=False)
+        db.commit()
+        cache.invalidate([self._cache_key(db, day) for day in days])
+
+    def on_mutation(
+        self, db: Session, table: str, action: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> None:
+        if table not in ("appointments", "staff", "customers", "services"):
+            return
+        session = SessionLocal()
+        try:
+            session.info["tenant_id"] = after.get("tenant_id", before.get("tenant_id"))
+            self._apply(session, table, before, after)
+        finally:
+            session.close()
+
+    def _apply(
+        self, db: Session, table: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> None:
+        today = local_day(datetime.now(timezone.utc))
+        affected: Dict[date, Set[int]] = defaultdict(set)
+        if table == "appointments":
+            for snapshot in (before, after):
+                if snapshot.get("scheduled_date"):
+                    day = local_day(datetime.fromisoformat(snapshot["scheduled_date"]))
+                    affected[day].add(snapshot["staff_id"])
+        elif table == "staff":
+            if not _changed(before, after, STAFF_FIELDS):
+                return
+            staff_id = after.get("id", before.get("id"))
+            for day in self.materialised_days(db, since=today):
+                affected[day].add(staff_id)
+        elif table == "customers":
+            if not _changed(before, after, CUSTOMER_FIELDS):
+                return
+            days = self.materialised_days(db, since=today)
+            if days:
+                start = day_bounds(min(days))[0]
+                jobs = (
+                    appointment_crud.query(db)
+                    .filter(
+                        Appointment.customer_id == after.get("id", before.get("id")),
+                        Appointment.scheduled_date >= start,
+                    )
+                    .with_entities(Appointment.scheduled_date, Appointment.staff_id)
+                )
+                for scheduled_date, staff_id in jobs:
+                    if local_day(scheduled_date) in days:
+                        affected[local_day(scheduled_date)].add(staff_id)
+        elif _changed(before, after, SERVICE_FIELDS):
+            # Services appear on most lanes; rebuilding lazily is cheaper
+            self.drop(db, since=today)
+        for day, staff_ids in affected.items():
+            self.refresh_lanes(db, day, staff_ids)
+
+
+schedule_day = CRUDScheduleDay(ScheduleDay)
+register_mutation_listener(schedule_day.on_mutation)
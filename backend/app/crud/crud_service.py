@@ -1,13 +1,31 @@
-from typing import List
+from typing import List, Optional, Sequence, Tuple
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, CountStrategy
 from app.models.service import Service
 from app.schemas.service import ServiceCreate, ServiceUpdate
 
 
 class CRUDService(CRUDBase[Service, ServiceCreate, ServiceUpdate]):
-    def get_active(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Service]:
-        return db.query(Service).filter(Service.is_active == True).offset(skip).limit(limit).all()
+    def get_active(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Service]:
+        return (
+            self.query(db, fields=fields)
+            .filter(Service.is_active == True)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def count_active(
+        self, db: Session, *, strategy: CountStrategy = CountStrategy.AUTO
+    ) -> Tuple[int, CountStrategy]:
+        return self.count(db, Service.is_active == True, strategy=strategy)
 
 
 service = CRUDService(Service)
@@ -1,16 +1,102 @@
-from typing import Optional, List
+from typing import Any, Dict, Optional, List, Sequence, Tuple, Union
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.crud.base import CRUDBase
+from app.crud.base import CRUDBase, CountStrategy, register_mutation_listener
+from app.db.base import SessionLocal, change_sequence
+from app.geo.geocode import coordinate_fields
 from app.models.staff import Staff
 from app.schemas.staff import StaffCreate, StaffUpdate
 
 
 class CRUDStaff(CRUDBase[Staff, StaffCreate, StaffUpdate]):
     def get_by_email(self, db: Session, *, email: str) -> Optional[Staff]:
-        return db.query(Staff).filter(Staff.email == email).first()
+        return self.query(db).filter(Staff.email == email).first()
 
-    def get_active(self, db: Session, *, skip: int = 0, limit: int = 100) -> List[Staff]:
-        return db.query(Staff).filter(Staff.is_active == True).offset(skip).limit(limit).all()
+    def get_active(
+        self,
+        db: Session,
+        *,
+        skip: int = 0,
+        limit: int = 100,
+        fields: Optional[Sequence[str]] = None
+    ) -> List[Staff]:
+        return (
+            self.query(db, fields=fields)
+            .filter(Staff.is_active == True)
+            .offset(skip)
+            .limit(limit)
+            .all()
+        )
+
+    def count_active(
+        self, db: Session, *, strategy: CountStrategy = CountStrategy.AUTO
+    ) -> Tuple[int, CountStrategy]:
+        return self.count(db, Staff.is_active == True, strategy=strategy)
+
+    def get_active_locations(self, db: Session) -> List[Tuple[int, float, float]]:
+        """
+        (id, latitude, longitude) of active staff with known coordinates
+        """
+        return (
+            self.query(db)
+            .filter(Staff.is_active == True, Staff.latitude.isnot(None))
+            .with_entities(Staff.id, Staff.latitude, Staff.longitude)
+            .all()
+        )
+
+    def changed_since(self, db: Session, *, xid: int) -> bool:
+        """
+        Whether transactions from ``xid`` on wrote any staff row, tombstones
+        included
+        """
+        return db.query(
+            self.query(db, include_deleted=True).filter(Staff.change_xid >= xid).exists()
+        ).scalar()
+
+    def create(self, db: Session, *, obj_in: StaffCreate) -> Staff:
+        obj_in_data = jsonable_encoder(obj_in)
+        obj_in_data.update(coordinate_fields(obj_in_data.get("zip_code")))
+        return super().create(db, obj_in=obj_in_data)
+
+    def update(
+        self,
+        db: Session,
+        *,
+        db_obj: Staff,
+        obj_in: Union[StaffUpdate, Dict[str, Any]],
+        version: Optional[int] = None
+    ) -> Staff:
+        if isinstance(obj_in, dict):
+            update_data = dict(obj_in)
+        else:
+            update_data = obj_in.dict(exclude_unset=True)
+        if "zip_code" in update_data:
+            update_data.update(coordinate_fields(update_data["zip_code"]))
+        return super().update(db, db_obj=db_obj, obj_in=update_data, version=version)
+
+    def on_mutation(
+        self, db: Session, table: str, action: str, before: Dict[str, Any], after: Dict[str, Any]
+    ) -> None:
+        # An appointment moved away changes no row the old staff member's
+        # feed version covers, so move their calendar_seq on
+        if table != "appointments" or not before or not after:
+            return
+        if before.get("staff_id") == after.get("staff_id"):
+            return
+        session = SessionLocal()
+        try:
+            session.info["tenant_id"] = after.get("tenant_id")
+            session.execute(
+                update(Staff)
+                .where(Staff.id.in_([before["staff_id"], after["staff_id"]]))
+                .values(calendar_seq=change_sequence.next_value())
+                .execution_options(synchronize_session=False)
+            )
+            session.commit()
+        finally:
+            session.close()
 
 
 staff = CRUDStaff(Staff)
+register_mutation_listener(staff.on_mutation)
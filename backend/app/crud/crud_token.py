@@ -0,0 +1,109 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.revocation import revocation_list
+from app.core.security import create_access_token, create_refresh_token, decode_refresh_token
+from app.models.token import RefreshToken, RevokedToken
+from app.models.user import User
+
+
+class RefreshTokenReused(Exception):
+    """
+    A rotated refresh token was presented again; its session is revoked
+    """
+
+
+class CRUDToken:
+    """
+    Token pairs: short-lived access JWTs plus single-use refresh tokens.
+
+    Every login starts a session (``sid``) carried by all its tokens.
+    Refreshing rotates the refresh token; presenting a rotated one again
+    means it was stolen, so the whole session is revoked. Revoking a
+    session records its ``sid`` in ``revoked_tokens``, which
+    ``get_current_user`` checks through ``revocation_list``.
+
+    Not a CRUDBase: token rows carry no tenant and must stay out of the
+    audit log.
+    """
+
+    def issue(self, db: Session, user: User, *, session_id: Optional[str] = None) -> Dict[str, str]:
+        session_id = session_id or uuid.uuid4().hex
+        jti = uuid.uuid4().hex
+        expires_at = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        db.add(RefreshToken(jti=jti, user_id=user.id, session_id=session_id, expires_at=expires_at))
+        db.commit()
+        return {
+            "access_token": create_access_token(
+                data={"sub": user.email, "jti": uuid.uuid4().hex, "sid": session_id},
+                expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+            ),
+            "refresh_token": create_refresh_token(user.email, jti, session_id, expires_at),
+            "token_type": "bearer",
+        }
+
+    def rotate(self, db: Session, refresh_token: str) -> Optional[Dict[str, str]]:
+        """
+        Exchange a refresh token for a new pair; None if it is not valid
+        """
+        payload = decode_refresh_token(refresh_token)
+        if payload is None:
+            return None
+        token = db.execute(
+            select(RefreshToken).where(RefreshToken.jti == payload["jti"]).with_for_update()
+        ).scalar_one_or_none()
+        # Expiry is enforced by the JWT itself
+        if token is None or token.revoked_at is not None:
+            db.rollback()
+            return None
+        if token.used_at is not None:
+            self.revoke_session(db, token.session_id, user_id=token.user_id)
+            raise RefreshTokenReused(token.session_id)
+        user = db.get(User, token.user_id)
+        if user is None or not user.is_active:
+            db.rollback()
+            return None
+        token.used_at = datetime.now(timezone.utc)
+        return self.issue(db, user, session_id=token.session_id)
+
+    def revoke_session(self, db: Session, session_id: str, *, user_id: Optional[int]) -> None:
+        now = datetime.now(timezone.utc)
+        db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.session_id == session_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+        # Access tokens of the session outlive its refresh tokens by at most this
+        db.add(RevokedToken(
+            token_id=session_id,
+            user_id=user_id,
+            revoked_at=now,
+            expires_at=now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        ))
+        db.commit()
+        revocation_list.add(session_id)
+
+    def revoke_user(self, db: Session, user_id: int) -> int:
+        """
+        Revoke every live session of a user; return how many there were
+        """
+        session_ids = db.execute(
+            select(RefreshToken.session_id)
+            .where(
+                RefreshToken.user_id == user_id,
+                RefreshToken.revoked_at.is_(None),
+                RefreshToken.expires_at > datetime.now(timezone.utc),
+            )
+            .distinct()
+        ).scalars().all()
+        for session_id in session_ids:
+            self.revoke_session(db, session_id, user_id=user_id)
+        return len(session_ids)
+
+
+token = CRUDToken()
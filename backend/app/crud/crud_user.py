@@ -7,12 +7,20 @@ from app.core.security import get_password_hash, verify_password
 
 
 class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
+    audit_ignored_fields = CRUDBase.audit_ignored_fields | {"hashed_password"}
+
     def get_by_email(self, db: Session, *, email: str) -> Optional[User]:
-        return db.query(User).filter(User.email == email).first()
+        return (
+            db.query(User)
+            .filter(User.email == email)
+            .execution_options(prepare=True)
+            .first()
+        )
 
     def create(self, db: Session, *, obj_in: UserCreate) -> User:
         db_obj = User(
             email=obj_in.email,
+            tenant_id=obj_in.tenant_id,
             hashed_password=get_password_hash(obj_in.password),
             full_name=obj_in.full_name,
             is_active=obj_in.is_active,
@@ -23,6 +31,21 @@ class CRUDUser(CRUDBase[User, UserCreate, UserUpdate]):
         db.refresh(db_obj)
         return db_obj
 
+    def assign_tenant(
+        self, db: Session, *, db_obj: User, tenant_id: int, is_admin: bool
+    ) -> User:
+        """
+        Move a user into a tenant; ``update`` never changes tenant_id
+        """
+        before = self._snapshot(db_obj)
+        db_obj.tenant_id = tenant_id
+        db_obj.is_admin = is_admin
+        db.commit()
+        db.refresh(db_obj)
+        self._invalidate_cache(db, db_obj)
+        self._record_change(db, db_obj, "update", before, self._snapshot(db_obj))
+        return db_obj
+
     def authenticate(self, db: Session, *, email: str, password: str) -> Optional[User]:
         user = self.get_by_email(db, email=email)
         if not user:
@@ -0,0 +1,45 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.crud.base import CRUDBase
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.waitlist import WaitlistEntryCreate, WaitlistEntryUpdate
+
+
+class CRUDWaitlistEntry(CRUDBase[WaitlistEntry, WaitlistEntryCreate, WaitlistEntryUpdate]):
+    def get_waiting(
+        self, db: Session, *, customer_id: Optional[int] = None, skip: int = 0, limit: int = 100
+    ) -> List[WaitlistEntry]:
+        query = self.query(db).filter(WaitlistEntry.status == WaitlistStatus.WAITING)
+        if customer_id is not None:
+            query = query.filter(WaitlistEntry.customer_id == customer_id)
+        return query.order_by(WaitlistEntry.id).offset(skip).limit(limit).all()
+
+    def get_index_rows(self, db: Session) -> List[Tuple]:
+        """
+        What the matching index needs of every waiting entry
+        """
+        return (
+            self.query(db)
+            .filter(WaitlistEntry.status == WaitlistStatus.WAITING)
+            .with_entities(
+                WaitlistEntry.id,
+                WaitlistEntry.customer_id,
+                WaitlistEntry.service_ids,
+                WaitlistEntry.windows,
+                WaitlistEntry.preferred_staff_id,
+                WaitlistEntry.zip_prefix,
+            )
+            .order_by(WaitlistEntry.id)
+            .all()
+        )
+
+    def change_watermark(self, db: Session) -> int:
+        return (
+            self.query(db, include_deleted=True)
+            .with_entities(func.max(WaitlistEntry.change_seq))
+            .scalar()
+        ) or 0
+
+
+waitlist_entry = CRUDWaitlistEntry(WaitlistEntry)
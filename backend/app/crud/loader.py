@@ -0,0 +1,52 @@
+from typing import Dict, Generic, Iterable, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from app.crud.base import CRUDBase, ModelType
+
+
+class Loader(Generic[ModelType]):
+    """
+    DataLoader-style batching over ``CRUDBase.get_by_ids``.
+
+    Code that needs many rows one at a time announces the ids up front with
+    ``prime``; the first ``load`` then fetches everything pending in one
+    query. Results, including misses, are memoised for the loader's life,
+    so create one per request or job.
+
+        customers = Loader(db, customer_crud)
+        customers.prime(a.customer_id for a in appointments)
+        for a in appointments:
+            customer = customers.load(a.customer_id)
+    """
+
+    def __init__(self, db: Session, crud: CRUDBase, *, batch_size: int = 1000):
+        self.db = db
+        self.crud = crud
+        self.batch_size = batch_size
+        self._cache: Dict[int, Optional[ModelType]] = {}
+        self._pending: Set[int] = set()
+
+    def prime(self, ids: Iterable[int]) -> None:
+        self._pending.update(id for id in ids if id not in self._cache)
+
+    def load(self, id: int) -> Optional[ModelType]:
+        if id not in self._cache:
+            self._pending.add(id)
+            self._dispatch()
+        return self._cache[id]
+
+    def load_many(self, ids: Iterable[int]) -> List[Optional[ModelType]]:
+        ids = list(ids)
+        self.prime(ids)
+        self._dispatch()
+        return [self._cache[id] for id in ids]
+
+    def _dispatch(self) -> None:
+        pending = sorted(self._pending)
+        self._pending.clear()
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            rows = {row.id: row for row in self.crud.get_by_ids(self.db, ids=batch)}
+            for id in batch:
+                self._cache[id] = rows.get(id)
@@ -1,13 +1,163 @@
-from sqlalchemy import create_engine
+import threading
+from collections import Counter
+from typing import Any, Dict
+from sqlalchemy import Sequence, create_engine, event, text
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ENGINE_OPTIONS = {
+    "pool_pre_ping": True,
+    "pool_size": settings.DB_POOL_SIZE,
+    "max_overflow": settings.DB_MAX_OVERFLOW,
+    "query_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+}
+
+
+class StatementStats:
+    """
+    Compiled-statement cache outcomes and prepared executions across all
+    engines, for /metrics/statements
+    """
+
+    def __init__(self):
+        self._counts: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, context: Any) -> None:
+        dialect = context.dialect
+        outcome = getattr(context, "cache_hit", None)
+        if outcome == dialect.CACHE_HIT:
+            key = "cache_hits"
+        elif outcome == dialect.CACHE_MISS:
+            key = "cache_misses"
+        else:
+            key = "uncached"
+        with self._lock:
+            self._counts[key] += 1
+            if context.execution_options.get("prepare") and _prepares(dialect):
+                self._counts["prepared"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = {key: self._counts[key] for key in ("cache_hits", "cache_misses", "uncached", "prepared")}
+        looked_up = stats["cache_hits"] + stats["cache_misses"]
+        stats["hit_ratio"] = round(stats["cache_hits"] / looked_up, 4) if looked_up else 0.0
+        caches = [
+            bind._compiled_cache
+            for bind in [engine, *_tenant_engines.values()]
+            if bind._compiled_cache is not None
+        ]
+        stats["cached_statements"] = sum(len(cache) for cache in caches)
+        stats["cache_capacity"] = sum(cache.capacity for cache in caches)
+        stats["driver"] = engine.dialect.driver
+        stats["server_side_prepare"] = _prepares(engine.dialect)
+        return stats
+
+
+statement_stats = StatementStats()
+
+
+def _prepares(dialect: Any) -> bool:
+    return dialect.driver == "psycopg" and not settings.DB_PGBOUNCER
+
+
+def database_url(url: str) -> str:
+    """
+    ``url`` with DB_DRIVER as the driver of plain postgresql:// URLs
+    """
+    parsed = make_url(url)
+    if not settings.DB_DRIVER or parsed.drivername != "postgresql":
+        return url
+    return parsed.set(drivername=f"postgresql+{settings.DB_DRIVER}").render_as_string(hide_password=False)
+
+
+def create_database_engine(url: str, **options: Any) -> Engine:
+    """
+    Engine with the configured pool and statement cache. On psycopg,
+    queries run with ``execution_options(prepare=True)`` are prepared on
+    their connection at first use; others only after DB_PREPARE_THRESHOLD
+    runs. With DB_PGBOUNCER nothing is prepared, since a transaction-pooled
+    server connection may not hold the statement next time.
+    """
+    bind = create_engine(database_url(url), **{**ENGINE_OPTIONS, **options})
+
+    @event.listens_for(bind, "after_cursor_execute")
+    def count_statement(conn, cursor, statement, parameters, context, executemany):
+        statement_stats.observe(context)
+
+    if bind.dialect.driver == "psycopg":
+
+        @event.listens_for(bind, "connect")
+        def configure_preparation(dbapi_connection, connection_record):
+            dbapi_connection.prepare_threshold = (
+                None if settings.DB_PGBOUNCER else settings.DB_PREPARE_THRESHOLD
+            )
+            dbapi_connection.prepared_max = settings.DB_PREPARED_MAX
+
+        if _prepares(bind.dialect):
+
+            @event.listens_for(bind, "do_execute")
+            def execute_prepared(cursor, statement, parameters, context):
+                if context.execution_options.get("prepare"):
+                    cursor.execute(statement, parameters, prepare=True)
+                    return True
+                return None
+
+    return bind
+
+
+engine = create_database_engine(settings.DATABASE_URL)
 
 Base = declarative_base()
 
+# Monotonic change counter shared by all domain tables; drives delta sync
+change_sequence = Sequence("change_seq", metadata=Base.metadata)
+
+# Transaction that last wrote a row. Once every transaction older than some
+# id has finished, no late commit can add a row below it: delta sync cursors
+# are such ids
+current_transaction_id = text("pg_current_xact_id()::text::bigint")
+
+# Tables that always live on the default engine, whatever the tenant
+SHARED_TABLES = {"tenants", "users", "refresh_tokens", "revoked_tokens"}
+
+_tenant_engines: Dict[int, Engine] = {}
+
+
+def get_tenant_engine(tenant_id: int) -> Engine:
+    """
+    Engine holding the tenant's data: its dedicated database if configured,
+    otherwise the shared one
+    """
+    url = settings.TENANT_DATABASE_URLS.get(tenant_id)
+    if url is None:
+        return engine
+    if tenant_id not in _tenant_engines:
+        _tenant_engines[tenant_id] = create_database_engine(url)
+    return _tenant_engines[tenant_id]
+
+
+class TenantRoutingSession(Session):
+    """
+    Session that sends queries to the engine of the tenant set in
+    ``session.info["tenant_id"]`` (see ``app.api.deps.get_current_user``)
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        tenant_id = self.info.get("tenant_id")
+        if tenant_id is None:
+            return engine
+        if mapper is not None and mapper.local_table.name in SHARED_TABLES:
+            return engine
+        return get_tenant_engine(tenant_id)
+
+
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, bind=engine, class_=TenantRoutingSession
+)
+
 
 def get_db():
     db = SessionLocal()
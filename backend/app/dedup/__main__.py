@@ -0,0 +1,52 @@
+"""
+Find duplicate customers of a tenant, and optionally merge them:
+
+    python -m app.dedup --tenant-id 1 --output duplicates.jsonl
+    python -m app.dedup --tenant-id 1 --merge
+"""
+import argparse
+import json
+import logging
+
+from app.db.base import SessionLocal
+from app.dedup.engine import find_duplicates, load_records
+from app.dedup.merge import merge_clusters
+
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="De-duplicate customers")
+    parser.add_argument("--tenant-id", type=int, required=True)
+    parser.add_argument("--threshold", type=float)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--output", help="Write the clusters found as JSON lines")
+    parser.add_argument("--merge", action="store_true", help="Merge every cluster found")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    db = SessionLocal()
+    db.info["tenant_id"] = args.tenant_id
+    try:
+        clusters = find_duplicates(
+            load_records(db, tenant_id=args.tenant_id),
+            threshold=args.threshold,
+            workers=args.workers,
+        )
+        db.rollback()
+        if args.output:
+            with open(args.output, "w") as output:
+                for cluster in clusters:
+                    output.write(json.dumps(cluster._asdict()) + "\n")
+        if args.merge:
+            moved = merge_clusters(db, clusters)
+            logger.info(
+                "Merged %s duplicates, moving %s appointments",
+                sum(len(cluster.duplicate_ids) for cluster in clusters), moved,
+            )
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
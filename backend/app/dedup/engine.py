@@ -0,0 +1,249 @@
+import logging
+import multiprocessing
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.dedup.normalize import normalize_address, normalize_email, normalize_name, normalize_phone
+from app.models.customer import Customer
+
+logger = logging.getLogger(__name__)
+
+# Pairs whose names differ more than this are never merged, whatever else
+# they share: household members have the same phone and address
+NAME_GATE = 0.85
+WEIGHTS = {"name": 0.3, "phone": 0.3, "address": 0.25, "email": 0.15}
+
+
+class CustomerRecord(NamedTuple):
+    id: int
+    name: str
+    phone: str
+    address: str
+    email: str
+    zip_code: str
+
+
+class DuplicateCluster(NamedTuple):
+    survivor_id: int  # Oldest record
+    duplicate_ids: List[int]
+    score: float  # Weakest match holding the cluster together
+
+
+def to_record(
+    id: int,
+    first_name: Optional[str],
+    last_name: Optional[str],
+    email: Optional[str],
+    phone: Optional[str],
+    address: Optional[str],
+    zip_code: Optional[str],
+) -> CustomerRecord:
+    return CustomerRecord(
+        id,
+        normalize_name(first_name, last_name),
+        normalize_phone(phone),
+        normalize_address(address),
+        normalize_email(email),
+        (zip_code or "").strip()[:5],
+    )
+
+
+def blocking_keys(record: CustomerRecord) -> Set[str]:
+    """
+    Keys a likely duplicate shares with the record; only records with a
+    key in common are ever compared
+    """
+    keys = set()
+    if len(record.phone) >= 7:
+        keys.add("p:" + record.phone[-7:])
+    if record.email:
+        keys.add("e:" + record.email.split("@", 1)[0])
+    street = record.address.split()
+    if len(street) > 1 and street[0].isdigit():
+        keys.add(f"a:{record.zip_code}:{street[0]}:{street[1]}")
+    names = record.name.split()
+    if names:
+        keys.add(f"n:{record.zip_code}:{names[-1][:4]}:{names[0][:1]}")
+    return keys
+
+
+def _ratio(a: str, b: str, floor: float = 0.0) -> float:
+    """
+    SequenceMatcher ratio, or 0 as soon as its cheap upper bounds fall
+    below ``floor``
+    """
+    if a == b:
+        return 1.0
+    matcher = SequenceMatcher(None, a, b, autojunk=False)
+    if floor and (matcher.real_quick_ratio() < floor or matcher.quick_ratio() < floor):
+        return 0.0
+    return matcher.ratio()
+
+
+def score(a: CustomerRecord, b: CustomerRecord) -> float:
+    """
+    Weighted similarity in [0, 1] over the fields both records have
+    """
+    name = _ratio(
+        " ".join(sorted(a.name.split())), " ".join(sorted(b.name.split())), NAME_GATE
+    )
+    if name < NAME_GATE:
+        return 0.0
+    parts = {"name": name}
+    if a.phone and b.phone:
+        parts["phone"] = 1.0 if a.phone == b.phone else 0.8 if a.phone[-7:] == b.phone[-7:] else 0.0
+    if a.address and b.address:
+        parts["address"] = _ratio(a.address, b.address)
+    if a.email and b.email:
+        parts["email"] = _ratio(a.email, b.email)
+    weight = sum(WEIGHTS[field] for field in parts)
+    return sum(WEIGHTS[field] * value for field, value in parts.items()) / weight
+
+
+def score_blocks(
+    blocks: List[Tuple[str, List[CustomerRecord]]],
+    oversized: Set[str],
+    threshold: float,
+    window: int,
+) -> List[Tuple[int, int, float]]:
+    """
+    Matching pairs within ``blocks``. Each pair is scored once, in the
+    first block of normal size the two records share; oversized blocks
+    only compare records within ``window`` of each other in name order.
+    """
+    matches = []
+    for key, records in blocks:
+        keys = {record.id: blocking_keys(record) - oversized for record in records}
+        if key in oversized:
+            records = sorted(records, key=lambda record: record.name)
+        for i, a in enumerate(records):
+            end = i + 1 + window if key in oversized else len(records)
+            for b in records[i + 1:end]:
+                shared = keys[a.id] & keys[b.id]
+                if (min(shared) if shared else key) != key:
+                    continue
+                similarity = score(a, b)
+                if similarity >= threshold:
+                    matches.append((a.id, b.id, similarity))
+    return matches
+
+
+def _score_task(args: Tuple[List[Tuple[str, List[CustomerRecord]]], Set[str], float, int]):
+    return score_blocks(*args)
+
+
+def _tasks(
+    blocks: Dict[str, List[CustomerRecord]], oversized: Set[str], window: int
+) -> Iterator[List[Tuple[str, List[CustomerRecord]]]]:
+    task, comparisons = [], 0
+    for key, records in blocks.items():
+        n = len(records)
+        task.append((key, records))
+        comparisons += n * min(window, n) if key in oversized else n * (n - 1) // 2
+        if comparisons >= settings.DEDUP_TASK_COMPARISONS:
+            yield task
+            task, comparisons = [], 0
+    if task:
+        yield task
+
+
+def _clusters(pairs: Iterable[Tuple[int, int, float]]) -> List[DuplicateCluster]:
+    parent: Dict[int, int] = {}
+
+    def find(id: int) -> int:
+        root = id
+        while parent.setdefault(root, root) != root:
+            root = parent[root]
+        while parent[id] != root:
+            parent[id], id = root, parent[id]
+        return root
+
+    edges = []
+    for a, b, similarity in pairs:
+        edges.append((a, similarity))
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            # The lowest id becomes the root, and so the survivor
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    members: Dict[int, List[int]] = defaultdict(list)
+    for id in parent:
+        members[find(id)].append(id)
+    weakest: Dict[int, float] = {}
+    for id, similarity in edges:
+        root = find(id)
+        weakest[root] = min(weakest.get(root, 1.0), similarity)
+    return [
+        DuplicateCluster(root, sorted(id for id in ids if id != root), round(weakest[root], 4))
+        for root, ids in sorted(members.items())
+        if len(ids) > 1
+    ]
+
+
+def find_duplicates(
+    records: Iterable[CustomerRecord],
+    *,
+    threshold: Optional[float] = None,
+    workers: Optional[int] = None,
+) -> List[DuplicateCluster]:
+    """
+    Clusters of records describing the same customer.
+
+    Records are grouped by blocking keys (phone, email user, street number,
+    name and zip), so comparisons grow with block sizes rather than n².
+    Blocks are scored in a process pool; matching pairs are joined
+    transitively into clusters.
+    """
+    threshold = settings.DEDUP_MATCH_THRESHOLD if threshold is None else threshold
+    window = settings.DEDUP_WINDOW
+    started = time.perf_counter()
+    blocks: Dict[str, List[CustomerRecord]] = defaultdict(list)
+    count = 0
+    for record in records:
+        count += 1
+        for key in blocking_keys(record):
+            blocks[key].append(record)
+    blocks = {key: members for key, members in blocks.items() if len(members) > 1}
+    oversized = {key for key, members in blocks.items() if len(members) > settings.DEDUP_MAX_BLOCK_SIZE}
+    tasks = [(task, oversized, threshold, window) for task in _tasks(blocks, oversized, window)]
+
+    workers = workers or settings.DEDUP_WORKERS
+    if workers == 1 or len(tasks) <= 1:
+        results = map(_score_task, tasks)
+        pairs = [pair for result in results for pair in result]
+    else:
+        # Spawned rather than forked so workers never inherit pooled DB connections
+        with ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        ) as pool:
+            pairs = [pair for result in pool.map(_score_task, tasks) for pair in result]
+    clusters = _clusters(pairs)
+    logger.info(
+        "Deduplicated %s customers in %.1fs: %s blocks (%s oversized), %s matching pairs, %s clusters",
+        count, time.perf_counter() - started, len(blocks), len(oversized), len(pairs), len(clusters),
+    )
+    return clusters
+
+
+def load_records(db: Session, *, tenant_id: int) -> Iterator[CustomerRecord]:
+    """
+    Normalised records of the tenant's live customers, streamed
+    """
+    rows = db.execute(
+        select(
+            Customer.id, Customer.first_name, Customer.last_name, Customer.email,
+            Customer.phone, Customer.address, Customer.zip_code,
+        )
+        .where(Customer.tenant_id == tenant_id, Customer.deleted_at.is_(None))
+        .order_by(Customer.id)
+        .execution_options(yield_per=10000)
+    )
+    for row in rows:
+        yield to_record(*row)
@@ -0,0 +1,132 @@
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.audit import audit_log
+from app.core.cache import cache, stale_keys
+from app.core.config import settings
+from app.core.singleflight import single_flight
+from app.crud.crud_schedule import local_day, schedule_day
+from app.db.base import SessionLocal
+from app.dedup.engine import DuplicateCluster
+from app.models.appointment import Appointment
+from app.models.customer import Customer
+
+
+def merge_customers(db: Session, survivors: Dict[int, int]) -> int:
+    """
+    Fold duplicate customers into their survivors (``{duplicate_id:
+    survivor_id}``) and return the number of appointments moved.
+
+    Appointments are re-pointed and duplicates tombstoned with set-based
+    UPDATEs of DEDUP_MERGE_BATCH_SIZE customers each, scoped to the
+    survivor's tenant; both bump ``version`` and ``change_seq`` so ETags and
+    delta sync see the change. Invoices keep the customer they were issued
+    to. Raises ValueError unless each duplicate and its survivor belong to
+    the same tenant, and to the session's if it has one.
+    """
+    if set(survivors) & set(survivors.values()):
+        raise ValueError("A customer cannot be both merged and kept")
+    owners = select(Customer.id, Customer.tenant_id).where(
+        Customer.id.in_(set(survivors) | set(survivors.values()))
+    )
+    if db.info.get("tenant_id") is not None:
+        owners = owners.where(Customer.tenant_id == db.info["tenant_id"])
+    tenant_of = dict(db.execute(owners).all())
+    by_tenant: Dict[int, List[Tuple[int, int]]] = {}
+    for duplicate_id, survivor_id in sorted(survivors.items()):
+        tenant_id = tenant_of.get(survivor_id)
+        if tenant_id is None or tenant_of.get(duplicate_id) != tenant_id:
+            raise ValueError(
+                f"Customer {duplicate_id} cannot be merged into customer {survivor_id}"
+            )
+        by_tenant.setdefault(tenant_id, []).append((duplicate_id, survivor_id))
+
+    moved = 0
+    for tenant_id, items in sorted(by_tenant.items()):
+        for start in range(0, len(items), settings.DEDUP_MERGE_BATCH_SIZE):
+            batch = dict(items[start:start + settings.DEDUP_MERGE_BATCH_SIZE])
+            moved += _merge_batch(db, tenant_id, batch)
+    return moved
+
+
+def _merge_batch(db: Session, tenant_id: int, batch: Dict[int, int]) -> int:
+    appointment_scope = [
+        Appointment.tenant_id == tenant_id, Appointment.customer_id.in_(list(batch))
+    ]
+    customer_scope = [
+        Customer.tenant_id == tenant_id,
+        Customer.id.in_(list(batch)),
+        Customer.deleted_at.is_(None),
+    ]
+
+    appointments = db.execute(
+        select(Appointment.id, Appointment.customer_id, Appointment.scheduled_date)
+        .where(*appointment_scope)
+        .with_for_update()
+    ).all()
+    db.execute(
+        update(Appointment)
+        .where(*appointment_scope)
+        .values(
+            customer_id=case(batch, value=Appointment.customer_id),
+            version=Appointment.version + 1,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    merged = db.execute(
+        update(Customer)
+        .where(*customer_scope)
+        .values(deleted_at=func.now(), version=Customer.version + 1)
+        .returning(Customer.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    _after_merge(db, tenant_id, batch, merged, appointments)
+    return len(appointments)
+
+
+def _after_merge(
+    db: Session, tenant_id: int, batch: Dict[int, int], merged: List, appointments: List
+) -> None:
+    # The set-based writes bypass CRUDBase, so do its bookkeeping here
+    user_id = db.info.get("user_id")
+    for customer_id in merged:
+        audit_log.record(
+            tenant_id=tenant_id, entity_type="customers", entity_id=customer_id,
+            action="merge", user_id=user_id,
+            changes={"merged_into": [None, batch[customer_id]]},
+        )
+    for id, customer_id, _ in appointments:
+        audit_log.record(
+            tenant_id=tenant_id, entity_type="appointments", entity_id=id,
+            action="update", user_id=user_id,
+            changes={"customer_id": [customer_id, batch[customer_id]]},
+        )
+    cache.invalidate(
+        stale_keys("customers", tenant_id, merged)
+        + stale_keys("appointments", tenant_id, [row[0] for row in appointments])
+    )
+    single_flight.invalidate("appointments", tenant_id)
+    if appointments:
+        # Boards show customer names; rebuild the affected days on next read.
+        # A session of the batch's tenant, as an admin's would drop every
+        # tenant's days.
+        session = SessionLocal()
+        try:
+            session.info["tenant_id"] = tenant_id
+            schedule_day.drop(session, since=min(local_day(row[2]) for row in appointments))
+        finally:
+            session.close()
+
+
+def merge_clusters(db: Session, clusters: Iterable[DuplicateCluster]) -> int:
+    return merge_customers(
+        db,
+        {
+            duplicate_id: cluster.survivor_id
+            for cluster in clusters
+            for duplicate_id in cluster.duplicate_ids
+        },
+    )
@@ -0,0 +1,82 @@
+import re
+import unicodedata
+from typing import Optional
+
+# USPS street suffix and unit abbreviations, plus directionals
+ADDRESS_ABBREVIATIONS = {
+    "street": "st", "str": "st", "avenue": "ave", "av": "ave", "road": "rd",
+    "drive": "dr", "lane": "ln", "boulevard": "blvd", "court": "ct", "place": "pl",
+    "terrace": "ter", "circle": "cir", "highway": "hwy", "parkway": "pkwy",
+    "square": "sq", "trail": "trl", "way": "wy", "apartment": "apt", "unit": "apt",
+    "suite": "ste", "floor": "fl", "north": "n", "south": "s", "east": "e", "west": "w",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+
+NICKNAMES = {
+    "bob": "robert", "rob": "robert", "bobby": "robert", "bill": "william",
+    "will": "william", "billy": "william", "liz": "elizabeth", "beth": "elizabeth",
+    "jim": "james", "jimmy": "james", "mike": "michael", "kate": "katherine",
+    "katie": "katherine", "kathy": "katherine", "tom": "thomas", "dave": "david",
+    "chris": "christopher", "jen": "jennifer", "jenny": "jennifer", "sue": "susan",
+    "dan": "daniel", "danny": "daniel", "joe": "joseph", "tony": "anthony",
+    "steve": "steven", "stephen": "steven", "matt": "matthew", "nick": "nicholas",
+    "alex": "alexander", "sam": "samuel", "ben": "benjamin", "pat": "patricia",
+    "peggy": "margaret", "maggie": "margaret", "meg": "margaret", "rick": "richard",
+    "dick": "richard", "rich": "richard", "ed": "edward", "eddie": "edward",
+    "andy": "andrew", "greg": "gregory", "jeff": "jeffrey", "jon": "jonathan",
+    "larry": "lawrence", "ron": "ronald", "tim": "timothy", "vicky": "victoria",
+}
+
+_non_word = re.compile(r"[^a-z0-9# ]+")
+_extension = re.compile(r"(?:x|ext\.?|extension)\s*\d+\s*$", re.IGNORECASE)
+
+
+def _ascii(value: str) -> str:
+    return unicodedata.normalize("NFKD", value).encode("ascii", "ignore").decode().lower()
+
+
+def normalize_phone(phone: Optional[str]) -> str:
+    """
+    The 10 national digits of a US number, whatever its formatting;
+    extensions are dropped. Anything else comes back as bare digits.
+    """
+    if not phone:
+        return ""
+    digits = re.sub(r"\D", "", _extension.sub("", phone))
+    if len(digits) == 11 and digits.startswith("1"):
+        digits = digits[1:]
+    return digits
+
+
+def normalize_name(first_name: Optional[str], last_name: Optional[str]) -> str:
+    """
+    Lower-case ASCII "first last" with nicknames expanded, so "Bob O'Neil"
+    and "Robert ONeil" agree
+    """
+    tokens = _non_word.sub("", _ascii(f"{first_name or ''} {last_name or ''}")).split()
+    return " ".join(NICKNAMES.get(token, token) for token in tokens if token != "#")
+
+
+def normalize_address(address: Optional[str]) -> str:
+    """
+    Lower-case street address with punctuation removed and suffixes,
+    directionals and unit designators abbreviated
+    """
+    if not address:
+        return ""
+    text = _non_word.sub(" ", _ascii(address).replace("#", " apt "))
+    return " ".join(ADDRESS_ABBREVIATIONS.get(token, token) for token in text.split())
+
+
+def normalize_email(email: Optional[str]) -> str:
+    """
+    Lower-cased address without a +tag; dots are dropped for Gmail, which
+    ignores them
+    """
+    if not email or "@" not in email:
+        return ""
+    local, domain = email.strip().lower().rsplit("@", 1)
+    local = local.split("+", 1)[0]
+    if domain in ("gmail.com", "googlemail.com"):
+        local, domain = local.replace(".", ""), "gmail.com"
+    return f"{local}@{domain}"
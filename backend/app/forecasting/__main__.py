@@ -0,0 +1,22 @@
+"""
+Nightly forecast rebuild, e.g. from cron:
+
+    python -m app.forecasting            # all active tenants
+    python -m app.forecasting --tenant-id 1
+"""
+import argparse
+import logging
+
+from app.forecasting.job import run_nightly
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild demand forecasts")
+    parser.add_argument("--tenant-id", type=int)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    run_nightly(args.tenant_id)
+
+
+if __name__ == "__main__":
+    main()
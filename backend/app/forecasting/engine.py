@@ -0,0 +1,78 @@
+import math
+from datetime import date
+from typing import Any, Dict, List
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 3600
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+
+
+def weekly_profile(
+    service_index: np.ndarray,
+    starts: np.ndarray,
+    *,
+    n_services: int,
+    origin: float,
+    n_weeks: int,
+    decay: float,
+) -> np.ndarray:
+    """
+    Expected appointments per (weekday, hour, service) as a (7, 24, n_services)
+    array: an exponentially weighted average over ``n_weeks`` of history
+    starting at ``origin`` (a Monday 00:00 UTC, epoch seconds).
+    """
+    offset = starts - origin
+    week = (offset // SECONDS_PER_WEEK).astype(np.int64)
+    keep = (week >= 0) & (week < n_weeks)
+    offset, week, service_index = offset[keep], week[keep], service_index[keep]
+
+    weekday = ((offset % SECONDS_PER_WEEK) // SECONDS_PER_DAY).astype(np.int64)
+    hour = ((offset % SECONDS_PER_DAY) // 3600).astype(np.int64)
+    # Most recent week weighs 1, older weeks decay geometrically
+    week_weights = decay ** (n_weeks - 1 - np.arange(n_weeks))
+    cells = (weekday * 24 + hour) * n_services + service_index
+    profile = np.bincount(
+        cells, weights=week_weights[week], minlength=7 * 24 * n_services
+    )
+    return (profile / week_weights.sum()).reshape(7, 24, n_services)
+
+
+def forecast_days(
+    profile: np.ndarray,
+    service_ids: List[int],
+    duration_minutes: np.ndarray,
+    days: List[date],
+    *,
+    capacity_hours: float,
+    staff_hours_per_day: float,
+) -> List[Dict[str, Any]]:
+    """
+    Per-day demand and labour hours from a weekly profile, compared against
+    the day's staff capacity
+    """
+    service_hours = duration_minutes / 60.0
+    result = []
+    for day in days:
+        hourly = profile[day.weekday()]  # (24, n_services)
+        appointments = hourly.sum(axis=0)
+        labour = appointments * service_hours
+        labour_hours = float(labour.sum())
+        result.append({
+            "date": day.isoformat(),
+            "appointments": round(float(appointments.sum()), 2),
+            "labour_hours": round(labour_hours, 2),
+            "capacity_hours": capacity_hours,
+            "utilisation": round(labour_hours / capacity_hours, 3) if capacity_hours else None,
+            "staff_needed": math.ceil(labour_hours / staff_hours_per_day),
+            "services": [
+                {
+                    "service_id": service_id,
+                    "appointments": round(float(appointments[i]), 2),
+                    "labour_hours": round(float(labour[i]), 2),
+                    "hourly": np.round(hourly[:, i], 3).tolist(),
+                }
+                for i, service_id in enumerate(service_ids)
+                if appointments[i] > 0
+            ],
+        })
+    return result
@@ -0,0 +1,127 @@
+import logging
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import Float, cast, extract, func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.forecasting.engine import SECONDS_PER_WEEK, forecast_days, weekly_profile
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.forecast import DemandForecast
+from app.models.service import Service
+from app.models.staff import Staff
+from app.models.tenant import Tenant
+from app.payroll.engine import week_origin
+
+logger = logging.getLogger(__name__)
+
+
+def build_forecast(
+    db: Session, *, tenant_id: int, start_date: Optional[date] = None
+) -> DemandForecast:
+    """
+    Fit weekly demand profiles on the tenant's appointment history and store
+    the forecast for the next FORECAST_HORIZON_DAYS days
+    """
+    started = time.perf_counter()
+    start_date = start_date or datetime.now(timezone.utc).date()
+    n_weeks = settings.FORECAST_HISTORY_WEEKS
+    origin = week_origin(
+        datetime.combine(start_date, datetime.min.time(), timezone.utc)
+    ) - n_weeks * SECONDS_PER_WEEK
+
+    services = db.execute(
+        select(Service.id, Service.duration_minutes)
+        .where(Service.tenant_id == tenant_id, Service.deleted_at.is_(None))
+        .order_by(Service.id)
+    ).all()
+    service_ids = np.array([row[0] for row in services], dtype=np.int64)
+
+    history = db.execute(
+        select(
+            Appointment.service_id,
+            cast(extract("epoch", Appointment.scheduled_date), Float),
+        ).where(
+            Appointment.tenant_id == tenant_id,
+            Appointment.scheduled_date >= datetime.fromtimestamp(origin, timezone.utc),
+            Appointment.status != AppointmentStatus.CANCELLED,
+            Appointment.deleted_at.is_(None),
+        )
+    ).all()
+    appointment_service_ids = np.array([row[0] for row in history], dtype=np.int64)
+    starts = np.array([row[1] for row in history], dtype=np.float64)
+
+    # Map service ids onto profile columns, dropping retired services
+    service_index = np.searchsorted(service_ids, appointment_service_ids)
+    known = service_index < len(service_ids)
+    known[known] = service_ids[service_index[known]] == appointment_service_ids[known]
+    profile = weekly_profile(
+        service_index[known],
+        starts[known],
+        n_services=len(service_ids),
+        origin=origin,
+        n_weeks=n_weeks,
+        decay=settings.FORECAST_WEEKLY_DECAY,
+    )
+
+    active_staff = db.execute(
+        select(func.count(Staff.id)).where(
+            Staff.tenant_id == tenant_id,
+            Staff.is_active == True,
+            Staff.deleted_at.is_(None),
+        )
+    ).scalar()
+    days = forecast_days(
+        profile,
+        service_ids.tolist(),
+        np.array([row[1] for row in services], dtype=np.float64),
+        [start_date + timedelta(days=i) for i in range(settings.FORECAST_HORIZON_DAYS)],
+        capacity_hours=active_staff * settings.STAFF_HOURS_PER_DAY,
+        staff_hours_per_day=settings.STAFF_HOURS_PER_DAY,
+    )
+
+    forecast = DemandForecast(
+        tenant_id=tenant_id,
+        start_date=start_date,
+        history_weeks=n_weeks,
+        active_staff=active_staff,
+        days=days,
+    )
+    db.add(forecast)
+    db.commit()
+    db.refresh(forecast)
+    logger.info(
+        "Forecast for tenant %s: %s appointments of history in %.2fs",
+        tenant_id, len(history), time.perf_counter() - started,
+    )
+    return forecast
+
+
+def run_nightly(tenant_id: Optional[int] = None) -> None:
+    """
+    Rebuild forecasts for one tenant or all active tenants
+    """
+    db = SessionLocal()
+    try:
+        if tenant_id is None:
+            tenant_ids = db.execute(
+                select(Tenant.id).where(Tenant.is_active == True).order_by(Tenant.id)
+            ).scalars().all()
+        else:
+            tenant_ids = [tenant_id]
+    finally:
+        db.close()
+
+    for tenant_id in tenant_ids:
+        db = SessionLocal()
+        db.info["tenant_id"] = tenant_id
+        try:
+            build_forecast(db, tenant_id=tenant_id)
+        except Exception:
+            logger.exception("Forecast for tenant %s failed", tenant_id)
+        finally:
+            db.close()
@@ -0,0 +1,56 @@
+"""
+Fill in coordinates for customers and staff saved before geocoding existed:
+
+    python -m app.geo
+"""
+import logging
+
+from sqlalchemy import update
+
+from app.db.base import SessionLocal
+from app.geo.geocode import zip_centroid
+from app.models.customer import Customer
+from app.models.staff import Staff
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 1000
+
+
+def backfill(model) -> int:
+    db = SessionLocal()
+    updated = 0
+    last_id = 0
+    try:
+        while True:
+            rows = (
+                db.query(model.id, model.zip_code)
+                .filter(model.latitude.is_(None), model.id > last_id)
+                .order_by(model.id)
+                .limit(BATCH_SIZE)
+                .all()
+            )
+            if not rows:
+                return updated
+            last_id = rows[-1][0]
+            values = []
+            for row_id, zip_code in rows:
+                centroid = zip_centroid(zip_code)
+                if centroid is not None:
+                    values.append({"id": row_id, "latitude": centroid[0], "longitude": centroid[1]})
+            if values:
+                db.execute(update(model), values)
+                db.commit()
+                updated += len(values)
+    finally:
+        db.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    for model in (Customer, Staff):
+        logger.info("Geocoded %s %s rows", backfill(model), model.__tablename__)
+
+
+if __name__ == "__main__":
+    main()
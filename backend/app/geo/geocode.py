@@ -0,0 +1,30 @@
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+import zipcodes
+
+
+@lru_cache(maxsize=1)
+def _zip_centroids() -> Dict[str, Tuple[float, float]]:
+    # Offline US zip centroid table shipped with the zipcodes package
+    return {
+        row["zip_code"]: (float(row["lat"]), float(row["long"]))
+        for row in zipcodes.list_all()
+        if row["lat"] and row["long"]
+    }
+
+
+def zip_centroid(zip_code: Optional[str]) -> Optional[Tuple[float, float]]:
+    """
+    (latitude, longitude) of a US zip code, accepting ZIP+4, or None if unknown
+    """
+    if not zip_code:
+        return None
+    return _zip_centroids().get(zip_code.strip()[:5])
+
+
+def coordinate_fields(zip_code: Optional[str]) -> Dict[str, Optional[float]]:
+    centroid = zip_centroid(zip_code)
+    if centroid is None:
+        return {"latitude": None, "longitude": None}
+    return {"latitude": centroid[0], "longitude": centroid[1]}
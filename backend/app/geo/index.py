@@ -0,0 +1,148 @@
+import math
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    lat1, lon1 = math.radians(lat), math.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+class GridIndex:
+    """
+    Points bucketed into a uniform lat/lon grid. Nearest-neighbour queries
+    scan rings of cells outwards from the query point, so cost depends on
+    local density rather than on the total number of points.
+    """
+
+    def __init__(
+        self, ids: np.ndarray, lats: np.ndarray, lons: np.ndarray, *, cell_degrees: float = 0.25
+    ):
+        self.ids = ids
+        self.lats = lats
+        self.lons = lons
+        self.cell_degrees = cell_degrees
+        self.rows = np.array(self._cell(lats), dtype=np.int64)
+        self.cols = np.array(self._cell(lons), dtype=np.int64)
+        cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        for i, cell in enumerate(zip(self.rows.tolist(), self.cols.tolist())):
+            cells[cell].append(i)
+        self.cells = {cell: np.array(members) for cell, members in cells.items()}
+        if self.cells:
+            rows = [cell[0] for cell in self.cells]
+            cols = [cell[1] for cell in self.cells]
+            self.extent = (min(rows), max(rows), min(cols), max(cols))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _cell(self, degrees):
+        return np.floor(np.asarray(degrees) / self.cell_degrees).astype(np.int64).tolist()
+
+    def _ring(self, row: int, col: int, radius: int) -> Iterator[Tuple[int, int]]:
+        if radius == 0:
+            yield row, col
+            return
+        for c in range(col - radius, col + radius + 1):
+            yield row - radius, c
+            yield row + radius, c
+        for r in range(row - radius + 1, row + radius):
+            yield r, col - radius
+            yield r, col + radius
+
+    def nearest(self, lat: float, lon: float) -> Iterator[Tuple[int, float]]:
+        """
+        Yield (id, distance in km) for every point, closest first
+        """
+        if not self.cells:
+            return
+        row, col = self._cell(lat), self._cell(lon)
+        min_row, max_row, min_col, max_col = self.extent
+        max_radius = max(row - min_row, max_row - row, col - min_col, max_col - col, 0)
+
+        pending_ids = np.empty(0, dtype=self.ids.dtype)
+        pending_dist = np.empty(0)
+        for radius in range(max_radius + 1):
+            if (2 * radius + 1) ** 2 > 4 * len(self.cells):
+                # Sparse surroundings: probing empty cells now costs more than
+                # scanning every point not reached yet
+                index = np.flatnonzero(
+                    np.maximum(np.abs(self.rows - row), np.abs(self.cols - col)) >= radius
+                )
+                pending_ids = np.concatenate([pending_ids, self.ids[index]])
+                pending_dist = np.concatenate(
+                    [pending_dist, haversine_km(lat, lon, self.lats[index], self.lons[index])]
+                )
+                order = np.argsort(pending_dist, kind="stable")
+                for staff_id, distance in zip(pending_ids[order], pending_dist[order]):
+                    yield int(staff_id), float(distance)
+                return
+            members = [
+                self.cells[cell] for cell in self._ring(row, col, radius) if cell in self.cells
+            ]
+            if members:
+                index = np.concatenate(members)
+                pending_ids = np.concatenate([pending_ids, self.ids[index]])
+                pending_dist = np.concatenate(
+                    [pending_dist, haversine_km(lat, lon, self.lats[index], self.lons[index])]
+                )
+            # Anything in later rings is at least this far away
+            edge_lat = min(abs(lat) + (radius + 1) * self.cell_degrees, 89.0)
+            bound = radius * self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(edge_lat))
+            if radius == max_radius:
+                bound = math.inf
+            ready = pending_dist <= bound
+            if ready.any():
+                order = np.argsort(pending_dist[ready], kind="stable")
+                for staff_id, distance in zip(pending_ids[ready][order], pending_dist[ready][order]):
+                    yield int(staff_id), float(distance)
+                pending_ids, pending_dist = pending_ids[~ready], pending_dist[~ready]
+
+
+class StaffLocator:
+    """
+    Per-tenant grid indexes of active staff, each kept with the change
+    horizon read before its rows and rebuilt once transactions from that
+    horizon on have written staff. A max(change_seq) watermark would miss a
+    write that drew a lower sequence but committed after the build.
+    """
+
+    def __init__(self):
+        self._indexes: Dict[int, Tuple[int, GridIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(
+        self,
+        tenant_id: int,
+        horizon: Callable[[], int],
+        changed_since: Callable[[int], bool],
+        load,
+    ) -> GridIndex:
+        with self._lock:
+            cached = self._indexes.get(tenant_id)
+        if cached is not None and not changed_since(cached[0]):
+            return cached[1]
+        built_at = horizon()
+        rows = load()
+        index = GridIndex(
+            np.array([row[0] for row in rows], dtype=np.int64),
+            np.array([row[1] for row in rows], dtype=np.float64),
+            np.array([row[2] for row in rows], dtype=np.float64),
+        )
+        with self._lock:
+            self._indexes[tenant_id] = (built_at, index)
+        return index
+
+
+staff_locator = StaffLocator()
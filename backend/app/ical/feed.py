@@ -0,0 +1,126 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.customer import Customer
+from app.models.service import Service
+
+PRODID = "-//CleanSweepPro//Staff Schedule//EN"
+
+
+class RenderedFeed(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+def _escape(value: str) -> str:
+    return (
+        value.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\r\n", "\\n")
+        .replace("\n", "\\n")
+    )
+
+
+def _fold(line: str) -> str:
+    # RFC 5545 3.1: lines longer than 75 octets continue with a leading space
+    encoded = line.encode("utf-8")
+    if len(encoded) <= 75:
+        return line
+    parts = []
+    while encoded:
+        size = 75 if not parts else 74
+        chunk = encoded[:size]
+        while True:
+            try:
+                parts.append(chunk.decode("utf-8"))
+                break
+            except UnicodeDecodeError:
+                chunk = chunk[:-1]
+        encoded = encoded[len(chunk):]
+    return "\r\n ".join(parts)
+
+
+def _timestamp(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def render_calendar(
+    name: str,
+    appointments: Iterable[Appointment],
+    services: Dict[int, Service],
+    customers: Dict[int, Customer],
+) -> bytes:
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        f"PRODID:{PRODID}",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_escape(name)}",
+    ]
+    for appointment in appointments:
+        service = services.get(appointment.service_id)
+        customer = customers.get(appointment.customer_id)
+        end = appointment.end_date or appointment.scheduled_date + timedelta(
+            minutes=service.duration_minutes if service else 60
+        )
+        summary = service.name if service else "Appointment"
+        if customer:
+            summary = f"{summary} - {customer.first_name} {customer.last_name}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:appointment-{appointment.id}@cleansweeppro",
+            f"DTSTAMP:{_timestamp(appointment.updated_at or appointment.created_at)}",
+            f"DTSTART:{_timestamp(appointment.scheduled_date)}",
+            f"DTEND:{_timestamp(end)}",
+            f"SEQUENCE:{appointment.change_seq}",
+            f"SUMMARY:{_escape(summary)}",
+            "STATUS:"
+            + ("CANCELLED" if appointment.status == AppointmentStatus.CANCELLED else "CONFIRMED"),
+        ]
+        if customer:
+            location = f"{customer.address}, {customer.city}, {customer.state} {customer.zip_code}"
+            lines.append(f"LOCATION:{_escape(location)}")
+        if appointment.notes:
+            lines.append(f"DESCRIPTION:{_escape(appointment.notes)}")
+        lines.append("END:VEVENT")
+    lines.append("END:VCALENDAR")
+    return ("\r\n".join(_fold(line) for line in lines) + "\r\n").encode("utf-8")
+
+
+class FeedCache:
+    """
+    Rendered feeds per staff member, keyed on a version that changes only
+    when that staff member's appointments (or the window) change
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._feeds: "OrderedDict[Tuple, Tuple[str, RenderedFeed]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple, version: str) -> Optional[RenderedFeed]:
+        with self._lock:
+            entry = self._feeds.get(key)
+            if entry is None or entry[0] != version:
+                return None
+            self._feeds.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: Tuple, version: str, feed: RenderedFeed) -> None:
+        with self._lock:
+            self._feeds[key] = (version, feed)
+            self._feeds.move_to_end(key)
+            while len(self._feeds) > self.maxsize:
+                self._feeds.popitem(last=False)
+
+
+def feed_etag(version: str) -> str:
+    return '"' + hashlib.sha256(version.encode()).hexdigest()[:32] + '"'
@@ -0,0 +1,46 @@
+"""
+Run or resume a billing run from the command line:
+
+    python -m app.invoicing --tenant-id 1 --period-start 2024-01-01 --period-end 2024-02-01
+    python -m app.invoicing --tenant-id 1 --run-id 42
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from app.crud.crud_invoice import billing_run as billing_run_crud
+from app.db.base import SessionLocal
+from app.invoicing.pipeline import run_billing
+from app.schemas.invoice import BillingRunCreate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate invoices for a billing period")
+    parser.add_argument("--tenant-id", type=int, required=True)
+    parser.add_argument("--run-id", type=int, help="Resume an existing run")
+    parser.add_argument("--period-start", type=datetime.fromisoformat)
+    parser.add_argument("--period-end", type=datetime.fromisoformat)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    run_id = args.run_id
+    if run_id is None:
+        if args.period_start is None or args.period_end is None:
+            parser.error("--period-start and --period-end are required for a new run")
+        db = SessionLocal()
+        db.info["tenant_id"] = args.tenant_id
+        try:
+            run = billing_run_crud.create(
+                db,
+                obj_in=BillingRunCreate(
+                    period_start=args.period_start, period_end=args.period_end
+                ),
+            )
+            run_id = run.id
+        finally:
+            db.close()
+    run_billing(args.tenant_id, run_id)
+
+
+if __name__ == "__main__":
+    main()
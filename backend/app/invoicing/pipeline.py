@@ -0,0 +1,256 @@
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, delete, exists, func, literal, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import SessionLocal
+from app.invoicing.render import render_invoice
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.customer import Customer
+from app.models.invoice import BillingRun, BillingRunStatus, Invoice, InvoiceLine
+from app.models.service import Service
+from app.models.tenant import Tenant
+
+logger = logging.getLogger(__name__)
+
+RENDER_BATCH_SIZE = 500
+
+
+def run_billing(tenant_id: int, run_id: int) -> None:
+    """
+    Generate and render all invoices of a billing run.
+
+    Work is committed per batch of customers together with the run's
+    checkpoint, so calling this again after a crash resumes where it
+    stopped and never bills an appointment twice. Rendering starts only
+    once generation has reached the last customer.
+    """
+    db = SessionLocal()
+    db.info["tenant_id"] = tenant_id
+    try:
+        run = db.query(BillingRun).filter(
+            BillingRun.id == run_id, BillingRun.tenant_id == tenant_id
+        ).one()
+        if run.status == BillingRunStatus.COMPLETED:
+            return
+        try:
+            if run.generated_at is None:
+                _generate(db, run)
+            _render(db, run)
+        except Exception as exc:
+            db.rollback()
+            run.status = BillingRunStatus.FAILED
+            run.error = str(exc)[:1000]
+            db.commit()
+            raise
+        run.status = BillingRunStatus.COMPLETED
+        run.error = None
+        run.finished_at = datetime.now(timezone.utc)
+        db.commit()
+        logger.info(
+            "Billing run %s: %s invoices, generation %.1fs, rendering %.1fs (%.0f invoices/s)",
+            run.id, run.invoices_created, run.generation_seconds,
+            run.render_seconds, run.invoices_per_second or 0,
+        )
+    finally:
+        db.close()
+
+
+def _billable_criteria(run: BillingRun, upper: Optional[int]) -> List[Any]:
+    criteria = [
+        Appointment.tenant_id == run.tenant_id,
+        Appointment.status == AppointmentStatus.COMPLETED,
+        Appointment.deleted_at.is_(None),
+        Appointment.scheduled_date >= run.period_start,
+        Appointment.scheduled_date < run.period_end,
+        Appointment.customer_id > run.last_customer_id,
+        ~exists().where(InvoiceLine.appointment_id == Appointment.id),
+    ]
+    if upper is not None:
+        criteria.append(Appointment.customer_id <= upper)
+    return criteria
+
+
+def _generate(db: Session, run: BillingRun) -> None:
+    run.status = BillingRunStatus.GENERATING
+    db.commit()
+    while True:
+        started = time.perf_counter()
+        # Upper customer id of this batch, walked along (tenant_id, id)
+        upper = db.execute(
+            select(Customer.id)
+            .where(Customer.tenant_id == run.tenant_id, Customer.id > run.last_customer_id)
+            .order_by(Customer.id)
+            .offset(settings.BILLING_BATCH_SIZE - 1)
+            .limit(1)
+        ).scalar()
+        criteria = _billable_criteria(run, upper)
+        batch = [Invoice.billing_run_id == run.id, Invoice.customer_id > run.last_customer_id]
+        if upper is not None:
+            batch.append(Invoice.customer_id <= upper)
+
+        headers = (
+            select(
+                literal(run.tenant_id),
+                literal(run.id),
+                Appointment.customer_id,
+                func.concat("INV-", run.id, "-", Appointment.customer_id),
+                literal(run.period_start),
+                literal(run.period_end),
+                literal(0),
+            )
+            .where(*criteria)
+            .group_by(Appointment.customer_id)
+        )
+        created = db.execute(
+            pg_insert(Invoice)
+            .from_select(
+                ["tenant_id", "billing_run_id", "customer_id", "number",
+                 "period_start", "period_end", "subtotal"],
+                headers,
+            )
+            .on_conflict_do_nothing()
+        ).rowcount
+
+        # Snapshot service name and price onto the lines
+        lines = (
+            select(
+                Invoice.id,
+                Appointment.id,
+                Service.id,
+                Service.name,
+                Appointment.scheduled_date,
+                Service.price,
+            )
+            .select_from(Appointment)
+            .join(Service, Service.id == Appointment.service_id)
+            .join(
+                Invoice,
+                and_(
+                    Invoice.billing_run_id == run.id,
+                    Invoice.customer_id == Appointment.customer_id,
+                ),
+            )
+            .where(*criteria)
+        )
+        db.execute(
+            pg_insert(InvoiceLine)
+            .from_select(
+                ["invoice_id", "appointment_id", "service_id", "description",
+                 "service_date", "unit_price"],
+                lines,
+            )
+            .on_conflict_do_nothing(index_elements=["appointment_id"])
+        )
+
+        db.execute(
+            update(Invoice)
+            .where(*batch)
+            .values(
+                subtotal=select(func.coalesce(func.sum(InvoiceLine.unit_price), 0))
+                .where(InvoiceLine.invoice_id == Invoice.id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
+        )
+        # Headers whose appointments were billed concurrently elsewhere
+        db.execute(
+            delete(Invoice)
+            .where(*batch, ~exists().where(InvoiceLine.invoice_id == Invoice.id))
+            .execution_options(synchronize_session=False)
+        )
+
+        run.invoices_created += max(created, 0)
+        run.generation_seconds += time.perf_counter() - started
+        if upper is None:
+            run.status = BillingRunStatus.RENDERING
+            run.generated_at = datetime.now(timezone.utc)
+            db.commit()
+            return
+        run.last_customer_id = upper
+        db.commit()
+
+
+def _render(db: Session, run: BillingRun) -> None:
+    run.status = BillingRunStatus.RENDERING
+    db.commit()
+    output_dir = os.path.join(
+        settings.INVOICE_OUTPUT_DIR, str(run.tenant_id), str(run.id)
+    )
+    os.makedirs(output_dir, exist_ok=True)
+    tenant = db.get(Tenant, run.tenant_id)
+    company = tenant.name if tenant else settings.PROJECT_NAME
+
+    last_id = 0
+    # Spawned rather than forked so workers never inherit pooled DB connections
+    with ProcessPoolExecutor(
+        max_workers=settings.INVOICE_RENDER_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+    ) as pool:
+        while True:
+            started = time.perf_counter()
+            invoices = db.execute(
+                select(Invoice, Customer)
+                .join(Customer, Customer.id == Invoice.customer_id)
+                .where(
+                    Invoice.billing_run_id == run.id,
+                    Invoice.rendered_at.is_(None),
+                    Invoice.id > last_id,
+                )
+                .order_by(Invoice.id)
+                .limit(RENDER_BATCH_SIZE)
+            ).all()
+            if not invoices:
+                return
+            last_id = invoices[-1][0].id
+
+            lines: Dict[int, List[Dict[str, str]]] = {}
+            for line in db.execute(
+                select(InvoiceLine)
+                .where(InvoiceLine.invoice_id.in_([invoice.id for invoice, _ in invoices]))
+                .order_by(InvoiceLine.service_date)
+            ).scalars():
+                lines.setdefault(line.invoice_id, []).append({
+                    "service_date": line.service_date.date().isoformat(),
+                    "description": line.description,
+                    "unit_price": f"{line.unit_price:.2f}",
+                })
+            payloads = [
+                {
+                    "invoice_id": invoice.id,
+                    "output_dir": output_dir,
+                    "company": company,
+                    "number": invoice.number,
+                    "period_start": invoice.period_start.date().isoformat(),
+                    "period_end": invoice.period_end.date().isoformat(),
+                    "customer_name": f"{customer.first_name} {customer.last_name}",
+                    "customer_address": (
+                        f"{customer.address}, {customer.city}, "
+                        f"{customer.state} {customer.zip_code}"
+                    ),
+                    "subtotal": f"{invoice.subtotal:.2f}",
+                    "lines": lines.get(invoice.id, []),
+                }
+                for invoice, customer in invoices
+            ]
+
+            rendered_at = datetime.now(timezone.utc)
+            results = pool.map(render_invoice, payloads, chunksize=25)
+            db.execute(
+                update(Invoice),
+                [
+                    {"id": invoice_id, "document_path": path, "rendered_at": rendered_at}
+                    for invoice_id, path in results
+                ],
+            )
+            run.invoices_rendered += len(payloads)
+            run.render_seconds += time.perf_counter() - started
+            db.commit()
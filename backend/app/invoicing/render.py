@@ -0,0 +1,71 @@
+import os
+from html import escape
+from string import Template
+from typing import Any, Dict, Tuple
+
+INVOICE_TEMPLATE = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Invoice $number</title>
+<style>
+  @page { size: A4; margin: 20mm; }
+  body { font-family: Helvetica, Arial, sans-serif; font-size: 11pt; color: #222; }
+  h1 { font-size: 18pt; margin-bottom: 0; }
+  table { width: 100%; border-collapse: collapse; margin-top: 16pt; }
+  th, td { padding: 4pt 6pt; border-bottom: 1px solid #ddd; text-align: left; }
+  td.amount, th.amount { text-align: right; }
+  tfoot td { font-weight: bold; border-bottom: none; }
+</style>
+</head>
+<body>
+<h1>$company</h1>
+<p>Invoice <strong>$number</strong><br>Period $period_start &ndash; $period_end</p>
+<p>$customer_name<br>$customer_address</p>
+<table>
+<thead><tr><th>Date</th><th>Service</th><th class="amount">Amount</th></tr></thead>
+<tbody>
+$rows
+</tbody>
+<tfoot><tr><td></td><td>Total</td><td class="amount">$subtotal</td></tr></tfoot>
+</table>
+</body>
+</html>
+""")
+
+ROW_TEMPLATE = Template(
+    '<tr><td>$date</td><td>$description</td><td class="amount">$amount</td></tr>'
+)
+
+
+def render_invoice(payload: Dict[str, Any]) -> Tuple[int, str]:
+    """
+    Write one invoice as print-ready HTML and return (invoice id, path).
+
+    Runs in worker processes, so it only touches the plain-data payload
+    built by the pipeline, never the database.
+    """
+    rows = "\n".join(
+        ROW_TEMPLATE.substitute(
+            date=escape(line["service_date"]),
+            description=escape(line["description"]),
+            amount=escape(line["unit_price"]),
+        )
+        for line in payload["lines"]
+    )
+    html = INVOICE_TEMPLATE.substitute(
+        company=escape(payload["company"]),
+        number=escape(payload["number"]),
+        period_start=escape(payload["period_start"]),
+        period_end=escape(payload["period_end"]),
+        customer_name=escape(payload["customer_name"]),
+        customer_address=escape(payload["customer_address"]),
+        rows=rows,
+        subtotal=escape(payload["subtotal"]),
+    )
+    path = os.path.join(payload["output_dir"], f"{payload['number']}.html")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(html)
+    os.replace(tmp_path, path)
+    return payload["invoice_id"], path
@@ -1,14 +1,47 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from app.core.audit import audit_log, flush_audit_log
 from app.core.config import settings
+from app.core.idempotency import IdempotencyMiddleware, sweep_expired_keys
+from app.core.profiling import ProfilingMiddleware
+from app.core.revocation import revocation_list, sync_revocations
+from app.core.singleflight import single_flight
+from app.core.tracing import TracingMiddleware, export_traces, instrument, tracer
+from app.core.warmup import warm_up
 from app.api.api import api_router
+from app.crud.base import TenantRequired, VersionConflict
+from app.db.base import statement_stats
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await run_in_threadpool(warm_up, app)
+    sweeper = asyncio.create_task(sweep_expired_keys())
+    audit_flusher = asyncio.create_task(flush_audit_log())
+    trace_exporter = asyncio.create_task(export_traces())
+    revocation_syncer = asyncio.create_task(sync_revocations())
+    yield
+    revocation_syncer.cancel()
+    sweeper.cancel()
+    audit_flusher.cancel()
+    trace_exporter.cancel()
+    await run_in_threadpool(audit_log.flush)
+    await run_in_threadpool(tracer.flush)
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan,
 )
 
+app.add_middleware(IdempotencyMiddleware)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -16,8 +49,37 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[
+        "X-Total-Count",
+        "X-Total-Count-Strategy",
+        "Idempotency-Replayed",
+        "ETag",
+        "X-Missing-Ids",
+        "traceresponse",
+    ],
 )
 
+# Root span per request, around everything but the profiler
+if settings.TRACING_ENABLED:
+    instrument()
+    app.add_middleware(TracingMiddleware)
+
+# Outermost, so profiles cover the whole request
+app.add_middleware(ProfilingMiddleware)
+
+@app.exception_handler(VersionConflict)
+async def version_conflict_handler(request: Request, exc: VersionConflict):
+    return JSONResponse(
+        status_code=412,
+        content={"detail": "The resource was modified by another request; reload and retry"},
+    )
+
+
+@app.exception_handler(TenantRequired)
+async def tenant_required_handler(request: Request, exc: TenantRequired):
+    return JSONResponse(status_code=400, content={"detail": "A tenant is required"})
+
+
 # Include API router
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -34,3 +96,23 @@ def root():
 @app.get("/health")
 def health_check():
     return {"status": "healthy"}
+
+
+@app.get("/metrics/coalescing")
+def coalescing_metrics():
+    return single_flight.stats()
+
+
+@app.get("/metrics/tracing")
+def tracing_metrics():
+    return tracer.stats()
+
+
+@app.get("/metrics/statements")
+def statement_metrics():
+    return statement_stats.stats()
+
+
+@app.get("/metrics/revocation")
+def revocation_metrics():
+    return revocation_list.stats()
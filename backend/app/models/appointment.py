@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Enum, BigInteger, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
-from app.db.base import Base
+from app.db.base import Base, change_sequence, current_transaction_id
 
 
 class AppointmentStatus(str, enum.Enum):
@@ -15,13 +15,23 @@ class AppointmentStatus(str, enum.Enum):
 
 class Appointment(Base):
     __tablename__ = "appointments"
+    __table_args__ = (
+        Index("ix_appointments_tenant_id_scheduled_date", "tenant_id", "scheduled_date"),
+        Index("ix_appointments_tenant_id_customer_id", "tenant_id", "customer_id"),
+        Index("ix_appointments_tenant_id_staff_id_scheduled_date", "tenant_id", "staff_id", "scheduled_date"),
+        Index("ix_appointments_tenant_id_status", "tenant_id", "status"),
+        Index("ix_appointments_tenant_id_change_seq", "tenant_id", "change_seq"),
+        Index("ix_appointments_tenant_id_change_xid", "tenant_id", "change_xid"),
+        Index("ix_appointments_tenant_id_staff_id_change_seq", "tenant_id", "staff_id", "change_seq"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     staff_id = Column(Integer, ForeignKey("staff.id"), nullable=False)
     service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
 
-    scheduled_date = Column(DateTime(timezone=True), nullable=False, index=True)
+    scheduled_date = Column(DateTime(timezone=True), nullable=False)
     end_date = Column(DateTime(timezone=True))
     status = Column(Enum(AppointmentStatus), default=AppointmentStatus.SCHEDULED, nullable=False)
 
@@ -30,6 +40,22 @@ class Appointment(Base):
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(
+        BigInteger,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+        nullable=False,
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=current_transaction_id,
+        onupdate=current_transaction_id,
+        nullable=False,
+    )
+    deleted_at = Column(DateTime(timezone=True))  # Tombstone for delta sync
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic lock, exposed as ETag
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     customer = relationship("Customer", back_populates="appointments")
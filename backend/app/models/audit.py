@@ -0,0 +1,18 @@
+from sqlalchemy import BigInteger, Column, Integer, String, DateTime, JSON, Index
+from app.db.base import Base
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_tenant_id_entity", "tenant_id", "entity_type", "entity_id", "id"),
+    )
+
+    id = Column(BigInteger, primary_key=True)
+    tenant_id = Column(Integer)  # NULL for changes made outside any tenant
+    entity_type = Column(String, nullable=False)  # Table name
+    entity_id = Column(Integer, nullable=False)
+    action = Column(String, nullable=False)  # create, update or delete
+    user_id = Column(Integer)  # Acting user; NULL for background jobs
+    changes = Column(JSON, nullable=False)  # {field: [before, after]}
+    changed_at = Column(DateTime(timezone=True), nullable=False)  # Time of the mutation, not of the flush
@@ -1,24 +1,53 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, Text, BigInteger, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db.base import Base
+from app.db.base import Base, change_sequence, current_transaction_id
 
 
 class Customer(Base):
     __tablename__ = "customers"
+    __table_args__ = (
+        Index(
+            "uq_customers_tenant_id_email", "tenant_id", "email",
+            unique=True, postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_customers_tenant_id_id", "tenant_id", "id"),
+        Index("ix_customers_tenant_id_change_seq", "tenant_id", "change_seq"),
+        Index("ix_customers_tenant_id_change_xid", "tenant_id", "change_xid"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    # No FK to tenants: a tenant's rows may live on its own database engine
+    tenant_id = Column(Integer, nullable=False)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     address = Column(Text, nullable=False)
     city = Column(String, nullable=False)
     state = Column(String, nullable=False)
     zip_code = Column(String, nullable=False)
+    latitude = Column(Float)  # Zip centroid, see app.geo.geocode
+    longitude = Column(Float)
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(
+        BigInteger,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+        nullable=False,
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=current_transaction_id,
+        onupdate=current_transaction_id,
+        nullable=False,
+    )
+    deleted_at = Column(DateTime(timezone=True))  # Tombstone for delta sync
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic lock, exposed as ETag
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     appointments = relationship("Appointment", back_populates="customer")
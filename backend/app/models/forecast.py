@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, DateTime, Date, JSON, Index
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class DemandForecast(Base):
+    __tablename__ = "demand_forecasts"
+    __table_args__ = (
+        Index("ix_demand_forecasts_tenant_id_generated_at", "tenant_id", "generated_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    start_date = Column(Date, nullable=False)
+    history_weeks = Column(Integer, nullable=False)
+    active_staff = Column(Integer, nullable=False)
+    days = Column(JSON, nullable=False)  # Output of forecasting.engine.forecast_days
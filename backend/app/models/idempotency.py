@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, JSON
+from sqlalchemy.sql import func
+from app.db.base import Base
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # Hash of caller, route and Idempotency-Key
+    fingerprint = Column(String, nullable=False)  # Hash of the request body
+    status_code = Column(Integer)  # NULL while the first request is in flight
+    response_headers = Column(JSON)
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    # In-flight lease: a claim whose worker died is taken over after this
+    locked_until = Column(DateTime(timezone=True))
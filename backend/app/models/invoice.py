@@ -0,0 +1,87 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, Numeric, Float, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from app.db.base import Base
+
+
+class BillingRunStatus(str, enum.Enum):
+    PENDING = "pending"
+    GENERATING = "generating"
+    RENDERING = "rendering"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class BillingRun(Base):
+    __tablename__ = "billing_runs"
+    __table_args__ = (
+        Index("ix_billing_runs_tenant_id_period_start", "tenant_id", "period_start"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    period_start = Column(DateTime(timezone=True), nullable=False)
+    period_end = Column(DateTime(timezone=True), nullable=False)  # Exclusive
+    status = Column(Enum(BillingRunStatus), default=BillingRunStatus.PENDING, nullable=False)
+
+    # Checkpoint: customers up to this id have been invoiced by this run
+    last_customer_id = Column(Integer, default=0, nullable=False)
+    generated_at = Column(DateTime(timezone=True))  # Every customer invoiced; only rendering left
+
+    invoices_created = Column(Integer, default=0, nullable=False)
+    invoices_rendered = Column(Integer, default=0, nullable=False)
+    generation_seconds = Column(Float, default=0.0, nullable=False)
+    render_seconds = Column(Float, default=0.0, nullable=False)
+    error = Column(String)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    @property
+    def invoices_per_second(self):
+        elapsed = self.generation_seconds + self.render_seconds
+        return self.invoices_created / elapsed if elapsed else None
+
+
+class Invoice(Base):
+    __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_billing_run_id_customer_id", "billing_run_id", "customer_id", unique=True),
+        Index("ix_invoices_tenant_id_customer_id", "tenant_id", "customer_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    billing_run_id = Column(Integer, ForeignKey("billing_runs.id"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    number = Column(String, nullable=False, unique=True)
+    period_start = Column(DateTime(timezone=True), nullable=False)
+    period_end = Column(DateTime(timezone=True), nullable=False)
+    subtotal = Column(Numeric(12, 2), default=0, nullable=False)
+
+    document_path = Column(String)
+    rendered_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    customer = relationship("Customer")
+    lines = relationship("InvoiceLine", back_populates="invoice", order_by="InvoiceLine.id")
+
+
+class InvoiceLine(Base):
+    __tablename__ = "invoice_lines"
+
+    id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
+    # Unique so an appointment is never billed twice, even across runs
+    appointment_id = Column(Integer, ForeignKey("appointments.id"), nullable=False, unique=True)
+    service_id = Column(Integer, ForeignKey("services.id"), nullable=False)
+    description = Column(String, nullable=False)  # Service name at invoice time
+    service_date = Column(DateTime(timezone=True), nullable=False)
+    unit_price = Column(Numeric(10, 2), nullable=False)  # Service.price at invoice time
+
+    # Relationships
+    invoice = relationship("Invoice", back_populates="lines")
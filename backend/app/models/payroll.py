@@ -0,0 +1,61 @@
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Enum, BigInteger, Numeric, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+import enum
+from app.db.base import Base
+
+
+class PayrollPeriodStatus(str, enum.Enum):
+    OPEN = "open"
+    CLOSED = "closed"
+
+
+class PayrollPeriod(Base):
+    __tablename__ = "payroll_periods"
+    __table_args__ = (
+        Index("ix_payroll_periods_tenant_id_start_date", "tenant_id", "start_date"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    start_date = Column(DateTime(timezone=True), nullable=False)
+    end_date = Column(DateTime(timezone=True), nullable=False)  # Exclusive
+    status = Column(Enum(PayrollPeriodStatus), default=PayrollPeriodStatus.OPEN, nullable=False)
+
+    # Change horizon (transaction id) the entries were computed at; open
+    # periods recompute when transactions from it on wrote appointments,
+    # staff or services, which covers writes committed after the last run
+    computed_through_xid = Column(BigInteger)
+    computed_at = Column(DateTime(timezone=True))
+    closed_at = Column(DateTime(timezone=True))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    entries = relationship(
+        "PayrollEntry",
+        back_populates="period",
+        cascade="all, delete-orphan",
+        order_by="PayrollEntry.staff_id",
+    )
+
+
+class PayrollEntry(Base):
+    __tablename__ = "payroll_entries"
+    __table_args__ = (
+        Index("ix_payroll_entries_period_id_staff_id", "period_id", "staff_id", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    period_id = Column(Integer, ForeignKey("payroll_periods.id", ondelete="CASCADE"), nullable=False)
+    staff_id = Column(Integer, ForeignKey("staff.id"), nullable=False)
+
+    appointment_count = Column(Integer, nullable=False)
+    regular_hours = Column(Numeric(10, 2), nullable=False)
+    overtime_hours = Column(Numeric(10, 2), nullable=False)
+    hourly_rate = Column(Numeric(10, 2))  # Snapshot at computation time
+    pay = Column(Numeric(12, 2), nullable=False)
+
+    # Relationships
+    period = relationship("PayrollPeriod", back_populates="entries")
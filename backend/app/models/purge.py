@@ -0,0 +1,50 @@
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Enum, Float, Index
+from sqlalchemy.sql import func
+import enum
+from app.db.base import Base
+
+
+class PurgeMode(str, enum.Enum):
+    DELETE = "delete"
+    ANONYMIZE = "anonymize"
+
+
+class PurgeJobStatus(str, enum.Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class PurgeJob(Base):
+    __tablename__ = "purge_jobs"
+    __table_args__ = (
+        Index("ix_purge_jobs_tenant_id_status", "tenant_id", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    mode = Column(Enum(PurgeMode), default=PurgeMode.DELETE, nullable=False)
+    # Exactly one of: the customer to erase, or the retention cutoff
+    customer_id = Column(Integer)
+    before = Column(DateTime(timezone=True))
+    status = Column(Enum(PurgeJobStatus), default=PurgeJobStatus.PENDING, nullable=False)
+
+    # Checkpoint: rows up to last_id of the stage-th step have been purged
+    stage = Column(Integer, default=0, nullable=False)
+    last_id = Column(BigInteger, default=0, nullable=False)
+
+    rows_purged = Column(Integer, default=0, nullable=False)
+    batches = Column(Integer, default=0, nullable=False)
+    lock_timeouts = Column(Integer, default=0, nullable=False)
+    purge_seconds = Column(Float, default=0.0, nullable=False)
+    throttled_seconds = Column(Float, default=0.0, nullable=False)  # Waiting on lag or load
+    error = Column(String)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    finished_at = Column(DateTime(timezone=True))
+
+    @property
+    def rows_per_second(self):
+        return self.rows_purged / self.purge_seconds if self.purge_seconds else None
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, DateTime, Date, JSON, Index
+from app.db.base import Base
+
+
+class ScheduleDay(Base):
+    __tablename__ = "schedule_days"
+    __table_args__ = (
+        Index("uq_schedule_days_tenant_id_day", "tenant_id", "day", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    day = Column(Date, nullable=False)  # In SCHEDULE_TIMEZONE
+    lanes = Column(JSON, nullable=False)  # {staff_id: lane}, see app.schedule.timeline.build_lane
+    updated_at = Column(DateTime(timezone=True), nullable=False)
@@ -1,20 +1,46 @@
-from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, Boolean, BigInteger, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db.base import Base
+from app.db.base import Base, change_sequence, current_transaction_id
 
 
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (
+        Index(
+            "uq_services_tenant_id_name", "tenant_id", "name",
+            unique=True, postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_services_tenant_id_is_active", "tenant_id", "is_active"),
+        Index("ix_services_tenant_id_change_seq", "tenant_id", "change_seq"),
+        Index("ix_services_tenant_id_change_xid", "tenant_id", "change_xid"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False, unique=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    name = Column(String, nullable=False)
     description = Column(Text)
     price = Column(Numeric(10, 2), nullable=False)
     duration_minutes = Column(Integer, nullable=False)  # Expected duration in minutes
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(
+        BigInteger,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+        nullable=False,
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=current_transaction_id,
+        onupdate=current_transaction_id,
+        nullable=False,
+    )
+    deleted_at = Column(DateTime(timezone=True))  # Tombstone for delta sync
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic lock, exposed as ETag
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     appointments = relationship("Appointment", back_populates="service")
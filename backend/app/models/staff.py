@@ -1,21 +1,33 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, Numeric, Text
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Numeric, Text, BigInteger, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.db.base import Base
+from app.db.base import Base, change_sequence, current_transaction_id
 
 
 class Staff(Base):
     __tablename__ = "staff"
+    __table_args__ = (
+        Index(
+            "uq_staff_tenant_id_email", "tenant_id", "email",
+            unique=True, postgresql_where=text("deleted_at IS NULL"),
+        ),
+        Index("ix_staff_tenant_id_is_active", "tenant_id", "is_active"),
+        Index("ix_staff_tenant_id_change_seq", "tenant_id", "change_seq"),
+        Index("ix_staff_tenant_id_change_xid", "tenant_id", "change_xid"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
     first_name = Column(String, nullable=False)
     last_name = Column(String, nullable=False)
-    email = Column(String, unique=True, index=True, nullable=False)
+    email = Column(String, nullable=False)
     phone = Column(String, nullable=False)
     address = Column(Text)
     city = Column(String)
     state = Column(String)
     zip_code = Column(String)
+    latitude = Column(Float)  # Zip centroid, see app.geo.geocode
+    longitude = Column(Float)
     position = Column(String, nullable=False)
     hourly_rate = Column(Numeric(10, 2))
     is_active = Column(Boolean, default=True)
@@ -23,6 +35,25 @@ class Staff(Base):
     notes = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(
+        BigInteger,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+        nullable=False,
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=current_transaction_id,
+        onupdate=current_transaction_id,
+        nullable=False,
+    )
+    # Bumped when an appointment moves to another staff member, which the
+    # calendar feed's version cannot otherwise see
+    calendar_seq = Column(BigInteger, nullable=False, server_default="0")
+    deleted_at = Column(DateTime(timezone=True))  # Tombstone for delta sync
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic lock, exposed as ETag
+
+    __mapper_args__ = {"version_id_col": version}
 
     # Relationships
     appointments = relationship("Appointment", back_populates="staff")
@@ -0,0 +1,40 @@
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Enum, BigInteger, Index, JSON
+from sqlalchemy.sql import func
+import enum
+from app.db.base import Base, change_sequence
+
+
+class WaitlistStatus(str, enum.Enum):
+    WAITING = "waiting"
+    BOOKED = "booked"
+
+
+class WaitlistEntry(Base):
+    __tablename__ = "waitlist_entries"
+    __table_args__ = (
+        Index("ix_waitlist_entries_tenant_id_status", "tenant_id", "status"),
+        Index("ix_waitlist_entries_tenant_id_change_seq", "tenant_id", "change_seq"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(Integer, nullable=False)
+    customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
+    service_ids = Column(JSON, nullable=False)  # Any of these services will do
+    windows = Column(JSON, nullable=False)  # [{"start": iso, "end": iso}], times the customer can take
+    preferred_staff_id = Column(Integer, ForeignKey("staff.id"))
+    zip_prefix = Column(String)  # Preferred area, e.g. "606"
+    status = Column(Enum(WaitlistStatus), default=WaitlistStatus.WAITING, nullable=False)
+    appointment_id = Column(Integer, ForeignKey("appointments.id"))  # Set once booked
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    change_seq = Column(
+        BigInteger,
+        server_default=change_sequence.next_value(),
+        onupdate=change_sequence.next_value(),
+        nullable=False,
+    )
+    deleted_at = Column(DateTime(timezone=True))  # Tombstone for delta sync
+    version = Column(Integer, nullable=False, server_default="1")  # Optimistic lock, exposed as ETag
+
+    __mapper_args__ = {"version_id_col": version}
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+import numpy as np
+
+SECONDS_PER_WEEK = 7 * 24 * 3600
+
+
+def week_origin(period_start: datetime) -> float:
+    """
+    Epoch seconds of the Monday 00:00 UTC on or before ``period_start``
+    """
+    if period_start.tzinfo is None:
+        period_start = period_start.replace(tzinfo=timezone.utc)
+    day = period_start.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0
+    )
+    return (day - timedelta(days=day.weekday())).timestamp()
+
+
+def compute_payroll(
+    staff_ids: np.ndarray,
+    hourly_rates: np.ndarray,
+    appointment_staff_ids: np.ndarray,
+    starts: np.ndarray,
+    ends: np.ndarray,
+    duration_minutes: np.ndarray,
+    *,
+    origin: float,
+    overtime_weekly_hours: float,
+    overtime_multiplier: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Hours, overtime and pay for a whole roster in one vectorised pass.
+
+    ``staff_ids`` must be sorted. ``starts`` and ``ends`` are epoch seconds,
+    with NaN ends falling back to the service's ``duration_minutes``.
+    Overtime is counted per week from ``origin``. Results are aligned with
+    ``staff_ids``.
+    """
+    n_staff = len(staff_ids)
+    staff_index = np.searchsorted(staff_ids, appointment_staff_ids)
+    known = staff_index < n_staff
+    known[known] = staff_ids[staff_index[known]] == appointment_staff_ids[known]
+    staff_index = staff_index[known]
+    starts, ends, duration_minutes = starts[known], ends[known], duration_minutes[known]
+
+    actual = (ends - starts) / 3600.0
+    hours = np.where(
+        np.isfinite(actual) & (actual > 0), actual, duration_minutes / 60.0
+    )
+
+    weeks = np.floor((starts - origin) / SECONDS_PER_WEEK).astype(np.int64)
+    n_weeks = int(weeks.max()) + 1 if len(weeks) else 1
+    weekly = np.bincount(
+        staff_index * n_weeks + weeks, weights=hours, minlength=n_staff * n_weeks
+    ).reshape(n_staff, n_weeks)
+    overtime_hours = np.clip(weekly - overtime_weekly_hours, 0, None).sum(axis=1)
+    total_hours = weekly.sum(axis=1)
+    regular_hours = total_hours - overtime_hours
+
+    rates = np.nan_to_num(hourly_rates.astype(np.float64))
+    pay = regular_hours * rates + overtime_hours * rates * overtime_multiplier
+    return {
+        "appointment_count": np.bincount(staff_index, minlength=n_staff),
+        "regular_hours": np.round(regular_hours, 2),
+        "overtime_hours": np.round(overtime_hours, 2),
+        "pay": np.round(pay, 2),
+    }
@@ -0,0 +1,49 @@
+"""
+Run or resume a purge job from the command line:
+
+    python -m app.purge --tenant-id 1 --customer-id 42
+    python -m app.purge --tenant-id 1 --before 2021-01-01 --mode anonymize
+    python -m app.purge --tenant-id 1 --job-id 7
+"""
+import argparse
+import logging
+from datetime import datetime
+
+from pydantic import ValidationError
+
+from app.crud.crud_purge import purge_job as purge_job_crud
+from app.db.base import SessionLocal
+from app.models.purge import PurgeMode
+from app.purge.pipeline import run_purge
+from app.schemas.purge import PurgeJobCreate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Erase a customer or purge data past retention")
+    parser.add_argument("--tenant-id", type=int, required=True)
+    parser.add_argument("--job-id", type=int, help="Resume an existing job")
+    parser.add_argument("--customer-id", type=int)
+    parser.add_argument("--before", type=datetime.fromisoformat)
+    parser.add_argument(
+        "--mode", type=PurgeMode, choices=[mode.value for mode in PurgeMode], default=PurgeMode.DELETE
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    job_id = args.job_id
+    if job_id is None:
+        try:
+            job_in = PurgeJobCreate(customer_id=args.customer_id, before=args.before, mode=args.mode)
+        except ValidationError as exc:
+            parser.error(exc.errors()[0]["msg"])
+        db = SessionLocal()
+        db.info["tenant_id"] = args.tenant_id
+        try:
+            job_id = purge_job_crud.create(db, obj_in=job_in).id
+        finally:
+            db.close()
+    run_purge(args.tenant_id, job_id)
+
+
+if __name__ == "__main__":
+    main()
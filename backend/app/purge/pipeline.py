@@ -0,0 +1,319 @@
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from sqlalchemy import String, cast, delete, exists, func, literal, or_, select, text, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.audit import audit_log
+from app.core.cache import cache, stale_keys
+from app.core.config import settings
+from app.core.singleflight import single_flight
+from app.crud.crud_schedule import local_day, schedule_day
+from app.db.base import SessionLocal
+from app.models.appointment import Appointment
+from app.models.audit import AuditLog
+from app.models.customer import Customer
+from app.models.invoice import Invoice, InvoiceLine
+from app.models.purge import PurgeJob, PurgeJobStatus, PurgeMode
+from app.models.schedule import ScheduleDay
+from app.models.waitlist import WaitlistEntry
+
+logger = logging.getLogger(__name__)
+
+LOCK_NOT_AVAILABLE = "55P03"
+
+
+class Step(NamedTuple):
+    name: str
+    model: Any
+    criteria: List[Any]
+    values: Optional[Dict[str, Any]] = None  # Scrub these columns; None deletes the rows
+
+
+def _scrubbed_customer() -> Dict[str, Any]:
+    return {
+        "first_name": "Erased",
+        "last_name": "Customer",
+        "email": literal("erased-") + cast(Customer.id, String) + "@invalid",
+        "phone": "",
+        "address": "",
+        "city": "",
+        "state": "",
+        "zip_code": "",
+        "latitude": None,
+        "longitude": None,
+        "notes": None,
+    }
+
+
+SCRUBBED_APPOINTMENT = {"notes": None, "internal_notes": None}
+
+
+def _tombstoned_appointment() -> Dict[str, Any]:
+    return {
+        **SCRUBBED_APPOINTMENT,
+        "deleted_at": func.coalesce(Appointment.deleted_at, func.now()),
+    }
+
+
+def plan(job: PurgeJob) -> List[Step]:
+    """
+    The steps of a job, children before parents so no step trips a
+    foreign key. Rows that invoices or booked waitlist entries still
+    reference are scrubbed of personal data instead of deleted.
+    Appointments are never deleted outright: sync clients may hold them,
+    so DELETE mode scrubs and tombstones them for GET /sync to report.
+    """
+    tenant_id = job.tenant_id
+    invoiced = exists().where(InvoiceLine.appointment_id == Appointment.id)
+    booked = exists().where(WaitlistEntry.appointment_id == Appointment.id)
+    appointment_notes = or_(
+        Appointment.notes.isnot(None), Appointment.internal_notes.isnot(None)
+    )
+    deleting = job.mode == PurgeMode.DELETE
+    # Skip tombstones an earlier run already scrubbed
+    untombstoned = or_(Appointment.deleted_at.is_(None), appointment_notes)
+
+    if job.customer_id is not None:
+        appointments = [Appointment.tenant_id == tenant_id, Appointment.customer_id == job.customer_id]
+        steps = [
+            Step("audit_log:appointments", AuditLog, [
+                AuditLog.tenant_id == tenant_id,
+                AuditLog.entity_type == "appointments",
+                AuditLog.entity_id.in_(select(Appointment.id).where(*appointments)),
+            ]),
+            Step("audit_log:customer", AuditLog, [
+                AuditLog.tenant_id == tenant_id,
+                AuditLog.entity_type == "customers",
+                AuditLog.entity_id == job.customer_id,
+            ]),
+            Step("waitlist_entries", WaitlistEntry, [
+                WaitlistEntry.tenant_id == tenant_id,
+                WaitlistEntry.customer_id == job.customer_id,
+            ]),
+        ]
+        if deleting:
+            steps.append(Step(
+                "appointments:tombstone", Appointment,
+                appointments + [~invoiced, untombstoned], _tombstoned_appointment(),
+            ))
+        steps += [
+            Step(
+                "appointments:scrub", Appointment,
+                appointments + [appointment_notes] + ([invoiced] if deleting else []),
+                SCRUBBED_APPOINTMENT,
+            ),
+            # Kept as a tombstone: invoices point at it and sync clients drop it
+            Step("customer", Customer, [
+                Customer.tenant_id == tenant_id,
+                Customer.id == job.customer_id,
+            ], {**_scrubbed_customer(), "deleted_at": func.coalesce(Customer.deleted_at, func.now())}),
+        ]
+        return steps
+
+    before = job.before
+    steps = [
+        Step("audit_log", AuditLog, [AuditLog.tenant_id == tenant_id, AuditLog.changed_at < before]),
+        Step("waitlist_entries", WaitlistEntry, [
+            WaitlistEntry.tenant_id == tenant_id,
+            WaitlistEntry.created_at < before,
+        ]),
+    ]
+    appointments = [Appointment.tenant_id == tenant_id, Appointment.scheduled_date < before]
+    if deleting:
+        steps.append(Step(
+            "appointments:tombstone", Appointment,
+            appointments + [~invoiced, ~booked, untombstoned], _tombstoned_appointment(),
+        ))
+        appointments = appointments + [or_(invoiced, booked)]
+    steps += [
+        Step(
+            "appointments:scrub", Appointment,
+            appointments + [appointment_notes], SCRUBBED_APPOINTMENT,
+        ),
+        Step("schedule_days", ScheduleDay, [
+            ScheduleDay.tenant_id == tenant_id,
+            ScheduleDay.day < local_day(before),
+        ]),
+    ]
+    tombstoned = [
+        Customer.tenant_id == tenant_id,
+        Customer.deleted_at < before,
+        Customer.email.notlike("erased-%@invalid"),
+    ]
+    if deleting:
+        referenced = or_(
+            exists().where(Appointment.customer_id == Customer.id),
+            exists().where(Invoice.customer_id == Customer.id),
+            exists().where(WaitlistEntry.customer_id == Customer.id),
+        )
+        steps.append(Step("customers", Customer, tombstoned + [~referenced]))
+    steps.append(Step("customers:scrub", Customer, tombstoned, _scrubbed_customer()))
+    return steps
+
+
+def run_purge(tenant_id: int, job_id: int) -> None:
+    """
+    Run or resume a purge job.
+
+    Rows go in keyset-ordered batches, each its own short transaction
+    committed together with the job's checkpoint, so a crash or restart
+    resumes after the last purged id and live bookings only ever wait on
+    one batch's row locks.
+    """
+    db = SessionLocal()
+    db.info["tenant_id"] = tenant_id
+    try:
+        job = db.query(PurgeJob).filter(
+            PurgeJob.id == job_id, PurgeJob.tenant_id == tenant_id
+        ).one()
+        if job.status == PurgeJobStatus.COMPLETED:
+            return
+        try:
+            purge(db, job)
+        except Exception as exc:
+            db.rollback()
+            job.status = PurgeJobStatus.FAILED
+            job.error = str(exc)[:1000]
+            db.commit()
+            raise
+    finally:
+        db.close()
+
+
+def purge(db: Session, job: PurgeJob) -> None:
+    steps = plan(job)
+    postgres = db.get_bind().dialect.name == "postgresql"
+    job.status = PurgeJobStatus.RUNNING
+    job.error = None
+    db.commit()
+    if job.customer_id is not None:
+        # Buffered entries about the customer must land before their step runs
+        audit_log.flush()
+
+    size = settings.PURGE_BATCH_SIZE
+    while job.stage < len(steps):
+        step = steps[job.stage]
+        if postgres:
+            job.throttled_seconds += _throttle(db)
+        started = time.perf_counter()
+        try:
+            if postgres:
+                db.execute(text(f"SET LOCAL lock_timeout = {int(settings.PURGE_LOCK_TIMEOUT_MS)}"))
+            purged = _batch(db, step, job.last_id, size)
+        except OperationalError as exc:
+            if not _lock_not_available(exc):
+                raise
+            # A booking holds one of the rows; back off with a smaller batch
+            db.rollback()
+            job.lock_timeouts += 1
+            db.commit()
+            size = max(size // 2, settings.PURGE_MIN_BATCH_SIZE)
+            time.sleep(settings.PURGE_BACKOFF_SECONDS)
+            continue
+
+        elapsed = time.perf_counter() - started
+        if purged:
+            job.last_id = max(row[0] for row in purged)
+            job.rows_purged += len(purged)
+            job.batches += 1
+        else:
+            job.stage += 1
+            job.last_id = 0
+        job.purge_seconds += elapsed
+        db.commit()
+        if purged:
+            _after_batch(db, job, step, purged)
+            # Steer batch duration toward the target
+            target = settings.PURGE_TARGET_BATCH_MS / 1000
+            size = int(size * min(max(target / max(elapsed, 1e-3), 0.5), 2.0))
+            size = min(max(size, settings.PURGE_MIN_BATCH_SIZE), settings.PURGE_MAX_BATCH_SIZE)
+            time.sleep(settings.PURGE_PAUSE_MS / 1000)
+
+    job.status = PurgeJobStatus.COMPLETED
+    job.finished_at = datetime.now(timezone.utc)
+    db.commit()
+    if job.customer_id is not None:
+        audit_log.record(
+            tenant_id=job.tenant_id, entity_type="customers", entity_id=job.customer_id,
+            action="erase", user_id=db.info.get("user_id"),
+            changes={"purge_job_id": [None, job.id]},
+        )
+    logger.info(
+        "Purge job %s: %s rows in %s batches, %.1fs purging (%.0f rows/s), "
+        "%.1fs throttled, %s lock timeouts",
+        job.id, job.rows_purged, job.batches, job.purge_seconds,
+        job.rows_per_second or 0, job.throttled_seconds, job.lock_timeouts,
+    )
+
+
+def _batch(db: Session, step: Step, last_id: int, size: int) -> List[Any]:
+    model = step.model
+    # Ids are picked first so an empty pick, not an empty write, ends the step
+    ids = db.execute(
+        select(model.id)
+        .where(*step.criteria, model.id > last_id)
+        .order_by(model.id)
+        .limit(size)
+    ).scalars().all()
+    if not ids:
+        return []
+    returning = [model.id]
+    if model is Appointment:
+        returning.append(Appointment.scheduled_date)
+    if step.values is None:
+        statement = delete(model).where(model.id.in_(ids))
+    else:
+        values = dict(step.values)
+        if hasattr(model, "version"):
+            values["version"] = model.version + 1
+        statement = update(model).where(model.id.in_(ids)).values(values)
+    return db.execute(
+        statement.returning(*returning).execution_options(synchronize_session=False)
+    ).all()
+
+
+def _lock_not_available(exc: OperationalError) -> bool:
+    code = getattr(exc.orig, "pgcode", None) or getattr(exc.orig, "sqlstate", None)
+    return code == LOCK_NOT_AVAILABLE
+
+
+def _throttle(db: Session) -> float:
+    """
+    Wait while replicas lag or the primary is busy; return seconds waited
+    """
+    waited = 0.0
+    while True:
+        lag, active = db.execute(
+            text(
+                "SELECT"
+                " (SELECT coalesce(max(extract(epoch FROM replay_lag)), 0) FROM pg_stat_replication),"
+                " (SELECT count(*) FROM pg_stat_activity"
+                "  WHERE state = 'active' AND backend_type = 'client backend'"
+                "  AND pid <> pg_backend_pid())"
+            )
+        ).one()
+        db.commit()
+        if (
+            lag <= settings.PURGE_MAX_REPLICATION_LAG_SECONDS
+            and active <= settings.PURGE_MAX_ACTIVE_QUERIES
+        ):
+            return waited
+        time.sleep(settings.PURGE_BACKOFF_SECONDS)
+        waited += settings.PURGE_BACKOFF_SECONDS
+
+
+def _after_batch(db: Session, job: PurgeJob, step: Step, purged: List[Any]) -> None:
+    # The set-based writes bypass CRUDBase, so do its bookkeeping here
+    table = step.model.__tablename__
+    if table not in ("customers", "appointments", "waitlist_entries"):
+        return
+    cache.invalidate(stale_keys(table, job.tenant_id, [row[0] for row in purged]))
+    if table == "appointments":
+        single_flight.invalidate("appointments", job.tenant_id)
+        if job.customer_id is not None:
+            # Boards show customer names; rebuild the affected days on next read
+            schedule_day.drop(db, since=min(local_day(row[1]) for row in purged))
@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+
+def job_end(appointment: Any, duration_minutes: Optional[int]) -> datetime:
+    if appointment.end_date is not None:
+        return appointment.end_date
+    return appointment.scheduled_date + timedelta(minutes=duration_minutes or 0)
+
+
+def build_lane(
+    staff: Any, appointments: List[Any], customers: Dict[int, Any], services: Dict[int, Any]
+) -> Dict[str, Any]:
+    """
+    One staff member's day as JSON-ready data: jobs in start order with
+    customer and service inlined, idle gaps between them, and jobs that
+    overlap a neighbour flagged
+    """
+    jobs: List[Dict[str, Any]] = []
+    gaps: List[Dict[str, Any]] = []
+    booked = 0
+    busy_until: Optional[datetime] = None
+    for appointment in sorted(appointments, key=lambda a: (a.scheduled_date, a.id)):
+        service = services.get(appointment.service_id)
+        customer = customers.get(appointment.customer_id)
+        start = appointment.scheduled_date
+        end = job_end(appointment, service.duration_minutes if service else None)
+        overlaps = busy_until is not None and start < busy_until
+        if overlaps:
+            jobs[-1]["overlaps"] = True
+        elif busy_until is not None and start > busy_until:
+            gaps.append({
+                "start": busy_until.isoformat(),
+                "end": start.isoformat(),
+                "minutes": int((start - busy_until).total_seconds() // 60),
+            })
+        busy_until = end if busy_until is None else max(busy_until, end)
+        booked += int((end - start).total_seconds() // 60)
+        jobs.append({
+            "appointment_id": appointment.id,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "status": appointment.status.value,
+            "customer": {
+                "id": customer.id,
+                "name": f"{customer.first_name} {customer.last_name}",
+                "address": f"{customer.address}, {customer.city}, {customer.state} {customer.zip_code}",
+            } if customer else None,
+            "service": {
+                "id": service.id,
+                "name": service.name,
+                "duration_minutes": service.duration_minutes,
+            } if service else None,
+            "overlaps": overlaps,
+        })
+    return {
+        "staff_id": staff.id,
+        "name": f"{staff.first_name} {staff.last_name}",
+        "position": staff.position,
+        "is_active": bool(staff.is_active),
+        "booked_minutes": booked,
+        "jobs": jobs,
+        "gaps": gaps,
+    }
@@ -32,8 +32,11 @@ class AppointmentUpdate(BaseModel):
 
 class AppointmentInDB(AppointmentBase):
     id: int
+    tenant_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    change_seq: int
+    version: int
 
     class Config:
         from_attributes = True
@@ -0,0 +1,16 @@
+from pydantic import BaseModel
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+
+class AuditLog(BaseModel):
+    id: int
+    entity_type: str
+    entity_id: int
+    action: str
+    user_id: Optional[int] = None
+    changes: Dict[str, List[Any]]
+    changed_at: datetime
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import Generic, List, TypeVar
+
+EntityType = TypeVar("EntityType")
+
+
+class IdList(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class BatchLookup(BaseModel, Generic[EntityType]):
+    items: List[EntityType]  # In request order
+    missing: List[int] = []
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field
+from typing import List, Optional
 from datetime import datetime
 
 
@@ -33,8 +33,13 @@ class CustomerUpdate(BaseModel):
 
 class CustomerInDB(CustomerBase):
     id: int
+    tenant_id: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    change_seq: int
+    version: int
 
     class Config:
         from_attributes = True
@@ -42,3 +47,7 @@ class CustomerInDB(CustomerBase):
 
 class Customer(CustomerInDB):
     pass
+
+
+class CustomerMerge(BaseModel):
+    duplicate_ids: List[int] = Field(..., min_length=1)
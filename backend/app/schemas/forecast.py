@@ -0,0 +1,32 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+
+
+class ServiceDemand(BaseModel):
+    service_id: int
+    appointments: float
+    labour_hours: float
+    hourly: List[float]  # Expected appointments per hour of day (UTC)
+
+
+class ForecastDay(BaseModel):
+    date: date
+    appointments: float
+    labour_hours: float
+    capacity_hours: float
+    utilisation: Optional[float] = None
+    staff_needed: int
+    services: List[ServiceDemand] = []
+
+
+class DemandForecast(BaseModel):
+    id: int
+    generated_at: datetime
+    start_date: date
+    history_weeks: int
+    active_staff: int
+    days: List[ForecastDay]
+
+    class Config:
+        from_attributes = True
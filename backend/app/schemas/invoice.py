@@ -0,0 +1,75 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from app.models.invoice import BillingRunStatus
+
+
+class BillingRunCreate(BaseModel):
+    period_start: datetime
+    period_end: datetime
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "BillingRunCreate":
+        if self.period_end <= self.period_start:
+            raise ValueError("period_end must be after period_start")
+        return self
+
+
+class BillingRunInDB(BaseModel):
+    id: int
+    tenant_id: int
+    period_start: datetime
+    period_end: datetime
+    status: BillingRunStatus
+    last_customer_id: int
+    generated_at: Optional[datetime] = None
+    invoices_created: int
+    invoices_rendered: int
+    generation_seconds: float
+    render_seconds: float
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class BillingRun(BillingRunInDB):
+    invoices_per_second: Optional[float] = None
+
+
+class InvoiceLine(BaseModel):
+    appointment_id: int
+    service_id: int
+    description: str
+    service_date: datetime
+    unit_price: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class InvoiceInDB(BaseModel):
+    id: int
+    tenant_id: int
+    billing_run_id: int
+    customer_id: int
+    number: str
+    period_start: datetime
+    period_end: datetime
+    subtotal: Decimal
+    rendered_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class Invoice(InvoiceInDB):
+    pass
+
+
+class InvoiceWithLines(InvoiceInDB):
+    lines: List[InvoiceLine] = []
@@ -0,0 +1,50 @@
+from pydantic import BaseModel, model_validator
+from typing import List, Optional
+from datetime import datetime
+from decimal import Decimal
+from app.models.payroll import PayrollPeriodStatus
+
+
+class PayrollPeriodCreate(BaseModel):
+    start_date: datetime
+    end_date: datetime
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "PayrollPeriodCreate":
+        if self.end_date <= self.start_date:
+            raise ValueError("end_date must be after start_date")
+        return self
+
+
+class PayrollEntry(BaseModel):
+    staff_id: int
+    appointment_count: int
+    regular_hours: Decimal
+    overtime_hours: Decimal
+    hourly_rate: Optional[Decimal] = None
+    pay: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class PayrollPeriodInDB(BaseModel):
+    id: int
+    tenant_id: int
+    start_date: datetime
+    end_date: datetime
+    status: PayrollPeriodStatus
+    computed_at: Optional[datetime] = None
+    closed_at: Optional[datetime] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class PayrollPeriod(PayrollPeriodInDB):
+    pass
+
+
+class PayrollPeriodWithEntries(PayrollPeriodInDB):
+    entries: List[PayrollEntry] = []
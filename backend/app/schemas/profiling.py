@@ -0,0 +1,42 @@
+from pydantic import BaseModel, Field
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class ProfilingStart(BaseModel):
+    route: Optional[str] = None  # Path template, e.g. /api/v1/appointments/{appointment_id}
+    method: Optional[str] = None
+    sample_rate: float = Field(1.0, gt=0, le=1)
+    duration_seconds: int = Field(60, gt=0)
+    interval_ms: Optional[float] = Field(None, ge=1, le=1000)
+
+
+class ProfilingSession(BaseModel):
+    route: Optional[str] = None
+    method: Optional[str] = None
+    sample_rate: float
+    interval_ms: float
+    started_at: datetime
+    remaining_seconds: float
+    profiled: int
+
+
+class PhaseTiming(BaseModel):
+    ms: float
+    count: int
+
+
+class Profile(BaseModel):
+    id: int
+    method: str
+    path: str
+    status_code: Optional[int] = None
+    started_at: datetime
+    duration_ms: float
+    samples: int
+    phases: Dict[str, PhaseTiming]
+
+
+class ProfilingStatus(BaseModel):
+    session: Optional[ProfilingSession] = None
+    profiles: List[Profile]
@@ -0,0 +1,48 @@
+from pydantic import BaseModel, model_validator
+from typing import Optional
+from datetime import datetime, timezone
+from app.models.purge import PurgeJobStatus, PurgeMode
+
+
+class PurgeJobCreate(BaseModel):
+    customer_id: Optional[int] = None  # Erase one customer
+    before: Optional[datetime] = None  # Or purge everything past retention
+    mode: PurgeMode = PurgeMode.DELETE
+
+    @model_validator(mode="after")
+    def check_target(self) -> "PurgeJobCreate":
+        if (self.customer_id is None) == (self.before is None):
+            raise ValueError("Give either customer_id or before")
+        if self.before is not None:
+            if self.before.tzinfo is None:
+                self.before = self.before.replace(tzinfo=timezone.utc)
+            if self.before > datetime.now(timezone.utc):
+                raise ValueError("before must not be in the future")
+        return self
+
+
+class PurgeJobInDB(BaseModel):
+    id: int
+    tenant_id: int
+    mode: PurgeMode
+    customer_id: Optional[int] = None
+    before: Optional[datetime] = None
+    status: PurgeJobStatus
+    stage: int
+    last_id: int
+    rows_purged: int
+    batches: int
+    lock_timeouts: int
+    purge_seconds: float
+    throttled_seconds: float
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class PurgeJob(PurgeJobInDB):
+    stage_name: Optional[str] = None
+    rows_per_second: Optional[float] = None
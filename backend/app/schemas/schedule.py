@@ -0,0 +1,48 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import date, datetime
+from app.models.appointment import AppointmentStatus
+
+
+class ScheduleCustomer(BaseModel):
+    id: int
+    name: str
+    address: str
+
+
+class ScheduleService(BaseModel):
+    id: int
+    name: str
+    duration_minutes: int
+
+
+class ScheduleJob(BaseModel):
+    appointment_id: int
+    start: datetime
+    end: datetime
+    status: AppointmentStatus
+    customer: Optional[ScheduleCustomer] = None
+    service: Optional[ScheduleService] = None
+    overlaps: bool = False  # Starts before the previous job ends, or vice versa
+
+
+class ScheduleGap(BaseModel):
+    start: datetime
+    end: datetime
+    minutes: int
+
+
+class StaffTimeline(BaseModel):
+    staff_id: int
+    name: str
+    position: str
+    is_active: bool
+    booked_minutes: int
+    jobs: List[ScheduleJob]
+    gaps: List[ScheduleGap]
+
+
+class ScheduleBoard(BaseModel):
+    date: date
+    updated_at: datetime
+    staff: List[StaffTimeline]
@@ -26,8 +26,11 @@ class ServiceUpdate(BaseModel):
 
 class ServiceInDB(ServiceBase):
     id: int
+    tenant_id: int
     created_at: datetime
     updated_at: Optional[datetime] = None
+    change_seq: int
+    version: int
 
     class Config:
         from_attributes = True
@@ -42,8 +42,13 @@ class StaffUpdate(BaseModel):
 
 class StaffInDB(StaffBase):
     id: int
+    tenant_id: int
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
+    change_seq: int
+    version: int
 
     class Config:
         from_attributes = True
@@ -51,3 +56,8 @@ class StaffInDB(StaffBase):
 
 class Staff(StaffInDB):
     pass
+
+
+class NearestStaff(BaseModel):
+    staff: Staff
+    distance_km: float
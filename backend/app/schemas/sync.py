@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+from typing import Generic, List, TypeVar
+from app.schemas.appointment import Appointment
+from app.schemas.customer import Customer
+from app.schemas.service import Service
+from app.schemas.staff import Staff
+
+EntityType = TypeVar("EntityType")
+
+
+class EntityChanges(BaseModel, Generic[EntityType]):
+    upserted: List[EntityType] = []
+    deleted: List[int] = []
+
+
+class SyncResponse(BaseModel):
+    cursor: int
+    has_more: bool
+    customers: EntityChanges[Customer]
+    staff: EntityChanges[Staff]
+    services: EntityChanges[Service]
+    appointments: EntityChanges[Appointment]
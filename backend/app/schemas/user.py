@@ -12,6 +12,19 @@ class UserBase(BaseModel):
 
 class UserCreate(UserBase):
     password: str
+    tenant_id: Optional[int] = None
+
+
+class UserRegister(BaseModel):
+    # Self-service sign-up: no tenant and no admin rights until an admin grants them
+    email: EmailStr
+    full_name: str
+    password: str
+
+
+class UserTenantAssign(BaseModel):
+    tenant_id: int
+    is_admin: bool = False
 
 
 class UserUpdate(BaseModel):
@@ -24,6 +37,7 @@ class UserUpdate(BaseModel):
 
 class UserInDB(UserBase):
     id: int
+    tenant_id: Optional[int] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
 
@@ -38,6 +52,11 @@ class User(UserInDB):
 class Token(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
+
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
 
 
 class TokenData(BaseModel):
@@ -0,0 +1,76 @@
+from pydantic import BaseModel, Field, field_validator, model_validator
+from typing import List, Optional
+from datetime import datetime, timedelta, timezone
+from app.core.config import settings
+from app.models.waitlist import WaitlistStatus
+from app.schemas.customer import Customer
+
+
+class WaitlistWindow(BaseModel):
+    start: datetime
+    end: datetime
+
+    @field_validator("start", "end")
+    @classmethod
+    def assume_utc(cls, value: datetime) -> datetime:
+        return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+    @model_validator(mode="after")
+    def check_dates(self) -> "WaitlistWindow":
+        if self.end <= self.start:
+            raise ValueError("end must be after start")
+        if self.end - self.start > timedelta(days=settings.WAITLIST_MAX_WINDOW_DAYS):
+            raise ValueError(f"windows may span at most {settings.WAITLIST_MAX_WINDOW_DAYS} days")
+        return self
+
+
+class WaitlistEntryBase(BaseModel):
+    customer_id: int
+    service_ids: List[int] = Field(..., min_length=1)
+    windows: List[WaitlistWindow] = Field(..., min_length=1)
+    preferred_staff_id: Optional[int] = None
+    zip_prefix: Optional[str] = None
+
+
+class WaitlistEntryCreate(WaitlistEntryBase):
+    pass
+
+
+class WaitlistEntryUpdate(BaseModel):
+    service_ids: Optional[List[int]] = Field(None, min_length=1)
+    windows: Optional[List[WaitlistWindow]] = Field(None, min_length=1)
+    preferred_staff_id: Optional[int] = None
+    zip_prefix: Optional[str] = None
+
+
+class WaitlistEntryInDB(WaitlistEntryBase):
+    id: int
+    tenant_id: int
+    status: WaitlistStatus
+    appointment_id: Optional[int] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    change_seq: int
+    version: int
+
+    class Config:
+        from_attributes = True
+
+
+class WaitlistEntry(WaitlistEntryInDB):
+    pass
+
+
+class WaitlistMatch(BaseModel):
+    entry_id: int
+    customer: Customer
+    service_id: int
+    staff_id: int
+    start: datetime
+    end: datetime
+    preferred_staff: bool
+    in_area: bool
+
+
+class WaitlistBooking(BaseModel):
+    appointment_id: int  # The cancelled appointment whose slot to fill
@@ -0,0 +1,91 @@
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def _timestamp(value: Any) -> float:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class WaitlistIndex:
+    """
+    Waiting entries' time windows bucketed by (service, day). A freed slot
+    only looks at the bucket of its service and start day, so eligibility
+    checks touch the few hundred windows that could contain it rather than
+    the whole waitlist.
+    """
+
+    def __init__(self, rows: Iterable[Tuple]):
+        """
+        ``rows`` are (id, customer_id, service_ids, windows,
+        preferred_staff_id, zip_prefix), windows being {"start", "end"}
+        """
+        self.customer_ids: Dict[int, int] = {}
+        self.preferred_staff_ids: Dict[int, Optional[int]] = {}
+        self.zip_prefixes: Dict[int, Optional[str]] = {}
+        buckets: Dict[Tuple[int, int], List[Tuple[float, float, int]]] = defaultdict(list)
+        for id, customer_id, service_ids, windows, preferred_staff_id, zip_prefix in rows:
+            self.customer_ids[id] = customer_id
+            self.preferred_staff_ids[id] = preferred_staff_id
+            self.zip_prefixes[id] = zip_prefix
+            for window in windows:
+                start, end = _timestamp(window["start"]), _timestamp(window["end"])
+                for day in range(int(start // SECONDS_PER_DAY), int(end // SECONDS_PER_DAY) + 1):
+                    for service_id in service_ids:
+                        buckets[(service_id, day)].append((start, end, id))
+        self._buckets = {
+            key: (
+                np.array([window[0] for window in windows]),
+                np.array([window[1] for window in windows]),
+                np.array([window[2] for window in windows], dtype=np.int64),
+            )
+            for key, windows in buckets.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.customer_ids)
+
+    def eligible(self, service_id: int, start: datetime, end: datetime) -> List[int]:
+        """
+        Ids of entries accepting ``service_id`` with a window containing
+        [start, end), oldest first
+        """
+        start_ts, end_ts = _timestamp(start), _timestamp(end)
+        bucket = self._buckets.get((service_id, int(start_ts // SECONDS_PER_DAY)))
+        if bucket is None:
+            return []
+        starts, ends, ids = bucket
+        return np.unique(ids[(starts <= start_ts) & (ends >= end_ts)]).tolist()
+
+
+class WaitlistIndexes:
+    """
+    Per-tenant waitlist indexes, rebuilt when the tenant's waitlist
+    change_seq watermark moves
+    """
+
+    def __init__(self):
+        self._indexes: Dict[int, Tuple[int, WaitlistIndex]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, tenant_id: int, watermark: int, load: Callable[[], Iterable[Tuple]]) -> WaitlistIndex:
+        with self._lock:
+            cached = self._indexes.get(tenant_id)
+            if cached is not None and cached[0] == watermark:
+                return cached[1]
+        index = WaitlistIndex(load())
+        with self._lock:
+            self._indexes[tenant_id] = (watermark, index)
+        return index
+
+
+waitlist_indexes = WaitlistIndexes()
@@ -0,0 +1,199 @@
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.singleflight import single_flight
+from app.crud.base import VersionConflict
+from app.crud.crud_appointment import SlotUnavailable, appointment as appointment_crud
+from app.crud.crud_customer import customer as customer_crud
+from app.crud.crud_service import service as service_crud
+from app.crud.crud_waitlist import waitlist_entry as waitlist_crud
+from app.crud.loader import Loader
+from app.db.base import SessionLocal
+from app.models.appointment import Appointment
+from app.models.service import Service
+from app.models.waitlist import WaitlistEntry, WaitlistStatus
+from app.schemas.appointment import AppointmentCreate
+from app.waitlist.index import waitlist_indexes
+
+logger = logging.getLogger(__name__)
+
+
+class Slot(NamedTuple):
+    appointment_id: int
+    staff_id: int
+    customer_id: int
+    start: datetime
+    end: datetime
+    zip_code: Optional[str]
+
+
+class Match(NamedTuple):
+    entry_id: int
+    customer_id: int
+    service_id: int
+    staff_id: int
+    start: datetime
+    end: datetime
+    preferred_staff: bool
+    in_area: bool
+
+
+def freed_slot(db: Session, appointment: Appointment) -> Slot:
+    """
+    The time a cancelled appointment leaves free; without an end_date it
+    lasts its service's duration
+    """
+    end = appointment.end_date
+    if end is None:
+        service = service_crud.get(db, id=appointment.service_id)
+        end = appointment.scheduled_date + timedelta(minutes=service.duration_minutes if service else 0)
+    customer = customer_crud.get(db, id=appointment.customer_id)
+    return Slot(
+        appointment.id,
+        appointment.staff_id,
+        appointment.customer_id,
+        appointment.scheduled_date,
+        end,
+        customer.zip_code if customer else None,
+    )
+
+
+def find_matches(
+    db: Session, slot: Slot, *, limit: Optional[int] = None, entry_id: Optional[int] = None
+) -> List[Match]:
+    """
+    Waiting entries (or just ``entry_id``) that can take ``slot``, best
+    first: those preferring the slot's staff member, then those in the
+    slot's area, then by time on the waitlist. Each entry is offered its
+    longest acceptable service that fits.
+    """
+    limit = limit or settings.WAITLIST_MAX_CANDIDATES
+    index = waitlist_indexes.get(
+        db.info.get("tenant_id"),
+        waitlist_crud.change_watermark(db),
+        lambda: waitlist_crud.get_index_rows(db),
+    )
+    durations = (
+        service_crud.query(db)
+        .filter(Service.is_active == True)
+        .with_entities(Service.id, Service.duration_minutes)
+        .all()
+    )
+    best = {}
+    for service_id, minutes in durations:
+        end = slot.start + timedelta(minutes=minutes)
+        if end > slot.end:
+            continue
+        for candidate in index.eligible(service_id, slot.start, end):
+            if entry_id is not None and candidate != entry_id:
+                continue
+            if index.customer_ids[candidate] == slot.customer_id:
+                continue
+            if candidate in best and best[candidate][0] >= minutes:
+                continue
+            best[candidate] = (minutes, service_id, end)
+
+    matches = []
+    for candidate, (minutes, service_id, end) in best.items():
+        zip_prefix = index.zip_prefixes[candidate]
+        matches.append(
+            Match(
+                candidate,
+                index.customer_ids[candidate],
+                service_id,
+                slot.staff_id,
+                slot.start,
+                end,
+                index.preferred_staff_ids[candidate] == slot.staff_id,
+                bool(zip_prefix and slot.zip_code and slot.zip_code.startswith(zip_prefix)),
+            )
+        )
+    matches.sort(key=lambda match: (not match.preferred_staff, not match.in_area, match.entry_id))
+    return matches[:limit]
+
+
+def book(db: Session, *, entry: WaitlistEntry, match: Match) -> Appointment:
+    """
+    Book ``match`` for ``entry``. The entry is claimed with its version, so
+    two backfills cannot book it twice (VersionConflict), and the slot is
+    reserved as for any other booking, so nothing can be booked into it in
+    between (SlotUnavailable). If booking fails the entry is waiting again.
+    """
+    entry = waitlist_crud.update(
+        db, db_obj=entry, obj_in={"status": WaitlistStatus.BOOKED}, version=entry.version
+    )
+    try:
+        appointment_crud.reserve_slot(
+            db, staff_id=match.staff_id, service_id=match.service_id,
+            start=match.start, end=match.end,
+        )
+        appointment = appointment_crud.create(
+            db,
+            obj_in=AppointmentCreate(
+                customer_id=match.customer_id,
+                staff_id=match.staff_id,
+                service_id=match.service_id,
+                scheduled_date=match.start,
+                end_date=match.end,
+                notes="Booked from the waitlist",
+            ),
+        )
+    except Exception:
+        db.rollback()
+        # The rollback expired the entry; update() only sets loaded fields
+        db.refresh(entry)
+        waitlist_crud.update(db, db_obj=entry, obj_in={"status": WaitlistStatus.WAITING})
+        raise
+    waitlist_crud.update(db, db_obj=entry, obj_in={"appointment_id": appointment.id})
+    single_flight.invalidate("appointments", appointment.tenant_id)
+    return appointment
+
+
+def backfill(tenant_id: int, appointment_id: int, user_id: Optional[int] = None) -> Optional[int]:
+    """
+    Offer the slot of a just-cancelled appointment to the waitlist and,
+    with WAITLIST_AUTO_BOOK, book the best candidate that can still take
+    it. Returns the new appointment's id, if any.
+    """
+    db = SessionLocal()
+    db.info["tenant_id"] = tenant_id
+    db.info["user_id"] = user_id
+    try:
+        appointment = appointment_crud.get(db, id=appointment_id)
+        if appointment is None:
+            return None
+        notice = datetime.now(timezone.utc) + timedelta(minutes=settings.WAITLIST_MIN_NOTICE_MINUTES)
+        if appointment.scheduled_date < notice:
+            return None
+        started = time.perf_counter()
+        slot = freed_slot(db, appointment)
+        matches = find_matches(db, slot)
+        logger.info(
+            "Appointment %s cancelled: %s waitlist candidates in %.1f ms",
+            appointment_id, len(matches), (time.perf_counter() - started) * 1000,
+        )
+        if not settings.WAITLIST_AUTO_BOOK:
+            return None
+        # Candidates are tried in turn, but their entries load in one query
+        entries = Loader(db, waitlist_crud)
+        entries.prime(match.entry_id for match in matches)
+        for match in matches:
+            entry = entries.load(match.entry_id)
+            if entry is None or entry.status != WaitlistStatus.WAITING:
+                continue
+            try:
+                booked = book(db, entry=entry, match=match)
+            except VersionConflict:
+                continue
+            except SlotUnavailable:
+                return None
+            logger.info("Booked waitlist entry %s as appointment %s", entry.id, booked.id)
+            return booked.id
+        return None
+    finally:
+        db.close()
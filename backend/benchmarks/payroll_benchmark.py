@@ -0,0 +1,57 @@
+"""
+Times the vectorised payroll computation on a synthetic month.
+
+    python -m benchmarks.payroll_benchmark --staff 10000 --appointments 1000000
+"""
+import argparse
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from app.payroll.engine import compute_payroll, week_origin
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--staff", type=int, default=10_000)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    period_start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    origin = week_origin(period_start)
+    month = 31 * 24 * 3600
+
+    staff_ids = np.arange(1, args.staff + 1, dtype=np.int64)
+    rates = rng.uniform(15, 40, args.staff)
+    appointment_staff_ids = rng.integers(1, args.staff + 1, args.appointments)
+    starts = period_start.timestamp() + rng.uniform(0, month, args.appointments)
+    durations = rng.choice([90, 120, 150, 180, 240], args.appointments).astype(np.float64)
+    ends = starts + rng.normal(durations * 60, 900)
+    ends[rng.random(args.appointments) < 0.3] = np.nan  # No recorded end time
+
+    timings = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = compute_payroll(
+            staff_ids,
+            rates,
+            appointment_staff_ids,
+            starts,
+            ends,
+            durations,
+            origin=origin,
+            overtime_weekly_hours=40.0,
+            overtime_multiplier=1.5,
+        )
+        timings.append(time.perf_counter() - started)
+
+    print(f"staff={args.staff} appointments={args.appointments}")
+    print(f"compute: best {min(timings) * 1000:.1f} ms, median {np.median(timings) * 1000:.1f} ms")
+    print(f"total pay {result['pay'].sum():,.2f}, overtime hours {result['overtime_hours'].sum():,.1f}")
+
+
+if __name__ == "__main__":
+    main()
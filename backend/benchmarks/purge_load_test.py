@@ -0,0 +1,227 @@
+"""
+Live booking latency while a purge job runs next to it.
+
+    python -m benchmarks.purge_load_test --threads 8 --seconds 60
+
+Needs PostgreSQL in DATABASE_URL. Seeds a scratch schema (dropped afterwards
+unless --keep) with a year of appointments, then runs the booking workload
+twice for --seconds each: alone, and while a retention purge of the first
+half of the year and the erasure of one of the busiest customers run
+through app.purge. Each booking books a slot, lists the customer's
+upcoming appointments and moves one of them, so it contends with the purge
+for the same tables, indexes and pages but never for a row the purge is
+entitled to remove; any failed booking is one the purge blocked.
+
+The purge passes if booking p99 stays close to the baseline and no booking
+fails; the report also gives purge throughput, time spent throttled and
+the lock timeouts the purge backed off from.
+"""
+import argparse
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+import numpy as np
+from sqlalchemy import func, select, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.base import Base, create_database_engine
+from app.models.appointment import Appointment, AppointmentStatus
+from app.models.purge import PurgeJob, PurgeMode
+from app.purge.pipeline import purge
+from benchmarks.query_plans import SEED, tenant_ids
+
+SCHEMA = "purge_check"
+CUTOFF = datetime(2024, 7, 1, tzinfo=timezone.utc)
+TABLES = [
+    "tenants", "customers", "staff", "services", "appointments", "audit_log",
+    "schedule_days", "waitlist_entries", "billing_runs", "invoices", "invoice_lines",
+    "purge_jobs",
+]
+
+
+def engine_for(pool_size: int):
+    url = make_url(settings.DATABASE_URL)
+    return create_database_engine(
+        url.render_as_string(hide_password=False),
+        pool_size=pool_size,
+        connect_args={"options": f"-csearch_path={SCHEMA}"},
+    )
+
+
+def seed(engine, args) -> None:
+    params = {
+        "tenants": args.tenants,
+        "customers": args.customers,
+        "staff": args.staff,
+        "services": args.services,
+        "appointments": args.appointments,
+    }
+    Base.metadata.create_all(
+        engine, tables=[Base.metadata.tables[name] for name in TABLES], checkfirst=False
+    )
+    with engine.begin() as conn:
+        for statement in SEED:
+            conn.execute(text(statement), params)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def book(db: Session, args, rng: random.Random) -> None:
+    customer_id = rng.choice(args.customer_ids)
+    start = CUTOFF + timedelta(minutes=15 * rng.randrange(17000))
+    db.add(Appointment(
+        tenant_id=1,
+        customer_id=customer_id,
+        staff_id=rng.choice(args.staff_ids),
+        service_id=rng.choice(args.service_ids),
+        scheduled_date=start,
+        end_date=start + timedelta(hours=2),
+        status=AppointmentStatus.SCHEDULED,
+    ))
+    db.commit()
+    appointments = db.execute(
+        select(Appointment)
+        .where(
+            Appointment.tenant_id == 1,
+            Appointment.customer_id == customer_id,
+            Appointment.scheduled_date >= CUTOFF,
+            Appointment.deleted_at.is_(None),
+        )
+        .order_by(Appointment.scheduled_date.desc())
+        .limit(20)
+    ).scalars().all()
+    if appointments:
+        moved = rng.choice(appointments)
+        moved.scheduled_date += timedelta(minutes=15)
+    db.commit()
+
+
+def workload(engine, args, seconds: float) -> Dict[str, object]:
+    latencies: List[float] = []
+    errors: List[str] = []
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client(seed: int) -> None:
+        rng = random.Random(seed)
+        with Session(engine, info={"tenant_id": 1}) as db:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    book(db, args, rng)
+                except Exception as exc:
+                    db.rollback()
+                    with lock:
+                        errors.append(type(exc).__name__)
+                    continue
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {"latencies": np.array(latencies) * 1000, "errors": errors}
+
+
+def run_job(engine, job_in: Dict[str, object], jobs: List[PurgeJob]) -> None:
+    with Session(engine, info={"tenant_id": 1}, expire_on_commit=False) as db:
+        job = PurgeJob(tenant_id=1, **job_in)
+        db.add(job)
+        db.commit()
+        purge(db, job)
+        jobs.append(job)
+
+
+def report(label: str, result: Dict[str, object], seconds: float) -> None:
+    latencies = result["latencies"]
+    print(
+        f"{label:10} {len(latencies) / seconds:>8.0f}/s "
+        f"{np.percentile(latencies, 50):>8.1f}ms {np.percentile(latencies, 99):>8.1f}ms "
+        f"{latencies.max():>8.1f}ms {len(result['errors']):>7}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded schema in place")
+    parser.add_argument("--tenants", type=int, default=5)
+    parser.add_argument("--customers", type=int, default=50_000)
+    parser.add_argument("--staff", type=int, default=500)
+    parser.add_argument("--services", type=int, default=100)
+    parser.add_argument("--appointments", type=int, default=2_000_000)
+    parser.add_argument(
+        "--mode", type=PurgeMode, choices=[mode.value for mode in PurgeMode], default=PurgeMode.DELETE
+    )
+    args = parser.parse_args()
+    args.customer_ids = tenant_ids(args, args.customers, 1000)
+    args.staff_ids = tenant_ids(args, args.staff, 100)
+    args.service_ids = tenant_ids(args, args.services, 20)
+
+    engine = engine_for(args.threads + 2)
+    with engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    try:
+        started = time.perf_counter()
+        seed(engine, args)
+        print(f"seeded in {time.perf_counter() - started:.1f} s")
+        with Session(engine) as db:
+            busiest = db.execute(
+                select(Appointment.customer_id)
+                .where(Appointment.tenant_id == 1)
+                .group_by(Appointment.customer_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ).scalar()
+        args.customer_ids = [id for id in args.customer_ids if id != busiest]
+
+        baseline = workload(engine, args, args.seconds)
+
+        jobs: List[PurgeJob] = []
+        purges = [
+            threading.Thread(target=run_job, args=(engine, {
+                "before": CUTOFF, "mode": args.mode,
+            }, jobs)),
+            threading.Thread(target=run_job, args=(engine, {
+                "customer_id": busiest, "mode": args.mode,
+            }, jobs)),
+        ]
+        for thread in purges:
+            thread.start()
+        during = workload(engine, args, args.seconds)
+        for thread in purges:
+            thread.join()
+
+        print(f"{'booking':10} {'rate':>10} {'p50':>10} {'p99':>10} {'max':>10} {'errors':>7}")
+        report("alone", baseline, args.seconds)
+        report("purging", during, args.seconds)
+        for job in jobs:
+            target = (
+                f"customer {job.customer_id}" if job.customer_id
+                else f"before {job.before:%Y-%m-%d}"
+            )
+            print(
+                f"purge {target}: {job.rows_purged} rows in {job.batches} batches, "
+                f"{job.rows_per_second or 0:.0f} rows/s, {job.throttled_seconds:.1f} s throttled, "
+                f"{job.lock_timeouts} lock timeouts"
+            )
+        if during["errors"]:
+            print("booking errors:", sorted(set(during["errors"])))
+    finally:
+        if not args.keep:
+            with engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
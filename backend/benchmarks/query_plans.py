@@ -0,0 +1,334 @@
+"""
+Query-plan regression check for the hot CRUD paths.
+
+    python -m benchmarks.query_plans              # compare with the snapshots
+    python -m benchmarks.query_plans --update     # record new snapshots
+
+Seeds a scratch schema in DATABASE_URL's PostgreSQL database at realistic
+scale, runs each scenario below through the CRUD layer, and captures
+``EXPLAIN (FORMAT JSON)`` for every SELECT it issues. A scenario fails when
+
+- a plan sequentially scans a table larger than --seq-scan-rows,
+- its shape (node types, relations and indexes) differs from the snapshot in
+  benchmarks/plan_snapshots/, or
+- its estimated cost exceeds the snapshot's by more than --cost-tolerance.
+
+A scenario that raises is reported as failed and the others still run.
+Failures print a unified diff of the plan outlines and the process exits 1,
+so the check can gate CI. Re-record snapshots with --update when a plan
+change is intended and commit them with the change. The schema is dropped
+afterwards unless --keep.
+"""
+import argparse
+import difflib
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.base import CountStrategy
+from app.crud.crud_appointment import appointment
+from app.crud.crud_audit import audit_log
+from app.crud.crud_customer import customer
+from app.crud.crud_schedule import schedule_day
+from app.crud.crud_service import service
+from app.crud.crud_staff import staff
+from app.db.base import Base
+from app.models.appointment import Appointment, AppointmentStatus
+
+SCHEMA = "plan_check"
+SNAPSHOT_DIR = Path(__file__).parent / "plan_snapshots"
+TABLES = ["customers", "staff", "services", "appointments", "audit_log", "schedule_days"]
+
+SEED = [
+    """
+    INSERT INTO customers (tenant_id, first_name, last_name, email, phone, address,
+                           city, state, zip_code, latitude, longitude, deleted_at)
+    SELECT 1 + i % :tenants, 'First' || i, 'Last' || i, 'customer' || i || '@example.com',
+           '555-0100', i || ' Main St', 'Springfield', 'IL',
+           lpad((10000 + i % 89999)::text, 5, '0'), 39.78, -89.65,
+           CASE WHEN i % 50 = 0 THEN now() END
+    FROM generate_series(1, :customers) AS i
+    """,
+    """
+    INSERT INTO staff (tenant_id, first_name, last_name, email, phone, position,
+                       hourly_rate, is_active, latitude, longitude)
+    SELECT 1 + i % :tenants, 'First' || i, 'Last' || i, 'staff' || i || '@example.com',
+           '555-0100', 'Cleaner', 20, i % 10 <> 0, 39.78, -89.65
+    FROM generate_series(1, :staff) AS i
+    """,
+    """
+    INSERT INTO services (tenant_id, name, price, duration_minutes, is_active)
+    SELECT 1 + i % :tenants, 'Service ' || i, 100, 60 + (i % 4) * 30, i % 5 <> 0
+    FROM generate_series(1, :services) AS i
+    """,
+    # Foreign keys stay within the appointment's tenant: row id r belongs to
+    # tenant 1 + r % tenants
+    """
+    INSERT INTO appointments (tenant_id, customer_id, staff_id, service_id,
+                              scheduled_date, end_date, status, deleted_at)
+    SELECT 1 + i % :tenants,
+           (1 + (i * 7919) % (:customers / :tenants - 1)) * :tenants + i % :tenants,
+           (1 + (i * 104729) % (:staff / :tenants - 1)) * :tenants + i % :tenants,
+           (1 + (i * 31) % (:services / :tenants - 1)) * :tenants + i % :tenants,
+           timestamptz '2024-01-01' + ((i * 37) % 35040) * interval '15 minutes',
+           CASE WHEN i % 3 = 0 THEN timestamptz '2024-01-01'
+                + ((i * 37) % 35040) * interval '15 minutes' + interval '2 hours' END,
+           (ARRAY['COMPLETED', 'COMPLETED', 'SCHEDULED', 'CANCELLED',
+                  'IN_PROGRESS', 'NO_SHOW'])[1 + i % 6]::appointmentstatus,
+           CASE WHEN i % 100 = 0 THEN now() END
+    FROM generate_series(1, :appointments) AS i
+    """,
+    """
+    INSERT INTO audit_log (tenant_id, entity_type, entity_id, action, changes, changed_at)
+    SELECT 1 + i % :tenants, 'appointments', 1 + i % :appointments, 'update',
+           '{"status": ["scheduled", "completed"]}', now()
+    FROM generate_series(1, :appointments) AS i
+    """,
+]
+
+
+def tenant_ids(args, count: int, n: int) -> List[int]:
+    """
+    The first ``n`` seeded ids of tenant 1 in a table of ``count`` rows
+    """
+    return [id for id in range(args.tenants, count + 1, args.tenants)][:n]
+
+
+def day(offset: int) -> datetime:
+    return datetime(2024, 3, 4, tzinfo=timezone.utc) + timedelta(days=offset)
+
+
+# name -> callable(db, args) issuing the queries of one hot path
+SCENARIOS: Dict[str, Callable[[Session, Any], Any]] = {
+    "customers_get": lambda db, a: customer.get(db, tenant_ids(a, a.customers, 10)[-1]),
+    "customers_list": lambda db, a: customer.get_multi(db, skip=1000, limit=100),
+    "customers_by_email": lambda db, a: customer.get_by_email(
+        db, email=f"customer{tenant_ids(a, a.customers, 10)[-1]}@example.com"
+    ),
+    "customers_lookup": lambda db, a: customer.get_by_ids(db, ids=tenant_ids(a, a.customers, 200)),
+    "customers_changes": lambda db, a: customer.get_changes(
+        db, since=0, before=customer.get_change_horizon(db)
+    ),
+    "customers_count": lambda db, a: customer.count(db, strategy=CountStrategy.AUTO),
+    "staff_active": lambda db, a: staff.get_active(db, limit=100),
+    "staff_locations": lambda db, a: staff.get_active_locations(db),
+    "staff_changed_since": lambda db, a: staff.changed_since(
+        db, xid=staff.get_change_horizon(db)
+    ),
+    "services_active": lambda db, a: service.get_active(db, limit=100),
+    "appointments_get": lambda db, a: appointment.get(db, tenant_ids(a, a.appointments, 10)[-1]),
+    "appointments_day": lambda db, a: appointment.get_by_date_range(
+        db, start_date=day(0), end_date=day(1)
+    ),
+    "appointments_staff_week": lambda db, a: appointment.get_by_staff(
+        db, staff_id=tenant_ids(a, a.staff, 3)[-1], start_date=day(0), end_date=day(7)
+    ),
+    "appointments_customer": lambda db, a: appointment.get_by_customer(
+        db, customer_id=tenant_ids(a, a.customers, 3)[-1]
+    ),
+    "appointments_status": lambda db, a: appointment.get_by_status(
+        db, status=AppointmentStatus.IN_PROGRESS
+    ),
+    "appointments_busy_staff": lambda db, a: appointment.get_busy_staff_ids(
+        db, staff_ids=tenant_ids(a, a.staff, 20), start=day(1), end=day(1) + timedelta(hours=2)
+    ),
+    "appointments_staff_version": lambda db, a: appointment.get_staff_version(
+        db, staff_id=tenant_ids(a, a.staff, 3)[-1]
+    ),
+    "appointments_changes": lambda db, a: appointment.get_changes(
+        db, since=0, before=appointment.get_change_horizon(db)
+    ),
+    "appointments_count_filtered": lambda db, a: appointment.count(
+        db, Appointment.status == AppointmentStatus.SCHEDULED
+    ),
+    "audit_entity_history": lambda db, a: audit_log.get_by_entity(
+        db, entity_type="appointments", entity_id=tenant_ids(a, a.appointments, 3)[-1]
+    ),
+    "schedule_lanes": lambda db, a: schedule_day._lanes(db, day(2).date()),
+}
+
+
+def outline(node: Dict[str, Any], depth: int = 0) -> List[str]:
+    """
+    Plan tree as indented lines of node type, index and relation; costs and
+    row estimates are left out so the shape diffs cleanly
+    """
+    line = "  " * depth + node["Node Type"]
+    if "Index Name" in node:
+        line += f" using {node['Index Name']}"
+    if "Relation Name" in node:
+        line += f" on {node['Relation Name']}"
+    lines = [line]
+    for child in node.get("Plans", []):
+        lines.extend(outline(child, depth + 1))
+    return lines
+
+
+def seq_scans(node: Dict[str, Any]) -> List[str]:
+    found = [node["Relation Name"]] if node["Node Type"] == "Seq Scan" else []
+    for child in node.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def capture(engine, db: Session, scenario: Callable, args) -> List[Dict[str, Any]]:
+    """
+    Plans of the SELECTs ``scenario`` issues, in order
+    """
+    statements: List[Tuple[str, Any]] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        scenario(db, args)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    db.rollback()
+
+    plans = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            explained = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+            plan = explained[0]["Plan"]
+            plans.append({
+                "sql": " ".join(statement.split()),
+                "plan": outline(plan),
+                "cost": plan["Total Cost"],
+                "seq_scans": seq_scans(plan),
+            })
+    return plans
+
+
+def check(name: str, plans: List[Dict[str, Any]], large: Dict[str, int], args) -> List[str]:
+    problems = []
+    for index, plan in enumerate(plans):
+        for table in plan["seq_scans"]:
+            if table in large:
+                problems.append(
+                    f"query {index}: Seq Scan on {table} ({large[table]} rows)\n  {plan['sql']}"
+                )
+
+    path = SNAPSHOT_DIR / f"{name}.json"
+    if not path.exists():
+        return problems + ["no snapshot; record one with --update"]
+    snapshot = json.loads(path.read_text())
+    expected = [line for query in snapshot for line in [f"-- {query['sql']}"] + query["plan"]]
+    actual = [line for query in plans for line in [f"-- {query['sql']}"] + query["plan"]]
+    if expected != actual:
+        diff = difflib.unified_diff(expected, actual, "snapshot", "current", lineterm="")
+        problems.append("plan changed:\n" + "\n".join(diff))
+    else:
+        for index, (old, new) in enumerate(zip(snapshot, plans)):
+            ceiling = old["cost"] * (1 + args.cost_tolerance)
+            if new["cost"] > ceiling:
+                problems.append(
+                    f"query {index}: estimated cost {new['cost']:.1f} above ceiling "
+                    f"{ceiling:.1f} (snapshot {old['cost']:.1f})"
+                )
+    return problems
+
+
+def seed(engine, args) -> Dict[str, int]:
+    """
+    Creates and fills the scratch schema; returns the tables large enough
+    that a sequential scan is a regression, with their row counts
+    """
+    params = {
+        "tenants": args.tenants,
+        "customers": args.customers,
+        "staff": args.staff,
+        "services": args.services,
+        "appointments": args.appointments,
+    }
+    # The schema is new; existence checks could see same-named objects elsewhere
+    Base.metadata.create_all(
+        engine, tables=[Base.metadata.tables[name] for name in TABLES], checkfirst=False
+    )
+    with engine.begin() as conn:
+        for statement in SEED:
+            conn.execute(text(statement), params)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+        rows = conn.execute(
+            text(
+                "SELECT relname, reltuples::bigint FROM pg_class"
+                " WHERE relnamespace = to_regnamespace(:schema) AND relkind = 'r'"
+            ),
+            {"schema": SCHEMA},
+        ).all()
+    return {table: count for table, count in rows if count >= args.seq_scan_rows}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--update", action="store_true", help="Record snapshots instead of comparing")
+    parser.add_argument("--only", nargs="*", help="Scenario names to run")
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded schema in place")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=200_000)
+    parser.add_argument("--staff", type=int, default=4_000)
+    parser.add_argument("--services", type=int, default=400)
+    parser.add_argument("--appointments", type=int, default=2_000_000)
+    parser.add_argument("--seq-scan-rows", type=int, default=10_000)
+    parser.add_argument("--cost-tolerance", type=float, default=0.5)
+    args = parser.parse_args()
+
+    admin = create_engine(settings.DATABASE_URL)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    engine = create_engine(
+        settings.DATABASE_URL, connect_args={"options": f"-csearch_path={SCHEMA}"}
+    )
+    failed = 0
+    try:
+        started = time.perf_counter()
+        large = seed(engine, args)
+        print(f"seeded in {time.perf_counter() - started:.1f} s; large tables: {sorted(large)}")
+        SNAPSHOT_DIR.mkdir(exist_ok=True)
+        for name, scenario in SCENARIOS.items():
+            if args.only and name not in args.only:
+                continue
+            # One broken scenario is reported and the rest still run
+            try:
+                with Session(engine, info={"tenant_id": 1}) as db:
+                    plans = capture(engine, db, scenario, args)
+            except Exception as exc:
+                failed += 1
+                print(f"FAIL {name}")
+                print(f"  raised {type(exc).__name__}: {exc}".replace("\n", "\n  "))
+                continue
+            if args.update:
+                snapshot = [{key: plan[key] for key in ("sql", "plan", "cost")} for plan in plans]
+                (SNAPSHOT_DIR / f"{name}.json").write_text(json.dumps(snapshot, indent=2) + "\n")
+                print(f"recorded {name} ({len(plans)} queries)")
+                continue
+            problems = check(name, plans, large, args)
+            if problems:
+                failed += 1
+                print(f"FAIL {name}")
+                for problem in problems:
+                    print("  " + problem.replace("\n", "\n  "))
+            else:
+                print(f"ok   {name}")
+    finally:
+        engine.dispose()
+        if not args.keep:
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Compares the dev server (one uvicorn process with --reload) and the
+production one (gunicorn with uvloop/httptools workers, gunicorn_conf.py):
+time from launch to the first answered request, then steady-state
+throughput under concurrent clients.
+
+    python -m benchmarks.serving_benchmark --mode both --clients 64 --seconds 20
+
+Run from backend/ with DATABASE_URL and SECRET_KEY set; the servers inherit
+the environment. Pass --token to benchmark an authenticated --path.
+"""
+import argparse
+import asyncio
+import os
+import signal
+import subprocess
+import sys
+import time
+from typing import List
+
+import httpx
+import numpy as np
+
+COMMANDS = {
+    "dev": [sys.executable, "-m", "uvicorn", "app.main:app", "--port", "{port}", "--reload"],
+    "prod": [sys.executable, "-m", "gunicorn", "-c", "gunicorn_conf.py", "app.main:app"],
+}
+
+
+def launch(mode: str, port: int, workers: int) -> subprocess.Popen:
+    env = dict(os.environ, WEB_BIND=f"127.0.0.1:{port}")
+    if workers:
+        env["WEB_WORKERS"] = str(workers)
+    command = [part.format(port=port) for part in COMMANDS[mode]]
+    return subprocess.Popen(
+        command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+
+
+def wait_until_serving(url: str, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            if httpx.get(url, timeout=1.0).status_code < 500:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        time.sleep(0.01)
+    raise RuntimeError(f"No answer from {url} within {timeout:.0f} s")
+
+
+async def hammer(url: str, clients: int, seconds: float, headers: dict) -> List[float]:
+    latencies: List[float] = []
+    deadline = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(limits=limits, headers=headers, timeout=30.0) as client:
+
+        async def run() -> None:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                response = await client.get(url)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(run() for _ in range(clients)))
+    return latencies
+
+
+def bench(mode: str, args) -> None:
+    url = f"http://127.0.0.1:{args.port}{args.path}"
+    process = launch(mode, args.port, args.workers)
+    try:
+        cold_start = wait_until_serving(url, args.timeout)
+        headers = {"Authorization": f"Bearer {args.token}"} if args.token else {}
+        asyncio.run(hammer(url, args.clients, 2.0, headers))  # Settle connections
+        latencies = np.array(asyncio.run(hammer(url, args.clients, args.seconds, headers))) * 1000
+        print(
+            f"{mode}: first request after {cold_start:.2f} s; "
+            f"{len(latencies) / args.seconds:.0f} req/s, "
+            f"p50 {np.percentile(latencies, 50):.1f} ms, p99 {np.percentile(latencies, 99):.1f} ms"
+        )
+    finally:
+        # SIGTERM is the graceful drain under test as well
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(timeout=60)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["dev", "prod", "both"], default="both")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/health")
+    parser.add_argument("--token")
+    parser.add_argument("--clients", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--workers", type=int, help="Production workers (default: WEB_WORKERS or one per CPU)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    for mode in ["dev", "prod"] if args.mode == "both" else [args.mode]:
+        bench(mode, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+"""
+Per-query latency of the hot CRUD statements with and without server-side
+prepared statements, and the planner time preparation saves.
+
+    python -m benchmarks.statement_benchmark --calls 2000
+
+Needs PostgreSQL in DATABASE_URL and both psycopg2 and psycopg (3)
+installed. Seeds a scratch schema (dropped afterwards unless --keep) and
+runs each hot path through the CRUD layer on one connection, three ways:
+
+- psycopg2: every execution is parsed and planned;
+- psycopg: as configured behind PgBouncer (DB_PGBOUNCER), never prepared;
+- psycopg, prepared: hot queries prepared at first use, as in production.
+
+Planning time per statement comes from EXPLAIN ANALYZE; the saving is that
+times the executions Postgres served from a generic plan, as reported by
+pg_prepared_statements.
+"""
+import argparse
+import json
+import time
+from typing import Any, Callable, Dict, List
+
+import numpy as np
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.crud.crud_appointment import appointment
+from app.crud.crud_customer import customer
+from app.crud.crud_staff import staff
+from app.crud.crud_user import user
+from app.db.base import Base, create_database_engine
+from app.models.appointment import AppointmentStatus
+from benchmarks.query_plans import SEED, day, tenant_ids
+
+SCHEMA = "statement_check"
+TABLES = ["tenants", "users", "customers", "staff", "services", "appointments", "audit_log"]
+
+SEED_USERS = [
+    "INSERT INTO tenants (name) SELECT 'Tenant ' || i FROM generate_series(1, :tenants) AS i",
+    """
+    INSERT INTO users (email, tenant_id, hashed_password, full_name, is_active, is_admin)
+    SELECT 'user' || i || '@example.com', 1 + i % :tenants, 'x', 'User ' || i, true, false
+    FROM generate_series(1, :users) AS i
+    """,
+]
+
+# name -> callable(db, args, rng) issuing one hot query with varying parameters
+SCENARIOS: Dict[str, Callable[[Session, Any, Any], Any]] = {
+    "customers_get": lambda db, a, rng: customer.get(db, int(rng.choice(a.customer_ids))),
+    "staff_get": lambda db, a, rng: staff.get(db, int(rng.choice(a.staff_ids))),
+    "appointments_get": lambda db, a, rng: appointment.get(db, int(rng.choice(a.appointment_ids))),
+    "users_by_email": lambda db, a, rng: user.get_by_email(
+        db, email=f"user{rng.integers(1, a.users + 1)}@example.com"
+    ),
+    "appointments_by_customer": lambda db, a, rng: appointment.get_by_customer(
+        db, customer_id=int(rng.choice(a.customer_ids))
+    ),
+    "appointments_by_staff": lambda db, a, rng: appointment.get_by_staff(
+        db,
+        staff_id=int(rng.choice(a.staff_ids)),
+        start_date=day(0),
+        end_date=day(int(rng.integers(1, 8))),
+    ),
+    "appointments_by_status": lambda db, a, rng: appointment.get_by_status(
+        db, status=AppointmentStatus.IN_PROGRESS, skip=int(rng.integers(0, 10)) * 100
+    ),
+    "customers_lookup": lambda db, a, rng: customer.get_by_ids(
+        db, ids=rng.choice(a.customer_ids, 50).tolist()
+    ),
+}
+
+VARIANTS = [
+    ("psycopg2", "postgresql+psycopg2", True),
+    ("psycopg", "postgresql+psycopg", True),
+    ("psycopg, prepared", "postgresql+psycopg", False),
+]
+
+
+def engine_for(drivername: str, pgbouncer: bool):
+    settings.DB_PGBOUNCER = pgbouncer
+    url = make_url(settings.DATABASE_URL).set(drivername=drivername)
+    return create_database_engine(
+        url.render_as_string(hide_password=False),
+        pool_size=1,
+        connect_args={"options": f"-csearch_path={SCHEMA}"},
+    )
+
+
+def seed(engine, args) -> None:
+    params = {
+        "tenants": args.tenants,
+        "customers": args.customers,
+        "staff": args.staff,
+        "services": args.services,
+        "appointments": args.appointments,
+        "users": args.users,
+    }
+    Base.metadata.create_all(
+        engine, tables=[Base.metadata.tables[name] for name in TABLES], checkfirst=False
+    )
+    with engine.begin() as conn:
+        for statement in SEED_USERS + SEED:
+            conn.execute(text(statement), params)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+
+def planning_times(engine, args) -> Dict[str, float]:
+    """
+    Milliseconds Postgres spends planning each scenario's statement
+    """
+    times = {}
+    rng = np.random.default_rng(1)
+    for name, scenario in SCENARIOS.items():
+        issued: List = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            issued.append((statement, parameters))
+
+        with Session(engine, info={"tenant_id": 1}) as db:
+            event.listen(engine, "before_cursor_execute", capture)
+            try:
+                scenario(db, args, rng)
+            finally:
+                event.remove(engine, "before_cursor_execute", capture)
+            total = 0.0
+            for statement, parameters in issued:
+                plan = db.connection().exec_driver_sql(
+                    "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, parameters
+                ).scalar()
+                plan = json.loads(plan) if isinstance(plan, str) else plan
+                total += plan[0]["Planning Time"]
+            times[name] = total
+    return times
+
+
+def plan_counts(db: Session) -> np.ndarray:
+    return np.array(
+        db.execute(
+            text(
+                "SELECT coalesce(sum(generic_plans), 0), coalesce(sum(custom_plans), 0)"
+                " FROM pg_prepared_statements"
+            )
+        ).one(),
+        dtype=np.int64,
+    )
+
+
+def run(engine, args, prepared: bool) -> Dict[str, Dict[str, float]]:
+    results = {}
+    rng = np.random.default_rng(0)
+    with Session(engine, info={"tenant_id": 1}) as db:
+        for name, scenario in SCENARIOS.items():
+            for _ in range(args.warmup):
+                scenario(db, args, rng)
+            before = plan_counts(db) if prepared else None
+            latencies = []
+            for _ in range(args.calls):
+                started = time.perf_counter()
+                scenario(db, args, rng)
+                latencies.append(time.perf_counter() - started)
+            latencies = np.array(latencies) * 1000
+            results[name] = {"p50": np.percentile(latencies, 50), "mean": latencies.mean()}
+            if prepared:
+                results[name]["generic_plans"] = int((plan_counts(db) - before)[0])
+            db.rollback()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=2000)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Leave the seeded schema in place")
+    parser.add_argument("--tenants", type=int, default=20)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--staff", type=int, default=2_000)
+    parser.add_argument("--services", type=int, default=400)
+    parser.add_argument("--appointments", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=5_000)
+    args = parser.parse_args()
+    args.customer_ids = tenant_ids(args, args.customers, 1000)
+    args.staff_ids = tenant_ids(args, args.staff, 100)
+    args.appointment_ids = tenant_ids(args, args.appointments, 1000)
+
+    admin = engine_for("postgresql+psycopg2", True)
+    with admin.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+    try:
+        started = time.perf_counter()
+        seed(admin, args)
+        print(f"seeded in {time.perf_counter() - started:.1f} s")
+        planning = planning_times(admin, args)
+        results = {}
+        for label, drivername, pgbouncer in VARIANTS:
+            engine = engine_for(drivername, pgbouncer)
+            results[label] = run(engine, args, prepared=not pgbouncer)
+            engine.dispose()
+
+        print(
+            f"{'scenario':26} {'psycopg2':>10} {'psycopg':>10} {'prepared':>10} "
+            f"{'planning':>10} {'generic':>8} {'saved':>9}"
+        )
+        saved_total = 0.0
+        for name in SCENARIOS:
+            prepared = results["psycopg, prepared"][name]
+            saved = prepared["generic_plans"] * planning[name]
+            saved_total += saved
+            print(
+                f"{name:26} "
+                + " ".join(f"{results[label][name]['p50']:>8.3f}ms" for label, _, _ in VARIANTS)
+                + f" {planning[name]:>8.3f}ms {prepared['generic_plans']:>8} {saved:>7.0f}ms"
+            )
+        print(
+            f"p50 per call; planner time saved over {args.calls} calls per scenario: "
+            f"{saved_total:.0f} ms"
+        )
+    finally:
+        if not args.keep:
+            with admin.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        admin.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Times waitlist matching for freed slots against a synthetic waitlist.
+
+    python -m benchmarks.waitlist_benchmark --entries 100000 --queries 2000
+
+Entries accept one to three of --services services in one or two windows of
+two to eight hours within the next two weeks. Each query frees a slot of a
+random service, staff member and time and ranks the eligible entries the
+way app.waitlist.matching does.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from app.waitlist.index import WaitlistIndex
+
+ORIGIN = datetime(2030, 1, 7, 8, tzinfo=timezone.utc)
+
+
+def generate(n: int, services: int, staff: int, rng):
+    for id in range(1, n + 1):
+        windows = []
+        for _ in range(rng.integers(1, 3)):
+            start = ORIGIN + timedelta(days=int(rng.integers(14)), minutes=30 * int(rng.integers(20)))
+            end = start + timedelta(hours=int(rng.integers(2, 9)))
+            windows.append({"start": start.isoformat(), "end": end.isoformat()})
+        yield (
+            id,
+            id,
+            rng.choice(services, size=rng.integers(1, 4), replace=False).tolist(),
+            windows,
+            int(rng.integers(staff)) if rng.random() < 0.3 else None,
+            str(rng.integers(100, 110)),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entries", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--staff", type=int, default=50)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    rows = list(generate(args.entries, args.services, args.staff, rng))
+    started = time.perf_counter()
+    index = WaitlistIndex(rows)
+    built = time.perf_counter() - started
+
+    durations = {service_id: 30 * int(rng.integers(1, 5)) for service_id in range(args.services)}
+    timings, found = [], 0
+    for _ in range(args.queries):
+        start = ORIGIN + timedelta(days=int(rng.integers(14)), minutes=30 * int(rng.integers(20)))
+        slot_end = start + timedelta(minutes=30 * int(rng.integers(1, 5)))
+        staff_id, zip_code = int(rng.integers(args.staff)), f"{rng.integers(100, 110)}01"
+        started = time.perf_counter()
+        best = {}
+        for service_id, minutes in durations.items():
+            end = start + timedelta(minutes=minutes)
+            if end > slot_end:
+                continue
+            for candidate in index.eligible(service_id, start, end):
+                if candidate not in best or best[candidate] < minutes:
+                    best[candidate] = minutes
+        ranked = sorted(
+            best,
+            key=lambda candidate: (
+                index.preferred_staff_ids[candidate] != staff_id,
+                not zip_code.startswith(index.zip_prefixes[candidate]),
+                candidate,
+            ),
+        )[:args.limit]
+        timings.append(time.perf_counter() - started)
+        found += len(ranked)
+
+    timings = np.array(timings) * 1000
+    print(
+        f"{len(index)} entries: index built in {built:.2f} s; "
+        f"{args.queries} freed slots, p50 {np.percentile(timings, 50):.2f} ms, "
+        f"p99 {np.percentile(timings, 99):.2f} ms, "
+        f"{args.queries / (timings.sum() / 1000):.0f} slots/s, "
+        f"{found / args.queries:.1f} candidates per slot"
+    )
+
+
+if __name__ == "__main__":
+    main()
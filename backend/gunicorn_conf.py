@@ -0,0 +1,38 @@
+"""
+Gunicorn settings for production:
+
+    gunicorn -c gunicorn_conf.py app.main:app
+
+Values come from app.core.config (WEB_*), so they can be set through the
+environment like every other setting.
+"""
+import os
+
+from app.core.config import settings
+
+
+def cpu_count() -> int:
+    # CPUs this process may run on, which respects container cpusets
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+bind = settings.WEB_BIND
+workers = settings.WEB_WORKERS or cpu_count()
+worker_class = "app.core.worker.ProductionWorker"
+
+# Recycle workers, staggered so they do not all restart at once
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+timeout = 120
+keepalive = settings.WEB_KEEPALIVE
+
+# Each worker imports the app itself: the cache's Redis listener thread and
+# the database pools must not be shared across a fork
+preload_app = False
+
+accesslog = "-"
+errorlog = "-"